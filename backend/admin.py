@@ -1,10 +1,19 @@
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, Query, Request
 from sqlalchemy.orm import Session
-from sqlalchemy import or_
+from sqlalchemy import and_, bindparam, case, delete, func, or_, select, update
 from pydantic import BaseModel
-from typing import List
-from db import UserModel
-from database import get_db 
+from typing import List, Optional
+import base64
+import json
+import os
+from database import get_db, get_read_db
+from models import UserModel, Plan, PlanApplication, PlanParticipant, PlanSearchTerm
+from search_index import escape_like, unindex_users, user_candidates
+from bulk import run_in_chunks
+from view_counter import view_counter
+from plans import invalidate_plan_cache, invalidate_plan_context
+from auth_session import invalidate_user_profile, require_admin
+from user_import import IMPORT_FORMATS, import_users, iter_lines, parse_rows
 
 # =========================================================
 # ✨ Pydantic 스키마 정의 (핵심 수정 사항)
@@ -43,30 +52,121 @@ router = APIRouter()
 # ✨ API 엔드포인트 (수정된 get_all_users 포함)
 # =========================================================
 
-# 사용자 목록 조회 API
+# =========================================================
+# ✨ 사용자 검색 (bigram/trigram 인덱스 + 키셋 페이지네이션)
+# =========================================================
+
+USERS_LIST_MAX = int(os.getenv("USERS_LIST_MAX", "1000"))  # /api/users 한 번에 돌려주는 최대 사용자 수
+
+USER_SORTS = {
+    "username": (UserModel.username, False),
+    "-username": (UserModel.username, True),
+    "id": (UserModel.id, False),
+    "-id": (UserModel.id, True),
+}
+
+
+def user_search_condition(db: Session, search: str):
+    # 검색어 길이와 상관없이 username/email 부분 일치입니다.
+    # 2글자 이상이면 bigram/trigram 색인으로 후보를 좁힌 뒤 확인하고, 1글자(또는 아주 흔한 검색어)는 후보 없이 바로 확인합니다.
+    search = search.strip().lower()
+    escaped = escape_like(search)
+    matches = or_(
+        UserModel.username.ilike(f"%{escaped}%", escape="\\"),
+        UserModel.email.ilike(f"%{escaped}%", escape="\\"),
+    )
+    candidates = user_candidates(db, search)
+    if candidates is None:
+        return matches
+    return and_(UserModel.id.in_(candidates), matches)
+
+
+def _encode_user_cursor(value, user_id: int) -> str:
+    return base64.urlsafe_b64encode(json.dumps([value, user_id]).encode()).decode().rstrip("=")
+
+
+def _decode_user_cursor(cursor: str):
+    try:
+        value, user_id = json.loads(base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)))
+        return value, int(user_id)
+    except (ValueError, TypeError):
+        raise HTTPException(status_code=400, detail="잘못된 cursor 값입니다.")
+
+
+class UserPage(BaseModel):
+    items: List[UserSchema]
+    next_cursor: Optional[str] = None
+    total: Optional[int] = None
+
+
+@router.get("/api/admin/users/search", response_model=UserPage)
+def search_users(
+    q: Optional[str] = None,
+    sort: str = Query("username", pattern="^-?(username|id)$"),
+    cursor: Optional[str] = None,
+    limit: int = Query(50, ge=1, le=200),
+    with_total: bool = True,
+    db: Session = Depends(get_read_db),
+):
+    column, descending = USER_SORTS[sort]
+    conditions = [user_search_condition(db, q)] if q and q.strip() else []
+
+    total = None
+    if with_total:
+        # 행을 가져오지 않고 DB에서 개수만 셉니다.
+        total = db.scalar(select(func.count(UserModel.id)).where(*conditions))
+
+    if cursor:
+        value, user_id = _decode_user_cursor(cursor)
+        if column is UserModel.id:
+            conditions.append(UserModel.id < user_id if descending else UserModel.id > user_id)
+        elif descending:
+            conditions.append(or_(column < value, and_(column == value, UserModel.id < user_id)))
+        else:
+            conditions.append(or_(column > value, and_(column == value, UserModel.id > user_id)))
+
+    order = (column.desc(), UserModel.id.desc()) if descending else (column.asc(), UserModel.id.asc())
+    rows = db.execute(
+        select(UserModel.id, UserModel.username, UserModel.email, UserModel.is_admin)
+        .where(*conditions).order_by(*order).limit(limit + 1)
+    ).all()
+
+    next_cursor = None
+    if len(rows) > limit:
+        rows = rows[:limit]
+        last = rows[-1]
+        next_cursor = _encode_user_cursor(getattr(last, column.key), last.id)
+    return {"items": rows, "next_cursor": next_cursor, "total": total}
+
+
+# 사용자 목록 조회 API (deprecated: 기존 화면 호환용)
+# 예전에는 전체 사용자를 한 번에 돌려줬지만, 이제 id 순으로 최대 limit명만 돌려줍니다.
+# 새 화면은 키셋 페이지네이션이 있는 /api/admin/users/search를 쓰세요.
 # ✨ response_model=List[UserSchema]를 지정하여 직렬화 문제를 해결합니다.
-@router.get("/api/users", response_model=List[UserSchema]) 
-def get_all_users(db: Session = Depends(get_db), search: str = None):
-    query = db.query(UserModel)
+@router.get("/api/users", response_model=List[UserSchema], deprecated=True)
+def get_all_users(
+    db: Session = Depends(get_read_db),
+    search: str = None,
+    limit: int = Query(USERS_LIST_MAX, ge=1, le=USERS_LIST_MAX),
+):
+    query = select(UserModel).order_by(UserModel.id).limit(limit)
     if search:
-        query = query.filter(or_(
-            UserModel.username.ilike(f"%{search}%"),
-            UserModel.email.ilike(f"%{search}%")
-        ))
-    users = query.all()
+        query = query.where(user_search_condition(db, search))
+    users = db.execute(query).scalars().all()
     # SQLAlchemy ORM 객체가 Pydantic UserSchema 목록으로 직렬화되어 반환됩니다.
     return users
 
 # 사용자 상태(is_active) 변경 API (UserModel에 is_active가 있어야 작동)
 @router.put("/api/users/{username}/status")
 def toggle_user_status(username: str, status_update: UserStatusUpdate, db: Session = Depends(get_db)):
-    user = db.query(UserModel).filter(UserModel.username == username).first()
+    user = db.scalar(select(UserModel).where(UserModel.username == username))
     if not user:
         raise HTTPException(status_code=404, detail="User not found")
     
     # db.py의 UserModel에 'is_active' 필드가 추가되었거나 이미 존재해야 합니다.
     user.is_active = status_update.is_active
     db.commit()
+    invalidate_user_profile(username)
     
     return {"message": f"User {username} status updated to {'active' if user.is_active else 'inactive'}", "is_active": user.is_active}
 
@@ -74,7 +174,7 @@ def toggle_user_status(username: str, status_update: UserStatusUpdate, db: Sessi
 # 단일 사용자 관리자 역할 변경 API
 @router.put("/api/users/{username}/role")
 def toggle_user_role(username: str, role_update: UserRoleUpdate, db: Session = Depends(get_db)):
-    user = db.query(UserModel).filter(UserModel.username == username).first()
+    user = db.scalar(select(UserModel).where(UserModel.username == username))
     if not user:
         raise HTTPException(status_code=404, detail="User not found")
         
@@ -82,57 +182,147 @@ def toggle_user_role(username: str, role_update: UserRoleUpdate, db: Session = D
     new_role = 1 if role_update.is_admin else 0
     user.is_admin = new_role
     db.commit()
+    invalidate_user_profile(username)
     
     action = 'admin' if new_role else 'user'
     return {"message": f"User {username} admin status updated to {action}", "is_admin": user.is_admin}
 
 
+# =========================================================
+# ✨ 일괄 처리 (집합 단위 UPDATE/DELETE, ADMIN_BULK_BATCH_SIZE 단위로 나눠 커밋)
+# =========================================================
+
+_plans = Plan.__table__
+_decrement_participants = (
+    _plans.update()
+    .where(_plans.c.id == bindparam("plan_id"))
+    .values(
+        participants=case(
+            (_plans.c.participants > bindparam("n"), _plans.c.participants - bindparam("n")),
+            else_=0,
+        ),
+        revision=_plans.c.revision + 1,
+    )
+)
+
+
+def _update_roles_chunk(db: Session, usernames: list, new_role: int) -> dict:
+    result = db.execute(
+        update(UserModel).where(UserModel.username.in_(usernames)).values(is_admin=new_role),
+        execution_options={"synchronize_session": False},
+    )
+    invalidate_user_profile(*usernames)
+    return {"users": result.rowcount}
+
+
+def _delete_users_chunk(db: Session, usernames: list) -> dict:
+    # 사용자가 만든 계획(과 그 계획의 신청/참가자/검색 색인), 다른 계획에 낸 신청과 참가 기록까지 함께 지웁니다.
+    # 실제로 있는 사용자만 대상으로 삼습니다.
+    users = db.execute(select(UserModel.id, UserModel.username).where(UserModel.username.in_(usernames))).all()
+    if not users:
+        return {"applications": 0, "participations": 0, "plans": 0, "users": 0}
+    user_ids = [user.id for user in users]
+    usernames = [user.username for user in users]
+    plan_ids = [row[0] for row in db.execute(select(Plan.id).where(Plan.username.in_(usernames)))]
+    owned = Plan.id.in_(plan_ids)
+
+    # 남의 계획에 참가 중이었다면 그 계획의 참가 인원을 줄입니다.
+    joined = db.execute(
+        select(PlanParticipant.plan_id, func.count())
+        .where(PlanParticipant.username.in_(usernames), PlanParticipant.plan_id.not_in(plan_ids))
+        .group_by(PlanParticipant.plan_id)
+    ).all()
+    if joined:
+        db.execute(_decrement_participants, [{"plan_id": plan_id, "n": n} for plan_id, n in joined])
+
+    counts = {
+        "applications": db.execute(
+            delete(PlanApplication).where(or_(
+                PlanApplication.username.in_(usernames), PlanApplication.plan_id.in_(plan_ids),
+            )),
+            execution_options={"synchronize_session": False},
+        ).rowcount,
+        "participations": db.execute(
+            delete(PlanParticipant).where(or_(
+                PlanParticipant.username.in_(usernames), PlanParticipant.plan_id.in_(plan_ids),
+            )),
+            execution_options={"synchronize_session": False},
+        ).rowcount,
+    }
+    db.execute(delete(PlanSearchTerm).where(PlanSearchTerm.plan_id.in_(plan_ids)),
+               execution_options={"synchronize_session": False})
+    counts["plans"] = db.execute(delete(Plan).where(owned), execution_options={"synchronize_session": False}).rowcount
+    unindex_users(db, user_ids)
+    counts["users"] = db.execute(
+        delete(UserModel).where(UserModel.username.in_(usernames)),
+        execution_options={"synchronize_session": False},
+    ).rowcount
+    invalidate_user_profile(*usernames)
+
+    for plan_id in plan_ids:
+        view_counter.discard(plan_id)
+        invalidate_plan_context(plan_id)
+    for plan_id in plan_ids + [plan_id for plan_id, _ in joined]:
+        invalidate_plan_cache(plan_id)
+    return counts
+
+
+def delete_users(db: Session, usernames: list) -> dict:
+    return run_in_chunks(db, usernames, _delete_users_chunk, "사용자 삭제")
+
+
 # 일괄 사용자 역할 변경 API (Admin.jsx에서 호출하는 경로)
 @router.put("/api/admin/bulk/role-update")
 def bulk_toggle_user_role(update_data: BulkRoleUpdate, db: Session = Depends(get_db)):
-    users_to_update = db.query(UserModel).filter(UserModel.username.in_(update_data.usernames)).all()
-    
-    if not users_to_update:
-        raise HTTPException(status_code=404, detail="No valid users found for update")
-
     # update_data.is_admin은 bool이므로 0 또는 1로 변환
     new_role = 1 if update_data.is_admin else 0
-    
-    for user in users_to_update:
-        user.is_admin = new_role
-        
-    db.commit()
-    
+    report = run_in_chunks(
+        db, update_data.usernames, lambda db, chunk: _update_roles_chunk(db, chunk, new_role), "역할 변경",
+    )
+    count = report["affected"].get("users", 0)
+    if not count:
+        raise HTTPException(status_code=404, detail="No valid users found for update")
+
     action = 'admin' if new_role else 'user'
-    return {"message": f"Successfully updated role to {action} for {len(users_to_update)} users", "count": len(users_to_update)}
+    return {"message": f"Successfully updated role to {action} for {count} users", "count": count, **report}
 
 
 # 일괄 사용자 계정 삭제 API
 @router.delete("/api/users/bulk/delete")
 def bulk_delete_user(user_list: BulkUsernames, db: Session = Depends(get_db)):
-    users_to_delete = db.query(UserModel).filter(UserModel.username.in_(user_list.usernames)).all()
-
-    if not users_to_delete:
+    report = delete_users(db, user_list.usernames)
+    count = report["affected"].get("users", 0)
+    if not count:
         raise HTTPException(status_code=404, detail="No valid users found for deletion")
 
-    deleted_count = 0
-    for user in users_to_delete:
-        db.delete(user)
-        deleted_count += 1
-        
-    db.commit()
-    
-    return {"message": f"Successfully deleted {deleted_count} users", "count": deleted_count}
+    return {"message": f"Successfully deleted {count} users", "count": count, **report}
 
 
 # 단일 사용자 계정 삭제 API
 @router.delete("/api/users/{username}")
 def delete_user(username: str, db: Session = Depends(get_db)):
-    user = db.query(UserModel).filter(UserModel.username == username).first()
-    if not user:
+    report = delete_users(db, [username])
+    if not report["affected"].get("users"):
         raise HTTPException(status_code=404, detail="User not found")
     
-    db.delete(user)
-    db.commit()
-    
-    return {"message": f"User {username} deleted successfully"}
\ No newline at end of file
+    return {"message": f"User {username} deleted successfully", "affected": report["affected"]}
+
+
+# =========================================================
+# ✨ 사용자 일괄 가져오기 (CSV/NDJSON 본문을 스트리밍으로 읽음, user_import.py)
+# =========================================================
+
+# 본문: CSV(첫 줄 헤더) 또는 NDJSON, 열은 username,email,password[,contact_type,contact_value]
+# 중간에 끊기면 이전 응답/로그의 committed_rows를 skip_rows로 넘겨 같은 파일을 다시 보내면 이어서 가져옵니다.
+@router.post("/api/admin/users/import")
+async def import_users_endpoint(
+    request: Request,
+    format: str = Query("csv", description="csv 또는 ndjson"),
+    skip_rows: int = Query(0, ge=0),
+    db: Session = Depends(get_db),
+):
+    await require_admin(request)
+    if format not in IMPORT_FORMATS:
+        raise HTTPException(status_code=400, detail=f"format은 {', '.join(IMPORT_FORMATS)} 중 하나여야 합니다.")
+
+    return await import_users(db, parse_rows(iter_lines(request.stream()), format), format, skip_rows=skip_rows)
@@ -0,0 +1,103 @@
+# auth_session.py
+
+import os
+import time
+
+from cachetools import TTLCache
+from fastapi import HTTPException, Request
+from fastapi.concurrency import run_in_threadpool
+
+from database import read_session
+from models import UserModel
+
+# --- 로그인 세션 ---
+# main.py의 SessionMiddleware가 request.session을 서명된 쿠키(session)로 저장합니다.
+# 세션에는 uid/username/is_admin과 만료 시각만 넣고, 나머지 프로필은 아래 캐시에서 꺼냅니다.
+SESSION_MAX_AGE = int(os.getenv("SESSION_MAX_AGE", str(60 * 60 * 24 * 7)))  # 초 (쿠키 max_age와 같게)
+# 예전 로그인 방식의 서명 없는 "user" 쿠키도 아이디 확인용으로 읽을지 (기본 꺼짐, 더 이상 발급하지 않음)
+# 누구나 위조할 수 있는 값이므로 켜더라도 세션으로 바꾸지 않고 관리자 권한도 주지 않습니다.
+LEGACY_USER_COOKIE = os.getenv("LEGACY_USER_COOKIE", "false").lower() == "true"
+
+# --- 사용자 프로필 캐시 (워커 단위) ---
+# /api/user는 페이지마다 불리므로, 프로필을 워커 메모리에 잠깐 들고 있어 DB를 다시 읽지 않습니다.
+# admin.py의 역할/상태 변경, 삭제 API가 invalidate_user_profile()로 지웁니다.
+# 다른 워커에는 최대 USER_PROFILE_TTL 동안 이전 프로필이 남을 수 있습니다.
+USER_PROFILE_TTL = float(os.getenv("USER_PROFILE_TTL", "60"))
+USER_PROFILE_MAX_ENTRIES = int(os.getenv("USER_PROFILE_MAX_ENTRIES", "10000"))
+
+_profiles = TTLCache(maxsize=USER_PROFILE_MAX_ENTRIES, ttl=USER_PROFILE_TTL)
+
+
+def start_session(request: Request, profile: dict):
+    request.session["auth"] = {
+        "uid": profile["uid"],
+        "username": profile["username"],
+        "is_admin": bool(profile["is_admin"]),
+        "exp": int(time.time()) + SESSION_MAX_AGE,
+    }
+
+
+def end_session(request: Request):
+    request.session.pop("auth", None)
+
+
+def current_session(request: Request):
+    """유효한 세션이면 {"uid", "username", "is_admin", "exp"}, 아니면 None"""
+    auth = request.session.get("auth")
+    if not auth:
+        return None
+    if auth.get("exp", 0) < time.time():
+        end_session(request)
+        return None
+    return auth
+
+
+def current_username(request: Request):
+    auth = current_session(request)
+    if auth:
+        return auth["username"]
+    return legacy_username(request)
+
+
+def legacy_username(request: Request):
+    return request.cookies.get("user") if LEGACY_USER_COOKIE else None
+
+
+def remember_profile(user: UserModel) -> dict:
+    profile = {
+        "uid": user.id,
+        "username": user.username,
+        "email": user.email,
+        "contact_type": user.contact_type,
+        "contact_value": user.contact_value,
+        "is_admin": user.is_admin,
+    }
+    _profiles[user.username] = profile
+    return profile
+
+
+def _load_user_profile(username: str):
+    with read_session() as db:
+        user = db.query(UserModel).filter(UserModel.username == username).first()
+        return remember_profile(user) if user else None
+
+
+async def get_user_profile(username: str):
+    profile = _profiles.get(username)
+    if profile is not None:
+        return profile
+    return await run_in_threadpool(_load_user_profile, username)
+
+
+def invalidate_user_profile(*usernames: str):
+    for username in usernames:
+        _profiles.pop(username, None)
+
+
+async def require_admin(request: Request) -> dict:
+    """서명된 세션이 있고, DB(프로필 캐시) 기준으로도 관리자인 경우에만 프로필을 돌려줍니다."""
+    auth = current_session(request)
+    profile = await get_user_profile(auth["username"]) if auth else None
+    if not profile or profile["uid"] != auth["uid"] or not profile["is_admin"]:
+        raise HTTPException(status_code=403, detail="관리자만 사용할 수 있습니다.")
+    return profile
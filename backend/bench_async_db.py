@@ -0,0 +1,168 @@
+# bench_async_db.py
+
+# --- 동기 Session vs AsyncSession 처리량 비교 ---
+# uvicorn 워커 1개를 띄우고, 같은 계획 상세 조회를 예전 방식(동기 Session, 스레드풀)과
+# AsyncSession 엔드포인트로 번갈아 부하를 줘서 워커당 초당 처리량을 비교합니다.
+# 이 결과로 DB_ASYNC(database.py의 async 엔진/get_async_db) 기본값과 옮길 라우터를 정합니다.
+# (SQLite/1 vCPU에서는 async가 더 느렸음: 190/127/96 vs 80/68/58 req/s, 0/5/50ms 왕복 - 운영과 같은 MySQL로 다시 재야 함)
+# 실행: python bench_async_db.py [--concurrency 64] [--seconds 10] [--db-latency-ms 0]
+#       (DATABASE_URL의 DB를 사용합니다. 예: DATABASE_URL=mysql+pymysql://user:pw@127.0.0.1/travellink)
+# --db-latency-ms를 주면 쿼리마다 네트워크 왕복 시간을 흉내 냅니다.
+# (동기 경로는 드라이버처럼 스레드를 붙잡고 기다리고, async 경로는 이벤트 루프에 양보하며 기다림)
+# 부하 생성과 async 드라이버가 필요합니다. (pip install httpx aiomysql aiosqlite)
+
+import argparse
+import asyncio
+import os
+import random
+import statistics
+import subprocess
+import sys
+import time
+
+from fastapi import Depends, FastAPI, HTTPException
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+from sqlalchemy.orm import Session
+
+from database import DATABASE_URL, Base, SessionLocal, create_async_db_engine, engine, get_db
+from models import Plan
+from plans import PlanCreate, PlanOut
+
+# --- 벤치마크용 앱 ---
+# 두 엔드포인트는 세션 종류만 다르고 하는 일은 같습니다.
+# /sync/plan/{id}: 라우터와 같은 방식 (동기 Session, 스레드풀), /async/plan/{id}: AsyncSession
+DB_LATENCY = float(os.getenv("BENCH_DB_LATENCY_MS", "0")) / 1000
+app = FastAPI()
+
+# database.py의 엔진과 같은 풀/타임아웃 설정 (DB_ASYNC와 상관없이 비교용으로 항상 만듦)
+async_engine = create_async_db_engine(DATABASE_URL)
+AsyncSessionLocal = async_sessionmaker(async_engine, autoflush=False, expire_on_commit=False)
+
+
+async def get_async_db():
+    async with AsyncSessionLocal() as db:
+        yield db
+
+
+@app.on_event("shutdown")
+async def dispose_async_engine():
+    await async_engine.dispose()  # aiosqlite 연결 스레드가 남으면 프로세스가 끝나지 않음
+
+
+@app.get("/sync/plan/{plan_id}", response_model=PlanOut)
+def sync_plan_detail(plan_id: int, db: Session = Depends(get_db)):
+    if DB_LATENCY:
+        time.sleep(DB_LATENCY)
+    plan = db.query(Plan).filter(Plan.id == plan_id).first()
+    if not plan:
+        raise HTTPException(status_code=404, detail="Plan not found")
+    return plan
+
+
+@app.get("/async/plan/{plan_id}", response_model=PlanOut)
+async def async_plan_detail(plan_id: int, db: AsyncSession = Depends(get_async_db)):
+    if DB_LATENCY:
+        await asyncio.sleep(DB_LATENCY)
+    plan = (await db.execute(select(Plan).where(Plan.id == plan_id))).scalar()
+    if not plan:
+        raise HTTPException(status_code=404, detail="Plan not found")
+    return plan
+
+
+def seed(count: int) -> list:
+    Base.metadata.create_all(bind=engine)
+    db = SessionLocal()
+    try:
+        ids = [row[0] for row in db.query(Plan.id).limit(count)]
+        missing = count - len(ids)
+        if missing > 0:
+            plans = [
+                Plan(**PlanCreate(title=f"bench-{i}", destination="서울", itinerary={"1일차": []}).model_dump())
+                for i in range(missing)
+            ]
+            db.add_all(plans)
+            db.commit()
+            ids += [plan.id for plan in plans]
+        return ids
+    finally:
+        db.close()
+
+
+async def load(base_url: str, path: str, ids: list, concurrency: int, seconds: float) -> dict:
+    import httpx
+
+    latencies = []
+    errors = 0
+    deadline = time.perf_counter() + seconds
+
+    async def user(client):
+        nonlocal errors
+        while time.perf_counter() < deadline:
+            started = time.perf_counter()
+            response = await client.get(path.format(id=random.choice(ids)))
+            latencies.append(time.perf_counter() - started)
+            if response.status_code != 200:
+                errors += 1
+
+    limits = httpx.Limits(max_connections=concurrency, max_keepalive_connections=concurrency)
+    async with httpx.AsyncClient(base_url=base_url, limits=limits, timeout=30) as client:
+        await client.get(path.format(id=ids[0]))  # 워밍업
+        started = time.perf_counter()
+        await asyncio.gather(*(user(client) for _ in range(concurrency)))
+        elapsed = time.perf_counter() - started
+
+    latencies.sort()
+    return {
+        "rps": len(latencies) / elapsed,
+        "p50_ms": statistics.median(latencies) * 1000,
+        "p95_ms": latencies[int(len(latencies) * 0.95) - 1] * 1000,
+        "errors": errors,
+    }
+
+
+def wait_ready(base_url: str, timeout: float = 30):
+    import httpx
+
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        try:
+            httpx.get(base_url + "/docs", timeout=1)
+            return
+        except httpx.HTTPError:
+            time.sleep(0.2)
+    raise RuntimeError("uvicorn이 시작되지 않았습니다.")
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--concurrency", type=int, default=64)
+    parser.add_argument("--seconds", type=float, default=10)
+    parser.add_argument("--plans", type=int, default=500)
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--db-latency-ms", type=float, default=0)
+    args = parser.parse_args()
+
+    ids = seed(args.plans)
+    base_url = f"http://127.0.0.1:{args.port}"
+    server = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "bench_async_db:app", "--port", str(args.port),
+         "--workers", "1", "--log-level", "warning"],
+        cwd=os.path.dirname(os.path.abspath(__file__)),
+        env={**os.environ, "BENCH_DB_LATENCY_MS": str(args.db_latency_ms)},
+    )
+    try:
+        wait_ready(base_url)
+        print(f"🏁 워커 1개, 동시 접속 {args.concurrency}, 구간별 {args.seconds:.0f}초, "
+              f"DB 왕복 {args.db_latency_ms:.0f}ms")
+        for name, path in [("sync Session", "/sync/plan/{id}"), ("AsyncSession", "/async/plan/{id}")]:
+            result = asyncio.run(load(base_url, path, ids, args.concurrency, args.seconds))
+            print(f"  {name}: {result['rps']:.0f} req/s, p50 {result['p50_ms']:.1f}ms, "
+                  f"p95 {result['p95_ms']:.1f}ms, 오류 {result['errors']}")
+    finally:
+        server.terminate()
+        server.wait()
+
+
+if __name__ == "__main__":
+    main()
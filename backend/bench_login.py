@@ -0,0 +1,162 @@
+# bench_login.py
+
+# --- 로그인 처리량 비교 (bcrypt 인라인 vs 해시 전용 프로세스 풀) ---
+# uvicorn 워커 1개를 띄우고 동시 로그인 부하를 주면서, 같은 워커의 가벼운 요청(/ping) 지연도 함께 잽니다.
+# /legacy/login: 예전 방식 (스레드풀에서 passlib 검증, API 워커의 GIL을 같이 씀)
+# /login: 지금 방식 (utils.verify_and_update_async, 프로세스 풀 + 대기열 한도 초과 시 503)
+# 실행: python bench_login.py [--concurrency 32] [--seconds 10] [--users 50]
+#       (DATABASE_URL의 DB에 bench-login-* 사용자를 만듭니다. BCRYPT_ROUNDS, PASSWORD_HASH_* 환경 변수를 그대로 씀)
+# 부하 생성에는 httpx가 필요합니다. (pip install httpx)
+
+import argparse
+import asyncio
+import os
+import random
+import statistics
+import subprocess
+import sys
+import time
+
+from fastapi import Depends, FastAPI, HTTPException
+from sqlalchemy.orm import Session
+
+from database import Base, SessionLocal, engine, get_db
+from log import LoginRequest, router as log_router
+from models import UserModel
+from utils import BCRYPT_ROUNDS, PASSWORD_HASH_MAX_QUEUE, PASSWORD_HASH_WORKERS, hash_password, \
+    shutdown_password_pool, verify_password
+
+PASSWORD = "bench-password"
+
+# --- 벤치마크용 앱 ---
+app = FastAPI()
+app.include_router(log_router)
+
+
+@app.post("/legacy/login")
+def legacy_login(data: LoginRequest, db: Session = Depends(get_db)):
+    user = db.query(UserModel).filter(UserModel.username == data.username).first()
+    if not user or not verify_password(data.password, user.password):
+        raise HTTPException(status_code=401, detail="아이디 또는 비밀번호가 틀렸습니다.")
+    return {"username": user.username}
+
+
+@app.get("/ping")
+async def ping():
+    return {"ok": True}
+
+
+@app.on_event("shutdown")
+def close_resources():
+    shutdown_password_pool()
+
+
+def seed(count: int) -> list:
+    Base.metadata.create_all(bind=engine)
+    names = [f"bench-login-{i}" for i in range(count)]
+    db = SessionLocal()
+    try:
+        existing = {row[0] for row in db.query(UserModel.username).filter(UserModel.username.in_(names))}
+        hashed = hash_password(PASSWORD)  # 모두 같은 비밀번호 (현재 BCRYPT_ROUNDS)
+        db.add_all(
+            UserModel(username=name, email=f"{name}@bench.local", password=hashed)
+            for name in names if name not in existing
+        )
+        db.commit()
+        return names
+    finally:
+        db.close()
+
+
+async def load(base_url: str, path: str, names: list, concurrency: int, seconds: float) -> dict:
+    import httpx
+
+    latencies = []
+    statuses = {}
+    pings = []
+    deadline = time.perf_counter() + seconds
+
+    async def user(client):
+        while time.perf_counter() < deadline:
+            started = time.perf_counter()
+            response = await client.post(path, json={"username": random.choice(names), "password": PASSWORD})
+            statuses[response.status_code] = statuses.get(response.status_code, 0) + 1
+            if response.status_code == 200:
+                latencies.append(time.perf_counter() - started)
+            elif response.status_code == 503:
+                # 실제 클라이언트처럼 Retry-After만큼 쉬었다가 다시 시도
+                await asyncio.sleep(float(response.headers.get("Retry-After", "1")))
+
+    async def prober(client):
+        # 로그인 부하 중에 다른 요청이 얼마나 밀리는지 (초당 10번)
+        while time.perf_counter() < deadline:
+            started = time.perf_counter()
+            await client.get("/ping")
+            pings.append(time.perf_counter() - started)
+            await asyncio.sleep(0.1)
+
+    limits = httpx.Limits(max_connections=concurrency + 1, max_keepalive_connections=concurrency + 1)
+    async with httpx.AsyncClient(base_url=base_url, limits=limits, timeout=60) as client:
+        await client.post(path, json={"username": names[0], "password": PASSWORD})  # 워밍업 (프로세스 풀 시작)
+        started = time.perf_counter()
+        await asyncio.gather(prober(client), *(user(client) for _ in range(concurrency)))
+        elapsed = time.perf_counter() - started
+
+    latencies.sort()
+    pings.sort()
+    return {
+        "rps": len(latencies) / elapsed,
+        "p50_ms": statistics.median(latencies) * 1000 if latencies else 0,
+        "p95_ms": latencies[int(len(latencies) * 0.95) - 1] * 1000 if latencies else 0,
+        "ping_p50_ms": statistics.median(pings) * 1000,
+        "ping_p95_ms": pings[int(len(pings) * 0.95) - 1] * 1000,
+        "rejected": statuses.get(503, 0),
+        "errors": sum(count for status, count in statuses.items() if status not in (200, 503)),
+    }
+
+
+def wait_ready(base_url: str, timeout: float = 30):
+    import httpx
+
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        try:
+            httpx.get(base_url + "/ping", timeout=1)
+            return
+        except httpx.HTTPError:
+            time.sleep(0.2)
+    raise RuntimeError("uvicorn이 시작되지 않았습니다.")
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--concurrency", type=int, default=32)
+    parser.add_argument("--seconds", type=float, default=10)
+    parser.add_argument("--users", type=int, default=50)
+    parser.add_argument("--port", type=int, default=8766)
+    args = parser.parse_args()
+
+    names = seed(args.users)
+    base_url = f"http://127.0.0.1:{args.port}"
+    server = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "bench_login:app", "--port", str(args.port),
+         "--workers", "1", "--log-level", "warning"],
+        cwd=os.path.dirname(os.path.abspath(__file__)),
+        stdout=subprocess.DEVNULL,  # 로그인 라우터의 print 출력은 버림
+    )
+    try:
+        wait_ready(base_url)
+        print(f"🏁 워커 1개, CPU {os.cpu_count()}개, 동시 로그인 {args.concurrency}, 구간별 {args.seconds:.0f}초, "
+              f"bcrypt rounds {BCRYPT_ROUNDS}, 해시 프로세스 {PASSWORD_HASH_WORKERS}, 대기열 {PASSWORD_HASH_MAX_QUEUE}")
+        for name, path in [("스레드풀 (예전)", "/legacy/login"), ("프로세스 풀", "/login")]:
+            result = asyncio.run(load(base_url, path, names, args.concurrency, args.seconds))
+            print(f"  {name}: {result['rps']:.1f} login/s, p50 {result['p50_ms']:.0f}ms, p95 {result['p95_ms']:.0f}ms, "
+                  f"/ping p50 {result['ping_p50_ms']:.1f}ms p95 {result['ping_p95_ms']:.1f}ms, "
+                  f"503 {result['rejected']}건, 오류 {result['errors']}건")
+    finally:
+        server.terminate()
+        server.wait()
+
+
+if __name__ == "__main__":
+    main()
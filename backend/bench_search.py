@@ -0,0 +1,138 @@
+# bench_search.py
+
+# --- 계획 검색 지연 측정 (역색인 50만 계획) ---
+# plan_search_terms에 가짜 계획 N개의 posting을 채우고, 예전 방식(모든 posting을 GROUP BY/HAVING)과
+# 지금 방식(search_index.search_plan_ids: 가장 드문 토큰의 가중치 상위 posting에 나머지 토큰을 PK 조인)의 지연을 비교합니다.
+# 토큰은 Zipf 분포로 뽑아서 "여행"/"서울"처럼 거의 모든 계획에 있는 토큰과 드문 토큰이 섞이게 합니다.
+# 실행: python bench_search.py [--plans 500000] [--terms-per-plan 25] [--repeat 30]
+#       [--url sqlite:///bench_search.db]   (색인 테이블만 만들며, 이미 채워져 있으면 그대로 씁니다)
+# 50만 계획(SQLite) 측정: 전체 p99 예전 845ms → 지금 18ms, 흔한 토큰 3개 p99 907ms → 19ms
+
+import argparse
+import random
+import statistics
+import time
+
+from sqlalchemy import func, select
+from sqlalchemy.orm import Session
+
+from database import create_db_engine
+from models import PlanSearchTerm
+from search_index import search_plan_ids, tokenize
+
+VOCABULARY = 20000
+ZIPF_S = 1.1
+
+
+def term_name(rank: int) -> str:
+    return f"t{rank:05d}"
+
+
+def seed(engine, plans: int, terms_per_plan: int):
+    PlanSearchTerm.__table__.create(engine, checkfirst=True)
+    with Session(engine) as db:
+        if db.scalar(select(func.count(func.distinct(PlanSearchTerm.plan_id)))) >= plans:
+            return
+        db.query(PlanSearchTerm).delete()
+        db.commit()
+
+    print(f"🌱 계획 {plans:,}개 × 토큰 약 {terms_per_plan}개 색인 생성 중...")
+    rng = random.Random(42)
+    ranks = list(range(1, VOCABULARY + 1))
+    weights = [1 / rank ** ZIPF_S for rank in ranks]
+    raw = engine.raw_connection()
+    try:
+        cursor = raw.cursor()
+        batch = []
+        for plan_id in range(1, plans + 1):
+            for rank in set(rng.choices(ranks, weights, k=terms_per_plan)):
+                batch.append((term_name(rank), plan_id, rng.randint(1, 15)))
+            if len(batch) >= 200000:
+                cursor.executemany("INSERT INTO plan_search_terms (term, plan_id, weight) VALUES (?, ?, ?)", batch)
+                batch = []
+        if batch:
+            cursor.executemany("INSERT INTO plan_search_terms (term, plan_id, weight) VALUES (?, ?, ?)", batch)
+        raw.commit()
+        if engine.dialect.name == "sqlite":
+            cursor.execute("ANALYZE")  # 운영 MySQL처럼 인덱스 통계가 있는 상태로
+        raw.commit()
+    finally:
+        raw.close()
+
+
+def legacy_search(db: Session, query: str, limit: int) -> list:
+    """예전 방식: 모든 토큰의 posting을 모아 GROUP BY/HAVING (posting 길이에 비례)"""
+    terms = sorted(set(tokenize(query)))
+    score = func.sum(PlanSearchTerm.weight)
+    stmt = (
+        select(PlanSearchTerm.plan_id, score.label("score"))
+        .where(PlanSearchTerm.term.in_(terms))
+        .group_by(PlanSearchTerm.plan_id)
+        .having(func.count() == len(terms))
+        .order_by(score.desc(), PlanSearchTerm.plan_id.desc())
+        .limit(limit)
+    )
+    return [(row.plan_id, int(row.score)) for row in db.execute(stmt)]
+
+
+def queries(db: Session) -> dict:
+    def df(rank):
+        return db.scalar(select(func.count()).where(PlanSearchTerm.term == term_name(rank)))
+
+    mid, rare = 200, 5000
+    print(f"  토큰별 계획 수: t00001 {df(1):,}, t00002 {df(2):,}, t00010 {df(10):,}, "
+          f"t{mid:05d} {df(mid):,}, t{rare:05d} {df(rare):,}")
+    return {
+        "흔한 토큰 1개": term_name(1),
+        "흔한 토큰 2개": f"{term_name(1)} {term_name(2)}",
+        "흔한 토큰 3개": f"{term_name(1)} {term_name(2)} {term_name(10)}",
+        "흔한 + 중간": f"{term_name(1)} {term_name(mid)}",
+        "흔한 + 드문": f"{term_name(2)} {term_name(rare)}",
+        "중간 토큰 2개": f"{term_name(mid)} {term_name(mid + 1)}",
+        "드문 토큰 1개": term_name(rare),
+    }
+
+
+def measure(db: Session, search, query: str, repeat: int) -> list:
+    search(db, query, 21)  # 워밍업 (페이지 캐시)
+    timings = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        search(db, query, 21)
+        timings.append((time.perf_counter() - started) * 1000)
+    return timings
+
+
+def p99(values: list) -> float:
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * 0.99))]
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--url", default="sqlite:///bench_search.db")
+    parser.add_argument("--plans", type=int, default=500000)
+    parser.add_argument("--terms-per-plan", type=int, default=25)
+    parser.add_argument("--repeat", type=int, default=30)
+    args = parser.parse_args()
+
+    engine = create_db_engine(args.url)
+    seed(engine, args.plans, args.terms_per_plan)
+    with Session(engine) as db:
+        print(f"🏁 계획 {args.plans:,}개, 쿼리마다 {args.repeat}번, 첫 페이지(21개) 기준 ms")
+        cases = queries(db)
+        totals = {"예전": [], "지금": []}
+        for label, query in cases.items():
+            line = f"  {label:<10}"
+            for name, search in [("예전", legacy_search), ("지금", search_plan_ids)]:
+                timings = measure(db, search, query, args.repeat)
+                totals[name] += timings
+                line += f"  {name} p50 {statistics.median(timings):7.1f} / p99 {p99(timings):7.1f}"
+            print(line)
+        for name, timings in totals.items():
+            print(f"  전체 {name}: p50 {statistics.median(timings):.1f}ms, p99 {p99(timings):.1f}ms")
+    engine.dispose()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,153 @@
+# bench_serialization.py
+
+# --- 계획 응답 직렬화/압축 비교 ---
+# 일정(itinerary)이 긴 계획을 만들어 두고, 예전 방식과 지금 방식의 요청당 CPU 시간과 전송 바이트를 잽니다.
+#   예전: PlanOut.model_validate(...).model_dump(mode="json") + JSONResponse(json.dumps), 압축 없음
+#   지금: plan_to_dict() + ORJSONResponse(orjson), Accept-Encoding에 따라 br/gzip 압축 (compression.py)
+# HTTP 서버/클라이언트 비용이 섞이지 않도록 ASGI 앱을 직접 호출해서 잽니다. (캐시가 찬 상태의 요청 기준)
+# 실행: python bench_serialization.py [--plans 100] [--days 5] [--requests 200]
+#       (DATABASE_URL의 DB에 bench-serialization 계획을 만듭니다)
+
+import argparse
+import asyncio
+import random
+import time
+
+from fastapi import FastAPI
+from fastapi.responses import JSONResponse, ORJSONResponse
+
+from compression import CompressionMiddleware
+from database import Base, SessionLocal, engine
+from models import Plan
+from plans import PlanOut, plan_to_dict, router as plans_router
+
+PLACES = ["경복궁", "북촌 한옥마을", "광장시장", "남산서울타워", "해운대 해수욕장", "감천문화마을", "성산일출봉", "우도"]
+NOTES = [
+    "오전에 방문하면 사람이 적어 여유롭게 둘러볼 수 있습니다.",
+    "근처 맛집에서 점심을 먹고 이동하는 것을 추천합니다.",
+    "대중교통으로 이동 시 약 30분 정도 걸립니다.",
+    "입장료가 있으니 미리 예매하면 할인받을 수 있습니다.",
+]
+
+
+def _itinerary(days: int) -> dict:
+    return {
+        f"{day}일차": [
+            {"time": f"{9 + slot * 2:02d}:00", "place": random.choice(PLACES), "description": random.choice(NOTES),
+             "category": random.choice(["관광", "식사", "카페", "쇼핑"])}
+            for slot in range(6)
+        ]
+        for day in range(1, days + 1)
+    }
+
+
+def seed(count: int, days: int) -> list:
+    Base.metadata.create_all(bind=engine)
+    db = SessionLocal()
+    try:
+        plans = db.query(Plan).filter(Plan.title.like("bench-serialization-%")).limit(count).all()
+        missing = count - len(plans)
+        if missing > 0:
+            new = [
+                Plan(title=f"bench-serialization-{i}", username="bench", destination="서울", summary="요약 " * 20,
+                     tags="도시,맛집", itinerary=_itinerary(days))
+                for i in range(missing)
+            ]
+            db.add_all(new)
+            db.commit()
+            plans += new
+        for plan in plans:
+            db.refresh(plan)
+        return plans
+    finally:
+        db.close()
+
+
+def build_app(legacy_list: list, legacy_detail: dict) -> FastAPI:
+    app = FastAPI(default_response_class=ORJSONResponse)
+    app.add_middleware(CompressionMiddleware)
+    app.include_router(plans_router)
+
+    # 예전 경로: 캐시해 둔 PlanOut 덤프를 요청마다 json.dumps로 직렬화 (압축 없음)
+    @app.get("/legacy/plans")
+    async def legacy_plans():
+        return JSONResponse([{**plan, "views": plan["views"]} for plan in legacy_list])
+
+    @app.get("/legacy/plan/{plan_id}")
+    async def legacy_plan(plan_id: int):
+        plan = legacy_detail[plan_id]
+        return JSONResponse({**plan, "views": plan["views"]})
+
+    return app
+
+
+async def call(app, path: str, accept_encoding: str) -> int:
+    """ASGI 앱을 직접 호출하고 응답 본문 바이트 수를 돌려줍니다."""
+    sent = 0
+
+    async def receive():
+        return {"type": "http.request", "body": b"", "more_body": False}
+
+    async def send(message):
+        nonlocal sent
+        if message["type"] == "http.response.body":
+            sent += len(message.get("body", b""))
+
+    scope = {
+        "type": "http", "asgi": {"version": "3.0"}, "http_version": "1.1", "method": "GET", "scheme": "http",
+        "path": path, "raw_path": path.encode(), "query_string": b"", "root_path": "",
+        "headers": [(b"host", b"bench"), (b"accept-encoding", accept_encoding.encode())],
+        "client": ("127.0.0.1", 1), "server": ("bench", 80),
+    }
+    await app(scope, receive, send)
+    return sent
+
+
+async def measure(app, path: str, accept_encoding: str, requests: int) -> tuple:
+    size = await call(app, path, accept_encoding)  # 워밍업 (캐시 채움)
+    started = time.process_time()
+    for _ in range(requests):
+        await call(app, path, accept_encoding)
+    return (time.process_time() - started) / requests * 1000, size
+
+
+def time_per_call(func, repeat: int) -> float:
+    started = time.process_time()
+    for _ in range(repeat):
+        func()
+    return (time.process_time() - started) / repeat * 1000
+
+
+async def run(args):
+    plans = seed(args.plans, args.days)
+    plans.sort(key=lambda plan: (plan.created_at, plan.id), reverse=True)
+    legacy_list = [PlanOut.model_validate(plan).model_dump(mode="json") for plan in plans]
+    legacy_detail = {plan["id"]: plan for plan in legacy_list}
+    app = build_app(legacy_list, legacy_detail)
+    detail_id = plans[0].id
+
+    print(f"🏁 계획 {len(plans)}개 (일정 {args.days}일 × 6곳), 요청 {args.requests}번씩, 요청당 CPU ms / 응답 바이트")
+
+    # 캐시를 새로 채울 때 드는 비용 (계획 목록 전체)
+    validate = time_per_call(lambda: [PlanOut.model_validate(p).model_dump(mode="json") for p in plans], 20)
+    direct = time_per_call(lambda: [plan_to_dict(p) for p in plans], 20)
+    print(f"  캐시 채우기 (목록 {len(plans)}개): PlanOut 검증 {validate:.2f}ms → plan_to_dict {direct:.2f}ms")
+
+    for label, before, after in [
+        ("GET /plans", "/legacy/plans", "/plans"),
+        (f"GET /plan/{detail_id}", f"/legacy/plan/{detail_id}", f"/plan/{detail_id}"),
+    ]:
+        cpu, size = await measure(app, before, "identity", args.requests)
+        print(f"  {label}")
+        print(f"    예전 (json, 압축 없음)  {cpu:7.3f}ms  {size:>9,} B")
+        for encoding in ("identity", "gzip", "br"):
+            cpu, size = await measure(app, after, encoding, args.requests)
+            print(f"    지금 (orjson, {encoding:<8}) {cpu:7.3f}ms  {size:>9,} B")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--plans", type=int, default=100)
+    parser.add_argument("--days", type=int, default=5)
+    parser.add_argument("--requests", type=int, default=200)
+    asyncio.run(run(parser.parse_args()))
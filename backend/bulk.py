@@ -0,0 +1,50 @@
+# bulk.py
+
+import os
+
+from fastapi import HTTPException
+from sqlalchemy.exc import SQLAlchemyError
+from sqlalchemy.orm import Session
+
+# --- 관리자 일괄 처리 ---
+# 대상 행을 하나씩 불러와 수정/삭제하지 않고, 키 목록을 일정 크기로 나눠
+# 조각마다 `UPDATE/DELETE ... WHERE key IN (...)` 몇 개로 처리한 뒤 바로 커밋합니다.
+# (긴 트랜잭션과 행 단위 쿼리를 피하고, 조각별 진행 상황을 응답으로 돌려줍니다)
+ADMIN_BULK_BATCH_SIZE = int(os.getenv("ADMIN_BULK_BATCH_SIZE", "500"))
+
+
+def chunked(items: list, size: int):
+    for start in range(0, len(items), size):
+        yield items[start:start + size]
+
+
+def run_in_chunks(db: Session, keys: list, apply, label: str, batch_size: int = None) -> dict:
+    """
+    apply(db, chunk)는 조각 하나를 처리하고 {항목: 영향받은 행 수}를 돌려줍니다.
+    중간에 실패하면 그 조각만 롤백되고, 이미 끝난 조각 수를 담아 500을 돌려줍니다.
+    """
+    keys = list(dict.fromkeys(keys))  # 중복 제거 (순서 유지)
+    size = batch_size or ADMIN_BULK_BATCH_SIZE
+    total_chunks = (len(keys) + size - 1) // size
+    chunks = []
+    affected = {}
+    for number, chunk in enumerate(chunked(keys, size), start=1):
+        try:
+            counts = apply(db, chunk)
+            db.commit()
+        except SQLAlchemyError as e:
+            db.rollback()
+            raise HTTPException(
+                status_code=500,
+                detail=f"{label} 중 오류 ({number - 1}/{total_chunks}개 조각 완료): {str(e)}",
+            )
+        chunks.append({"chunk": number, "keys": len(chunk), **counts})
+        for name, count in counts.items():
+            affected[name] = affected.get(name, 0) + count
+        print(f"🧹 {label}: {number}/{total_chunks} 조각 완료 {counts}")
+    return {
+        "requested": len(keys),
+        "batch_size": size,
+        "chunks": chunks,
+        "affected": affected,
+    }
@@ -0,0 +1,221 @@
+# cache.py
+
+import asyncio
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+from contextlib import contextmanager
+
+# --- 로컬 영구 캐시 ---
+# gunicorn 워커들이 같은 SQLite 파일을 공유하므로, 한 워커가 만든 결과를 다른 워커도 재사용하고
+# 서버를 재시작해도 캐시가 유지됩니다. (WAL 모드라 읽기는 쓰기에 막히지 않습니다.)
+CACHE_PATH = os.getenv(
+    "AI_CACHE_PATH",
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), "ai_cache.db"),
+)
+
+_local = threading.local()
+
+# 적중할 때마다 last_access/통계를 UPDATE하면 읽기 한 번에 쓰기가 두 번 생기므로,
+# 메모리에 모아 두었다가 CACHE_FLUSH_INTERVAL초마다(또는 set/stats/종료 때) 한 트랜잭션으로 씁니다.
+CACHE_FLUSH_INTERVAL = float(os.getenv("AI_CACHE_FLUSH_INTERVAL", "5"))
+_caches = []
+
+CACHE_SCHEMA = """
+    CREATE TABLE IF NOT EXISTS cache_entries (
+        namespace TEXT NOT NULL,
+        key TEXT NOT NULL,
+        value TEXT NOT NULL,
+        created_at REAL NOT NULL,
+        expires_at REAL NOT NULL,
+        last_access REAL NOT NULL,
+        cost_ms REAL NOT NULL DEFAULT 0,
+        PRIMARY KEY (namespace, key)
+    );
+    CREATE INDEX IF NOT EXISTS ix_cache_entries_lru ON cache_entries (namespace, last_access);
+    CREATE TABLE IF NOT EXISTS cache_stats (
+        namespace TEXT PRIMARY KEY,
+        hits INTEGER NOT NULL DEFAULT 0,
+        misses INTEGER NOT NULL DEFAULT 0,
+        saved_ms REAL NOT NULL DEFAULT 0
+    );
+"""
+
+
+def connect(path, schema: str = CACHE_SCHEMA):
+    # 스레드마다 연결을 하나씩 재사용하고, 처음 쓰는 스키마는 그때 만들어 둡니다.
+    if not hasattr(_local, "conns"):
+        _local.conns = {}
+        _local.ready = set()
+    conn = _local.conns.get(path)
+    if conn is None:
+        conn = sqlite3.connect(path, timeout=5, isolation_level=None)
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=NORMAL")
+        _local.conns[path] = conn
+    if (path, schema) not in _local.ready:
+        conn.executescript(schema)
+        _local.ready.add((path, schema))
+    return conn
+
+
+@contextmanager
+def transaction(conn):
+    # 자동 커밋(isolation_level=None) 연결에서 여러 문장을 한 트랜잭션으로 묶습니다.
+    conn.execute("BEGIN IMMEDIATE")
+    try:
+        yield conn
+    except BaseException:
+        conn.execute("ROLLBACK")
+        raise
+    conn.execute("COMMIT")
+
+
+def make_key(payload) -> str:
+    # 정규화된 요청(dict)을 정렬된 JSON으로 만든 뒤 해시해서 키로 사용합니다.
+    raw = json.dumps(payload, ensure_ascii=False, sort_keys=True, separators=(",", ":"))
+    return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+
+class PersistentCache:
+    """
+    TTL + LRU 제거를 지원하는 SQLite 기반 응답 캐시 (네임스페이스 단위).
+    stale_ttl을 주면 TTL이 지난 뒤에도 그 시간 동안은 오래된 값을 돌려줄 수 있습니다. (stale-while-revalidate)
+    """
+
+    def __init__(self, namespace: str, ttl: float, max_entries: int, path: str = CACHE_PATH, stale_ttl: float = 0):
+        self.namespace = namespace
+        self.ttl = ttl
+        self.stale_ttl = stale_ttl
+        self.max_entries = max_entries
+        self.path = path
+        self._lock = threading.Lock()
+        self._touched = {}  # key -> 마지막 적중 시각
+        self._hits = self._misses = 0
+        self._saved_ms = 0.0
+        self._flushed_at = time.monotonic()
+        _caches.append(self)
+
+    def get(self, key):
+        return self.lookup(key, allow_stale=False)[0]
+
+    def lookup(self, key, allow_stale: bool = True):
+        """(value, fresh)를 돌려줍니다. 없으면 (None, False)"""
+        conn = connect(self.path)
+        now = time.time()
+        row = conn.execute(
+            "SELECT value, created_at, expires_at, cost_ms FROM cache_entries WHERE namespace = ? AND key = ?",
+            (self.namespace, key),
+        ).fetchone()
+        fresh = row is not None and row[1] + self.ttl > now
+        if row is None or row[2] <= now or not (fresh or allow_stale):
+            self._record(misses=1)
+            return None, False
+        self._record(key, now, hits=1, saved_ms=row[3])
+        return json.loads(row[0]), fresh
+
+    def set(self, key, value, cost_ms: float = 0):
+        conn = connect(self.path)
+        now = time.time()
+        conn.execute(
+            "INSERT OR REPLACE INTO cache_entries (namespace, key, value, created_at, expires_at, last_access, cost_ms) "
+            "VALUES (?, ?, ?, ?, ?, ?, ?)",
+            (self.namespace, key, json.dumps(value, ensure_ascii=False), now,
+             now + self.ttl + self.stale_ttl, now, cost_ms),
+        )
+        self.flush()  # LRU 제거가 최신 last_access를 보도록
+        self._evict(conn, now)
+
+    def delete(self, key):
+        conn = connect(self.path)
+        conn.execute("DELETE FROM cache_entries WHERE namespace = ? AND key = ?", (self.namespace, key))
+
+    # 비동기 엔드포인트용: 다른 워커가 쓰는 중이면 SQLite 잠금을 최대 5초(busy timeout) 기다릴 수 있어
+    # 이벤트 루프를 막지 않도록 스레드에서 실행합니다. (연결은 스레드마다 따로, 통계는 _lock으로 보호)
+    async def get_async(self, key):
+        return await asyncio.to_thread(self.get, key)
+
+    async def lookup_async(self, key, allow_stale: bool = True):
+        return await asyncio.to_thread(self.lookup, key, allow_stale)
+
+    async def set_async(self, key, value, cost_ms: float = 0):
+        await asyncio.to_thread(self.set, key, value, cost_ms)
+
+    def _evict(self, conn, now):
+        # 만료된 항목을 먼저 지우고, 그래도 넘치면 가장 오래 안 쓰인 항목부터 지웁니다.
+        conn.execute("DELETE FROM cache_entries WHERE namespace = ? AND expires_at <= ?", (self.namespace, now))
+        (count,) = conn.execute(
+            "SELECT COUNT(*) FROM cache_entries WHERE namespace = ?", (self.namespace,)
+        ).fetchone()
+        overflow = count - self.max_entries
+        if overflow > 0:
+            conn.execute(
+                "DELETE FROM cache_entries WHERE namespace = ? AND key IN ("
+                "SELECT key FROM cache_entries WHERE namespace = ? ORDER BY last_access LIMIT ?)",
+                (self.namespace, self.namespace, overflow),
+            )
+
+    def _record(self, key=None, now=None, hits=0, misses=0, saved_ms=0):
+        with self._lock:
+            if key is not None:
+                self._touched[key] = now
+            self._hits += hits
+            self._misses += misses
+            self._saved_ms += saved_ms
+            due = time.monotonic() - self._flushed_at >= CACHE_FLUSH_INTERVAL
+        if due:
+            self.flush()
+
+    def flush(self):
+        """메모리에 모아 둔 last_access/통계를 한 트랜잭션으로 씁니다."""
+        with self._lock:
+            touched, self._touched = self._touched, {}
+            hits, misses, saved_ms = self._hits, self._misses, self._saved_ms
+            self._hits = self._misses = 0
+            self._saved_ms = 0.0
+            self._flushed_at = time.monotonic()
+        if not (touched or hits or misses):
+            return
+        try:
+            with transaction(connect(self.path)) as conn:
+                conn.executemany(
+                    "UPDATE cache_entries SET last_access = MAX(last_access, ?) WHERE namespace = ? AND key = ?",
+                    [(accessed, self.namespace, key) for key, accessed in sorted(touched.items())],
+                )
+                conn.execute(
+                    "INSERT INTO cache_stats (namespace, hits, misses, saved_ms) VALUES (?, ?, ?, ?) "
+                    "ON CONFLICT(namespace) DO UPDATE SET hits = hits + excluded.hits, "
+                    "misses = misses + excluded.misses, saved_ms = saved_ms + excluded.saved_ms",
+                    (self.namespace, hits, misses, saved_ms),
+                )
+        except sqlite3.Error as e:
+            # 적중 기록은 통계/LRU용이라 실패해도 요청은 그대로 진행합니다.
+            print(f"⚠️ 캐시 적중 기록 실패 ({self.namespace}): {e}")
+
+    def stats(self) -> dict:
+        self.flush()
+        conn = connect(self.path)
+        row = conn.execute(
+            "SELECT hits, misses, saved_ms FROM cache_stats WHERE namespace = ?", (self.namespace,)
+        ).fetchone()
+        hits, misses, saved_ms = row or (0, 0, 0)
+        (entries,) = conn.execute(
+            "SELECT COUNT(*) FROM cache_entries WHERE namespace = ?", (self.namespace,)
+        ).fetchone()
+        total = hits + misses
+        return {
+            "hits": hits,
+            "misses": misses,
+            "hit_rate": round(hits / total, 4) if total else 0.0,
+            "saved_seconds": round(saved_ms / 1000, 1),
+            "entries": entries,
+        }
+
+
+def flush_all():
+    """모든 캐시의 밀린 적중 기록을 씁니다. (서버 종료 시)"""
+    for cache in _caches:
+        cache.flush()
@@ -0,0 +1,90 @@
+# check_query_plans.py
+
+# --- 핫 쿼리 실행 계획 점검 ---
+# plans.py의 자주 호출되는 쿼리들이 인덱스를 타는지 DATABASE_URL의 DB(SQLite/MySQL)에서 확인합니다.
+# 실행: python check_query_plans.py   (하나라도 풀 스캔이면 종료 코드 1)
+
+import sys
+
+from sqlalchemy import and_, literal, or_, select, text, union_all
+from sqlalchemy.orm import aliased
+
+from database import engine
+from models import Plan, PlanApplication, PlanParticipant, PlanSearchTerm
+
+_OTHER_TERM = aliased(PlanSearchTerm)
+
+HOT_QUERIES = {
+    "get_plans / get_plan_page (최신순)":
+        select(Plan.id, Plan.title).order_by(Plan.created_at.desc(), Plan.id.desc()).limit(21),
+    "get_plan_page (다음 페이지)":
+        select(Plan.id, Plan.title).where(or_(
+            Plan.created_at < literal("2030-01-01 00:00:00"),
+            and_(Plan.created_at == literal("2030-01-01 00:00:00"), Plan.id < 100),
+        )).order_by(Plan.created_at.desc(), Plan.id.desc()).limit(21),
+    "get_plan_detail":
+        select(Plan).where(Plan.id == 1),
+    "get_plan_applications":
+        select(PlanApplication).where(PlanApplication.plan_id == 1),
+    "get_participants":
+        select(PlanParticipant).where(PlanParticipant.plan_id == 1),
+    "accept_applicant / check_applied_status":
+        select(PlanApplication).where(PlanApplication.plan_id == 1, PlanApplication.username == "user").limit(1),
+    "remove_participant":
+        select(PlanParticipant).where(PlanParticipant.plan_id == 1, PlanParticipant.username == "user").limit(1),
+    "get_applied_statuses (UNION ALL)":
+        union_all(
+            select(PlanApplication.plan_id).where(PlanApplication.username == "user", PlanApplication.plan_id.in_([1, 2])),
+            select(PlanParticipant.plan_id).where(PlanParticipant.username == "user", PlanParticipant.plan_id.in_([1, 2])),
+            select(Plan.id).where(Plan.username == "user", Plan.id.in_([1, 2])),
+        ),
+    "get_my_applications":
+        select(PlanApplication.id, Plan.title).join(Plan, Plan.id == PlanApplication.plan_id)
+        .where(PlanApplication.username == "user", PlanApplication.id < 100)
+        .order_by(PlanApplication.id.desc()).limit(21),
+    "get_my_plans":
+        select(Plan.id, Plan.title).where(Plan.username == "user")
+        .order_by(Plan.created_at.desc(), Plan.id.desc()).limit(21),
+    "get_my_joined_plans":
+        select(PlanParticipant.id, Plan.title).join(Plan, Plan.id == PlanParticipant.plan_id)
+        .where(PlanParticipant.username == "user", PlanParticipant.id < 100)
+        .order_by(PlanParticipant.id.desc()).limit(21),
+    "search_plans (토큰별 계획 수, COUNT 안쪽)":
+        select(PlanSearchTerm.plan_id).where(PlanSearchTerm.term == "제주").limit(5001),
+    "search_plans (가중치 상위 posting)":
+        select(PlanSearchTerm.plan_id, PlanSearchTerm.weight).where(PlanSearchTerm.term == "제주")
+        .order_by(PlanSearchTerm.weight.desc(), PlanSearchTerm.plan_id.desc()).limit(21),
+    "search_plans (후보마다 다른 토큰 PK 조인)":
+        select(PlanSearchTerm.plan_id, PlanSearchTerm.weight + _OTHER_TERM.weight)
+        .join(_OTHER_TERM, and_(_OTHER_TERM.term == "주도", _OTHER_TERM.plan_id == PlanSearchTerm.plan_id))
+        .where(PlanSearchTerm.term == "제주")
+        .order_by(PlanSearchTerm.weight.desc(), PlanSearchTerm.plan_id.desc()).limit(5000),
+}
+
+
+def _explain(conn, sql: str):
+    if conn.dialect.name == "sqlite":
+        details = [row[-1] for row in conn.execute(text(f"EXPLAIN QUERY PLAN {sql}"))]
+        ok = all(
+            "USING" in detail or not detail.startswith("SCAN")
+            for detail in details
+        )
+        return ok, "; ".join(details)
+    rows = conn.execute(text(f"EXPLAIN {sql}")).mappings().all()
+    ok = all(row["type"] != "ALL" and row["key"] for row in rows)
+    return ok, "; ".join(f"{row['table']}: type={row['type']} key={row['key']}" for row in rows)
+
+
+def main() -> int:
+    failed = 0
+    with engine.connect() as conn:
+        for name, stmt in HOT_QUERIES.items():
+            sql = str(stmt.compile(conn, compile_kwargs={"literal_binds": True}))
+            ok, plan = _explain(conn, sql)
+            failed += not ok
+            print(f"{'✅' if ok else '❌'} {name}\n    {plan}")
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,94 @@
+# compression.py
+
+import gzip
+import os
+
+from starlette.datastructures import Headers, MutableHeaders
+
+try:
+    import brotli
+except ImportError:  # Brotli가 없으면 gzip만 협상합니다.
+    brotli = None
+
+# --- 응답 압축 ---
+# 일정(itinerary)이 반복적인 한국어 텍스트라 JSON이 잘 줄어듭니다.
+# 클라이언트의 Accept-Encoding으로 br/gzip 중 하나를 고르고, COMPRESS_MIN_SIZE 바이트 이상인 응답만 압축합니다.
+# 한 번에 끝나는 응답만 압축하고, 스트리밍 응답(SSE, /recommend/stream 등)은 조각이 늦게 전달되지 않도록 그대로 보냅니다.
+COMPRESS_MIN_SIZE = int(os.getenv("COMPRESS_MIN_SIZE", "1024"))
+GZIP_LEVEL = int(os.getenv("GZIP_LEVEL", "3"))     # 1~9, 큰 목록에서 6은 3보다 CPU가 3배 가까이 듦
+BROTLI_QUALITY = int(os.getenv("BROTLI_QUALITY", "4"))  # 0~11, 요청마다 압축하므로 빠른 쪽으로
+
+COMPRESSIBLE_TYPES = ("application/json", "text/", "application/javascript")
+
+
+def choose_encoding(accept_encoding: str):
+    """Accept-Encoding에서 q값이 가장 높은 br/gzip (같으면 br)"""
+    best, best_q = None, 0.0
+    for item in (accept_encoding or "").split(","):
+        name, _, params = item.strip().partition(";")
+        name = name.strip().lower()
+        q = 1.0
+        if params.strip().startswith("q="):
+            try:
+                q = float(params.strip()[2:])
+            except ValueError:
+                continue
+        candidates = ["br", "gzip"] if name == "*" else [name]
+        for encoding in candidates:
+            if encoding == "br" and brotli is None:
+                continue
+            if encoding in ("br", "gzip") and q > 0 and (q > best_q or (q == best_q and encoding == "br")):
+                best, best_q = encoding, q
+    return best
+
+
+def compress(body: bytes, encoding: str) -> bytes:
+    if encoding == "br":
+        return brotli.compress(body, quality=BROTLI_QUALITY)
+    return gzip.compress(body, compresslevel=GZIP_LEVEL, mtime=0)
+
+
+class CompressionMiddleware:
+    def __init__(self, app, minimum_size: int = COMPRESS_MIN_SIZE):
+        self.app = app
+        self.minimum_size = minimum_size
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        encoding = choose_encoding(Headers(scope=scope).get("accept-encoding"))
+        if encoding is None:
+            await self.app(scope, receive, send)
+            return
+
+        start = None
+
+        async def send_compressed(message):
+            nonlocal start
+            if message["type"] == "http.response.start":
+                start = message  # 본문 첫 조각을 보고 압축 여부를 정할 때까지 잡아 둡니다.
+                return
+            if message["type"] != "http.response.body" or start is None:
+                await send(message)
+                return
+
+            held, start = start, None
+            body = message.get("body", b"")
+            headers = MutableHeaders(raw=held["headers"])
+            content_type = headers.get("content-type", "")
+            compressible = content_type.startswith(COMPRESSIBLE_TYPES) and "content-encoding" not in headers
+            if compressible:
+                headers.add_vary_header("Accept-Encoding")
+            if not compressible or message.get("more_body", False) or len(body) < self.minimum_size:
+                await send(held)
+                await send(message)
+                return
+
+            body = compress(body, encoding)
+            headers["Content-Encoding"] = encoding
+            headers["Content-Length"] = str(len(body))
+            await send(held)
+            await send({"type": "http.response.body", "body": body})
+
+        await self.app(scope, receive, send_compressed)
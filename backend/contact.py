@@ -1,6 +1,7 @@
 from fastapi import APIRouter, Depends, HTTPException
 from fastapi.responses import JSONResponse
 from pydantic import BaseModel
+from sqlalchemy import delete
 from sqlalchemy.orm import Session
 import uuid
 from typing import List
@@ -10,6 +11,7 @@ from typing import List
 # from .auth import get_current_admin  # 관리자인지 확인하는 의존성 함수
 from database import get_db
 from models import Contact as ContactModel 
+from bulk import run_in_chunks
 
 router = APIRouter()
 
@@ -22,6 +24,9 @@ class ContactForm(BaseModel):
     class Config:
         from_attributes = True
 
+class BulkContactIds(BaseModel):
+    ids: List[str]
+
 class ContactAnswer(BaseModel):
     answer: str
 
@@ -94,6 +99,26 @@ def patch_contact(
     db.refresh(contact)
     return contact
 
+# DELETE /api/contact/bulk/delete - 문의 일괄 삭제 (관리자 권한 필요)
+@router.delete("/api/contact/bulk/delete")
+def bulk_delete_contacts(
+    body: BulkContactIds,
+    db: Session = Depends(get_db),
+    admin_auth: bool = Depends(get_current_admin)
+):
+    def delete_chunk(db, ids):
+        result = db.execute(
+            delete(ContactModel).where(ContactModel.id.in_(ids)),
+            execution_options={"synchronize_session": False},
+        )
+        return {"contacts": result.rowcount}
+
+    report = run_in_chunks(db, body.ids, delete_chunk, "문의 삭제")
+    count = report["affected"].get("contacts", 0)
+    if not count:
+        raise HTTPException(status_code=404, detail="삭제할 문의를 찾을 수 없습니다.")
+    return {"message": f"{count}개의 문의가 삭제되었습니다.", "count": count, **report}
+
 # DELETE /api/contact/{contact_id} - 문의 삭제 (관리자 권한 필요)
 @router.delete("/api/contact/{contact_id}")
 def delete_contact(
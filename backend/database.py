@@ -1,7 +1,11 @@
 import os
+import time
+from contextlib import asynccontextmanager, contextmanager
 from dotenv import load_dotenv
-from sqlalchemy import create_engine
-from sqlalchemy.orm import sessionmaker
+from sqlalchemy import create_engine, event
+from sqlalchemy.exc import OperationalError, ProgrammingError
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+from sqlalchemy.orm import Session, sessionmaker
 from sqlalchemy.ext.declarative import declarative_base
 
 # .env 파일에서 환경 변수 로드
@@ -9,11 +13,118 @@ load_dotenv()
 
 # .env 파일의 값을 읽어옴
 DATABASE_URL = os.getenv("DATABASE_URL")
+DATABASE_REPLICA_URL = os.getenv("DATABASE_REPLICA_URL")  # 읽기 전용 레플리카 (없으면 primary만 사용)
 
-engine = create_engine(DATABASE_URL)
+# --- 커넥션 풀 설정 ---
+DB_POOL_SIZE = int(os.getenv("DB_POOL_SIZE", "10"))
+DB_MAX_OVERFLOW = int(os.getenv("DB_MAX_OVERFLOW", "20"))
+DB_POOL_TIMEOUT = float(os.getenv("DB_POOL_TIMEOUT", "30"))              # 풀에서 연결을 기다리는 최대 시간(초)
+DB_POOL_RECYCLE = int(os.getenv("DB_POOL_RECYCLE", "1800"))               # MySQL wait_timeout보다 짧게
+DB_POOL_PRE_PING = os.getenv("DB_POOL_PRE_PING", "true").lower() == "true"
+DB_STATEMENT_TIMEOUT_MS = int(os.getenv("DB_STATEMENT_TIMEOUT_MS", "0"))  # 0이면 제한 없음
+DB_ECHO = os.getenv("DB_ECHO", "false").lower() == "true"                 # SQL 로그 (운영에서는 끄기)
+DB_ASYNC = os.getenv("DB_ASYNC", "false").lower() == "true"              # async 엔진/get_async_db 사용 (아래 참고)
+REPLICA_RETRY_SECONDS = float(os.getenv("DB_REPLICA_RETRY_SECONDS", "30"))  # 레플리카 장애 시 primary만 쓰는 시간
+
+
+def _engine_options(url: str) -> dict:
+    options = {"echo": DB_ECHO, "pool_pre_ping": DB_POOL_PRE_PING}
+    if not url.startswith("sqlite"):
+        # SQLite는 파일/메모리 DB에 맞는 기본 풀을 그대로 씁니다.
+        options.update(
+            pool_size=DB_POOL_SIZE,
+            max_overflow=DB_MAX_OVERFLOW,
+            pool_timeout=DB_POOL_TIMEOUT,
+            pool_recycle=DB_POOL_RECYCLE,
+        )
+    return options
+
+
+def _install_statement_timeout(engine):
+    if DB_STATEMENT_TIMEOUT_MS <= 0:
+        return
+
+    @event.listens_for(engine, "connect")
+    def _set_statement_timeout(dbapi_conn, _):
+        cursor = dbapi_conn.cursor()
+        if engine.dialect.name == "mysql":
+            cursor.execute(f"SET SESSION max_execution_time = {DB_STATEMENT_TIMEOUT_MS}")  # SELECT에만 적용
+        elif engine.dialect.name == "postgresql":
+            cursor.execute(f"SET statement_timeout = {DB_STATEMENT_TIMEOUT_MS}")
+        cursor.close()
+
+
+def create_db_engine(url: str):
+    """환경 변수의 풀/타임아웃 설정으로 엔진을 만듭니다. (앱 전체에서 이 함수로만 엔진을 만듭니다)"""
+    engine = create_engine(url, **_engine_options(url))
+    _install_statement_timeout(engine)
+    return engine
+
+
+# 동기 드라이버 URL을 같은 DB의 async 드라이버 URL로 바꿉니다. (mysql+pymysql -> mysql+aiomysql 등)
+ASYNC_DRIVERS = {"mysql": "aiomysql", "sqlite": "aiosqlite", "postgresql": "asyncpg"}
+
+
+def to_async_url(url: str) -> str:
+    scheme, rest = url.split("://", 1)
+    dialect = scheme.split("+", 1)[0]
+    return f"{dialect}+{ASYNC_DRIVERS[dialect]}://{rest}" if dialect in ASYNC_DRIVERS else url
+
+
+def create_async_db_engine(url: str):
+    """create_db_engine()과 같은 설정의 async 엔진"""
+    engine = create_async_engine(to_async_url(url), **_engine_options(url))
+    _install_statement_timeout(engine.sync_engine)
+    return engine
+
+
+engine = create_db_engine(DATABASE_URL)
 
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
+
+class ReplicaSession(Session):
+    """
+    레플리카용 읽기 세션. 쿼리가 레플리카에서 실패하면(연결 끊김, 복제가 덜 된 스키마/빈 DB의 "no such table" 등)
+    레플리카를 잠시 빼고 같은 쿼리를 primary에서 한 번 더 실행합니다. (읽기 전용이라 다시 실행해도 안전)
+    execute()/scalar()/scalars()/query()/get()이 모두 거치는 _execute_internal()에서 처리합니다.
+    """
+
+    def _execute_internal(self, statement, *args, **kwargs):
+        try:
+            return super()._execute_internal(statement, *args, **kwargs)
+        except (OperationalError, ProgrammingError) as e:
+            if self.bind is engine:
+                raise
+            self.rollback()
+            _mark_replica_down(e)
+            self.bind = engine
+            return super()._execute_internal(statement, *args, **kwargs)
+
+
+replica_engine = create_db_engine(DATABASE_REPLICA_URL) if DATABASE_REPLICA_URL else None
+ReplicaSessionLocal = (
+    sessionmaker(class_=ReplicaSession, autocommit=False, autoflush=False, bind=replica_engine)
+    if replica_engine else None
+)
+_replica_down_until = 0.0
+
+# --- async 경로 (opt-in) ---
+# DB_ASYNC=true면 같은 풀/타임아웃 설정의 async 엔진을 만들고, 라우터가 get_async_db/get_async_read_db로
+# AsyncSession을 받아 DB를 기다리는 동안 스레드풀 슬롯을 잡지 않게 할 수 있습니다.
+# 기본값은 꺼짐입니다. SQLite(aiosqlite)에서는 async가 더 느렸으므로, 운영 MySQL(aiomysql)에서
+# bench_async_db.py로 재 본 뒤에 기본값과 옮길 라우터를 정합니다.
+async_engine = create_async_db_engine(DATABASE_URL) if DB_ASYNC else None
+AsyncSessionLocal = (
+    async_sessionmaker(async_engine, autoflush=False, expire_on_commit=False) if async_engine else None
+)
+async_replica_engine = create_async_db_engine(DATABASE_REPLICA_URL) if DB_ASYNC and DATABASE_REPLICA_URL else None
+AsyncReplicaSessionLocal = (
+    async_sessionmaker(async_replica_engine, autoflush=False, expire_on_commit=False)
+    if async_replica_engine else None
+)
+
+# 모든 모델(models.py)이 이 Base 하나에 등록됩니다.
 Base = declarative_base()
 
 # DB 세션을 제공하는 의존성 함수
@@ -22,4 +133,92 @@ def get_db():
     try:
         yield db
     finally:
-        db.close()
\ No newline at end of file
+        db.close()
+
+
+def _replica_available() -> bool:
+    return time.time() >= _replica_down_until
+
+
+def _mark_replica_down(error):
+    global _replica_down_until
+    _replica_down_until = time.time() + REPLICA_RETRY_SECONDS
+    print(f"⚠️ 읽기 레플리카 오류, {REPLICA_RETRY_SECONDS:.0f}초간 primary 사용: {error}")
+
+
+def _open_read_session():
+    if ReplicaSessionLocal is None or not _replica_available():
+        return SessionLocal()
+    db = ReplicaSessionLocal()
+    try:
+        db.connection()  # 풀에서 연결을 꺼내면서 pre-ping으로 살아 있는지 확인 (쿼리 오류는 ReplicaSession이 처리)
+        return db
+    except OperationalError as e:
+        db.close()
+        _mark_replica_down(e)
+        return SessionLocal()
+
+
+# 캐시에서 못 찾았을 때만 DB를 열도록 의존성 대신 직접 쓰는 읽기 세션
+@contextmanager
+def read_session():
+    db = _open_read_session()
+    try:
+        yield db
+    finally:
+        db.close()
+
+
+# 읽기 전용 엔드포인트용 의존성 함수 (레플리카가 없거나 죽어 있으면 primary로)
+# 레플리카는 복제 지연이 있을 수 있으므로, 방금 쓴 값을 바로 읽어야 하는 곳에서는 get_db를 씁니다.
+def get_read_db():
+    with read_session() as db:
+        yield db
+
+
+# --- async 세션 의존성 (DB_ASYNC=true일 때만) ---
+def _async_sessions():
+    if AsyncSessionLocal is None:
+        raise RuntimeError("AsyncSession을 쓰려면 DB_ASYNC=true로 설정해야 합니다.")
+    return AsyncSessionLocal
+
+
+async def get_async_db():
+    async with _async_sessions()() as db:
+        yield db
+
+
+async def _open_async_read_session():
+    sessions = _async_sessions()
+    if AsyncReplicaSessionLocal is None or not _replica_available():
+        return sessions()
+    db = AsyncReplicaSessionLocal()
+    try:
+        await db.connection()
+        return db
+    except OperationalError as e:
+        await db.close()
+        _mark_replica_down(e)
+        return sessions()
+
+
+@asynccontextmanager
+async def async_read_session():
+    db = await _open_async_read_session()
+    try:
+        yield db
+    finally:
+        await db.close()
+
+
+# get_read_db()의 async 버전
+async def get_async_read_db():
+    async with async_read_session() as db:
+        yield db
+
+
+# 종료 시 풀에 남은 async 연결을 닫습니다. (aiosqlite 연결 스레드가 남으면 프로세스가 끝나지 않음)
+async def dispose_async_engines():
+    for async_db_engine in (async_engine, async_replica_engine):
+        if async_db_engine is not None:
+            await async_db_engine.dispose()
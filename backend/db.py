@@ -1,30 +1,5 @@
-import os
-from dotenv import load_dotenv
-from sqlalchemy import Column, Integer, String, create_engine
-from sqlalchemy.ext.declarative import declarative_base
-from sqlalchemy.orm import sessionmaker
+# db.py
 
-load_dotenv()
-
-DATABASE_URL = os.getenv("DATABASE_URL")
-
-engine = create_engine(DATABASE_URL, echo=True)
-SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
-Base = declarative_base()
-
-def get_db():
-    db = SessionLocal()
-    try:
-        yield db
-    finally:
-        db.close()
-
-class UserModel(Base):
-    __tablename__ = "users"
-    id = Column(Integer, primary_key=True, index=True)
-    username = Column(String(50), unique=True, nullable=False)
-    email = Column(String(100), unique=True, nullable=False)
-    password = Column(String(255), nullable=False)
-    contact_type = Column(String(20), nullable=True)
-    contact_value = Column(String(100), nullable=True)
-    is_admin = Column(Integer, default=0)
\ No newline at end of file
+# 예전 코드 호환용 모듈입니다. 엔진/세션/Base는 database.py, 모델은 models.py 하나만 사용합니다.
+from database import engine, SessionLocal, Base, get_db  # noqa: F401
+from models import UserModel  # noqa: F401
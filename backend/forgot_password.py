@@ -1,12 +1,13 @@
 from fastapi import APIRouter, Depends, HTTPException
 from pydantic import BaseModel
+from fastapi.concurrency import run_in_threadpool
 from sqlalchemy.orm import Session
 import random
 import string
 
 from database import get_db
 from models import UserModel
-from utils import hash_password
+from utils import hash_password_async
 
 router = APIRouter()
 
@@ -14,13 +15,14 @@ class ForgotPasswordRequest(BaseModel):
     username: str
 
 @router.post("/forgot-password")
-def forgot_password(data: ForgotPasswordRequest, db: Session = Depends(get_db)):
-    user = db.query(UserModel).filter(UserModel.username == data.username.strip()).first()
+async def forgot_password(data: ForgotPasswordRequest, db: Session = Depends(get_db)):
+    # 해시 풀을 기다리는 동안 스레드를 잡지 않도록 async로 두고, DB 작업만 스레드풀에서 실행합니다.
+    user = await run_in_threadpool(db.query(UserModel).filter(UserModel.username == data.username.strip()).first)
     if not user:
         raise HTTPException(status_code=404, detail="가입된 아이디가 없습니다.")
     
     temp_password = ''.join(random.choices(string.ascii_letters + string.digits, k=8))
-    user.password = hash_password(temp_password)
-    db.commit()
+    user.password = await hash_password_async(temp_password)
+    await run_in_threadpool(db.commit)
     
     return {"message": "임시 비밀번호가 발급되었습니다.", "temp_password": temp_password}
\ No newline at end of file
@@ -0,0 +1,94 @@
+# gemini.py
+
+import asyncio
+import datetime
+import os
+
+import google.generativeai as genai
+from fastapi import HTTPException
+
+# --- Gemini 공통 설정 ---
+# 모든 라우터가 같은 모델 객체와 동시 실행 제한을 공유합니다.
+GEMINI_MODEL_NAME = os.getenv("GEMINI_MODEL", "gemini-2.5-flash")
+GEMINI_TIMEOUT = float(os.getenv("GEMINI_TIMEOUT", "90"))            # 호출 1건당 최대 대기 시간(초)
+GEMINI_MAX_CONCURRENCY = int(os.getenv("GEMINI_MAX_CONCURRENCY", "12"))  # 워커당 동시에 진행할 Gemini 호출 수
+
+_model = None
+_semaphore = asyncio.Semaphore(GEMINI_MAX_CONCURRENCY)
+
+
+def get_model():
+    # GenerativeModel은 내부 클라이언트를 재사용하므로 워커당 한 번만 만듭니다.
+    # (genai.configure()가 끝난 뒤 첫 요청에서 생성되도록 지연 생성)
+    global _model
+    if _model is None:
+        _model = genai.GenerativeModel(GEMINI_MODEL_NAME)
+    return _model
+
+
+async def generate_content(prompt, timeout: float = None, model=None):
+    """이벤트 루프를 막지 않고 Gemini 응답 객체를 받아옵니다."""
+    timeout = timeout or GEMINI_TIMEOUT
+    model = model or get_model()
+    async with _semaphore:
+        try:
+            return await asyncio.wait_for(
+                model.generate_content_async(prompt, request_options={"timeout": timeout}),
+                timeout=timeout,
+            )
+        except asyncio.TimeoutError:
+            raise HTTPException(status_code=504, detail="Gemini 응답 시간이 초과되었습니다.")
+
+
+def usage_of(response) -> dict:
+    # 요청별 토큰 사용량 (cached_tokens는 모델 측 컨텍스트 캐시에서 재사용된 토큰 수)
+    usage = getattr(response, "usage_metadata", None)
+    return {
+        "prompt_tokens": getattr(usage, "prompt_token_count", 0) or 0,
+        "cached_tokens": getattr(usage, "cached_content_token_count", 0) or 0,
+        "output_tokens": getattr(usage, "candidates_token_count", 0) or 0,
+    }
+
+
+async def create_cached_model(contents, ttl_seconds: float, system_instruction: str = None):
+    """모델 측 컨텍스트 캐시를 만들고 그 캐시를 쓰는 모델을 돌려줍니다. 실패하면 None."""
+    try:
+        cached = await asyncio.to_thread(
+            genai.caching.CachedContent.create,
+            model=f"models/{GEMINI_MODEL_NAME}",
+            system_instruction=system_instruction,
+            contents=contents,
+            ttl=datetime.timedelta(seconds=ttl_seconds),
+        )
+        return genai.GenerativeModel.from_cached_content(cached)
+    except Exception as e:
+        # 캐시 최소 토큰 수 미달 등으로 실패하면 일반 프롬프트 방식으로 처리합니다.
+        print(f"⚠️ Gemini 컨텍스트 캐시 생성 실패: {e}")
+        return None
+
+
+async def generate_text(prompt, timeout: float = None) -> str:
+    response = await generate_content(prompt, timeout=timeout)
+    return response.text.strip()
+
+
+async def stream_text(prompt, timeout: float = None):
+    """Gemini 스트리밍 응답을 텍스트 조각 단위로 넘겨줍니다. (조각 사이 대기 시간마다 timeout 적용)"""
+    timeout = timeout or GEMINI_TIMEOUT
+    model = get_model()
+    async with _semaphore:
+        try:
+            response = await asyncio.wait_for(
+                model.generate_content_async(prompt, stream=True, request_options={"timeout": timeout}),
+                timeout=timeout,
+            )
+            chunks = response.__aiter__()
+            while True:
+                try:
+                    chunk = await asyncio.wait_for(chunks.__anext__(), timeout=timeout)
+                except StopAsyncIteration:
+                    return
+                if chunk.text:
+                    yield chunk.text
+        except asyncio.TimeoutError:
+            raise HTTPException(status_code=504, detail="Gemini 응답 시간이 초과되었습니다.")
@@ -0,0 +1,64 @@
+# geo.py
+
+import math
+
+# --- 위치 유틸 ---
+_BASE32 = "0123456789bcdefghjkmnpqrstuvwxyz"
+
+
+def geohash(lat: float, lon: float, precision: int = 6) -> str:
+    # precision 6 ≈ 1.2km x 0.6km, 7 ≈ 150m x 150m
+    lat_range, lon_range = [-90.0, 90.0], [-180.0, 180.0]
+    chars, bits, bit_count, even = [], 0, 0, True
+    while len(chars) < precision:
+        rng, value = (lon_range, lon) if even else (lat_range, lat)
+        mid = (rng[0] + rng[1]) / 2
+        bits <<= 1
+        if value >= mid:
+            bits |= 1
+            rng[0] = mid
+        else:
+            rng[1] = mid
+        even = not even
+        bit_count += 1
+        if bit_count == 5:
+            chars.append(_BASE32[bits])
+            bits, bit_count = 0, 0
+    return "".join(chars)
+
+
+def geohash_bounds(cell: str):
+    """(lat_min, lat_max, lon_min, lon_max)"""
+    lat_range, lon_range = [-90.0, 90.0], [-180.0, 180.0]
+    even = True
+    for char in cell:
+        bits = _BASE32.index(char)
+        for shift in range(4, -1, -1):
+            rng = lon_range if even else lat_range
+            mid = (rng[0] + rng[1]) / 2
+            if bits >> shift & 1:
+                rng[0] = mid
+            else:
+                rng[1] = mid
+            even = not even
+    return lat_range[0], lat_range[1], lon_range[0], lon_range[1]
+
+
+def geohash_center(cell: str):
+    lat_min, lat_max, lon_min, lon_max = geohash_bounds(cell)
+    return (lat_min + lat_max) / 2, (lon_min + lon_max) / 2
+
+
+def cell_radius_m(cell: str) -> float:
+    # 셀 중심에서 꼭짓점까지의 거리 (셀 안 어디에서 검색해도 반경을 덮기 위한 여유분)
+    lat_min, lat_max, lon_min, lon_max = geohash_bounds(cell)
+    return distance_m((lat_min + lat_max) / 2, (lon_min + lon_max) / 2, lat_max, lon_max)
+
+
+def distance_m(lat1: float, lon1: float, lat2: float, lon2: float) -> float:
+    # 하버사인 거리 (미터)
+    r = 6371000.0
+    p1, p2 = math.radians(lat1), math.radians(lat2)
+    dp, dl = p2 - p1, math.radians(lon2 - lon1)
+    a = math.sin(dp / 2) ** 2 + math.cos(p1) * math.cos(p2) * math.sin(dl / 2) ** 2
+    return 2 * r * math.asin(math.sqrt(a))
@@ -1,11 +1,8 @@
 # hash_password_tool.py
 
-import bcrypt
-
-def hash_password(plain_password: str) -> str:
-    salt = bcrypt.gensalt()
-    hashed = bcrypt.hashpw(plain_password.encode('utf-8'), salt)
-    return hashed.decode('utf-8')
+# 앱과 같은 설정(BCRYPT_ROUNDS)으로 해시를 만듭니다.
+# (예전에 bcrypt.gensalt()로 직접 만든 해시도 로그인할 때 현재 설정으로 자동 교체됩니다)
+from utils import hash_password
 
 if __name__ == "__main__":
     plain = input("비밀번호를 입력하세요: ")
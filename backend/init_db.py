@@ -5,14 +5,14 @@ from db import engine, Base, UserModel  # Base 꼭 임포트해야 함
 with engine.connect() as conn:
     conn.execute(text("SET FOREIGN_KEY_CHECKS=0;"))
 
-# 2. 모든 테이블 삭제
-Base.metadata.drop_all(bind=engine)
+# 2. users 테이블 삭제 (다른 테이블은 그대로 둡니다)
+Base.metadata.drop_all(bind=engine, tables=[UserModel.__table__])
 
 # 3. 외래키 제약 다시 활성화
 with engine.connect() as conn:
     conn.execute(text("SET FOREIGN_KEY_CHECKS=1;"))
 
 # 4. 테이블 재생성
-Base.metadata.create_all(bind=engine)
+Base.metadata.create_all(bind=engine, tables=[UserModel.__table__])
 
 print("✅ users 테이블 재생성 완료")
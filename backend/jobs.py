@@ -0,0 +1,224 @@
+# jobs.py
+
+import asyncio
+import itertools
+import json
+import sqlite3
+import time
+import uuid
+
+from fastapi import HTTPException
+
+from cache import CACHE_PATH, connect
+
+# --- 로컬 작업 큐 ---
+# 오래 걸리는 생성 작업을 HTTP 요청과 분리해서 돌립니다.
+# 작업 상태/결과는 SQLite 파일에 저장되므로 어느 gunicorn 워커에 조회해도 같은 결과가 보이고,
+# 실제 실행은 작업을 접수한 워커의 asyncio 작업자들이 우선순위 순서로 처리합니다.
+JOBS_SCHEMA = """
+    CREATE TABLE IF NOT EXISTS jobs (
+        id TEXT PRIMARY KEY,
+        queue TEXT NOT NULL,
+        dedup_key TEXT,
+        priority INTEGER NOT NULL DEFAULT 0,
+        status TEXT NOT NULL,
+        payload TEXT NOT NULL,
+        result TEXT,
+        error TEXT,
+        created_at REAL NOT NULL,
+        started_at REAL,
+        finished_at REAL,
+        expires_at REAL
+    );
+    CREATE UNIQUE INDEX IF NOT EXISTS ux_jobs_active_dedup
+        ON jobs (queue, dedup_key) WHERE status IN ('queued', 'running');
+    CREATE INDEX IF NOT EXISTS ix_jobs_dedup ON jobs (queue, dedup_key, status);
+    CREATE INDEX IF NOT EXISTS ix_jobs_expires ON jobs (expires_at);
+"""
+
+ACTIVE = ("queued", "running")
+FINISHED = ("done", "failed")
+
+
+class JobQueue:
+    def __init__(self, name: str, handler, workers: int, max_queue: int, result_ttl: float,
+                 timeout: float, path: str = CACHE_PATH, sweep_interval: float = 60):
+        self.name = name
+        self.handler = handler
+        self.workers = workers
+        self.max_queue = max_queue
+        self.result_ttl = result_ttl
+        self.timeout = timeout
+        self.path = path
+        self.sweep_interval = sweep_interval
+        self._queue = None
+        self._enqueued = set()  # 이 워커의 큐에 들어 있는 job_id (같은 작업을 두 번 넣지 않도록)
+        self._tasks = []
+        self._sweeper = None
+        self._seq = itertools.count()
+
+    def _conn(self):
+        return connect(self.path, JOBS_SCHEMA)
+
+    # --- 작업자 수명 주기 ---
+    def start(self):
+        if self._tasks:
+            return
+        self._queue = asyncio.PriorityQueue()
+        self._enqueued = set()
+        self._tasks = [asyncio.ensure_future(self._worker()) for _ in range(self.workers)]
+        self._sweeper = asyncio.ensure_future(self._sweep_loop())
+        self._sweep()
+
+    async def stop(self):
+        # 실행 중이던 작업은 _worker()가 취소를 받으면서 queued로 되돌립니다.
+        tasks = self._tasks + ([self._sweeper] if self._sweeper else [])
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        self._tasks = []
+        self._sweeper = None
+
+    async def _sweep_loop(self):
+        while True:
+            await asyncio.sleep(self.sweep_interval)
+            try:
+                self._sweep()
+            except Exception as e:
+                print(f"⚠️ 작업 정리 실패 ({self.name}): {e}")
+
+    def _sweep(self):
+        # 멈춘 작업(시간이 지나도 안 끝난 running, 내려간 워커가 남긴 queued)을 시작할 때와 주기적으로 다시 큐에 넣습니다.
+        # 실제 실행은 _claim()으로 한 워커만 가져가므로 여러 워커가 같은 작업을 넣어도 중복 실행되지 않습니다.
+        conn = self._conn()
+        stale = time.time() - self.timeout * 2
+        conn.execute(
+            "UPDATE jobs SET status = 'queued', started_at = NULL "
+            "WHERE queue = ? AND status = 'running' AND started_at < ?",
+            (self.name, stale),
+        )
+        rows = conn.execute(
+            "SELECT id, priority FROM jobs WHERE queue = ? AND status = 'queued' ORDER BY created_at",
+            (self.name,),
+        ).fetchall()
+        for job_id, priority in rows:
+            self._enqueue(job_id, priority)
+
+    def _enqueue(self, job_id, priority):
+        if job_id in self._enqueued:
+            return
+        self._enqueued.add(job_id)
+        self._queue.put_nowait((-priority, next(self._seq), job_id))
+
+    # --- 접수/조회 ---
+    def submit(self, payload: dict, dedup_key: str = None, priority: int = 0):
+        """작업을 접수하고 (job, created)를 돌려줍니다. 같은 dedup_key의 작업이 살아 있으면 그 작업을 돌려줍니다."""
+        self.start()
+        conn = self._conn()
+        now = time.time()
+        conn.execute("DELETE FROM jobs WHERE queue = ? AND expires_at <= ?", (self.name, now))
+
+        if dedup_key:
+            existing = self._find(conn, dedup_key, now)
+            if existing:
+                return existing, False
+
+        if self._queue.qsize() >= self.max_queue:
+            raise HTTPException(status_code=503, detail="대기 중인 작업이 너무 많습니다. 잠시 후 다시 시도해주세요.")
+
+        job_id = uuid.uuid4().hex
+        try:
+            conn.execute(
+                "INSERT INTO jobs (id, queue, dedup_key, priority, status, payload, created_at) "
+                "VALUES (?, ?, ?, ?, 'queued', ?, ?)",
+                (job_id, self.name, dedup_key, priority, json.dumps(payload, ensure_ascii=False), now),
+            )
+        except sqlite3.IntegrityError:
+            # 다른 워커가 같은 작업을 방금 접수한 경우
+            return self._find(conn, dedup_key, now), False
+        self._enqueue(job_id, priority)
+        return self.get(job_id), True
+
+    def _find(self, conn, dedup_key, now):
+        row = conn.execute(
+            "SELECT id FROM jobs WHERE queue = ? AND dedup_key = ? "
+            "AND (status IN ('queued', 'running') OR (status = 'done' AND expires_at > ?)) "
+            "ORDER BY created_at DESC LIMIT 1",
+            (self.name, dedup_key, now),
+        ).fetchone()
+        return self.get(row[0]) if row else None
+
+    def get(self, job_id: str):
+        row = self._conn().execute(
+            "SELECT id, status, priority, result, error, created_at, started_at, finished_at, expires_at "
+            "FROM jobs WHERE id = ? AND queue = ?",
+            (job_id, self.name),
+        ).fetchone()
+        if row is None or (row[8] is not None and row[8] <= time.time()):
+            return None
+        return {
+            "job_id": row[0],
+            "status": row[1],
+            "priority": row[2],
+            "result": json.loads(row[3]) if row[3] else None,
+            "error": row[4],
+            "created_at": row[5],
+            "started_at": row[6],
+            "finished_at": row[7],
+        }
+
+    # --- 실행 ---
+    def _claim(self, job_id):
+        cur = self._conn().execute(
+            "UPDATE jobs SET status = 'running', started_at = ? WHERE id = ? AND status = 'queued'",
+            (time.time(), job_id),
+        )
+        return cur.rowcount == 1
+
+    def _requeue(self, job_id):
+        self._conn().execute(
+            "UPDATE jobs SET status = 'queued', started_at = NULL WHERE id = ? AND status = 'running'", (job_id,)
+        )
+
+    def _finish(self, job_id, status, result=None, error=None):
+        now = time.time()
+        self._conn().execute(
+            "UPDATE jobs SET status = ?, result = ?, error = ?, finished_at = ?, expires_at = ? WHERE id = ?",
+            (status, json.dumps(result, ensure_ascii=False) if result is not None else None,
+             error, now, now + self.result_ttl, job_id),
+        )
+
+    async def _worker(self):
+        while True:
+            _, _, job_id = await self._queue.get()
+            self._enqueued.discard(job_id)
+            try:
+                if not self._claim(job_id):
+                    continue
+                (payload,) = self._conn().execute("SELECT payload FROM jobs WHERE id = ?", (job_id,)).fetchone()
+                try:
+                    result = await asyncio.wait_for(self.handler(json.loads(payload)), timeout=self.timeout)
+                    self._finish(job_id, "done", result=result)
+                except asyncio.CancelledError:
+                    # 종료하면서 끊긴 작업은 실패가 아니므로 queued로 되돌려 다른 워커나 다음 시작 때 이어서 처리합니다.
+                    self._requeue(job_id)
+                    raise
+                except asyncio.TimeoutError:
+                    self._finish(job_id, "failed", error="작업 시간이 초과되었습니다.")
+                except HTTPException as e:
+                    self._finish(job_id, "failed", error=str(e.detail))
+                except Exception as e:
+                    print(f"🚨 작업 실패 ({self.name} {job_id}): {e}")
+                    self._finish(job_id, "failed", error=str(e))
+            finally:
+                self._queue.task_done()
+
+    def stats(self) -> dict:
+        rows = self._conn().execute(
+            "SELECT status, COUNT(*) FROM jobs WHERE queue = ? GROUP BY status", (self.name,)
+        ).fetchall()
+        return {
+            "workers": len(self._tasks),
+            "local_queue": self._queue.qsize() if self._queue else 0,
+            **{status: count for status, count in rows},
+        }
@@ -0,0 +1,101 @@
+# json_stream.py
+
+import json
+
+
+class ItineraryStreamParser:
+    """
+    Gemini가 조각조각 보내는 여행 계획 JSON을 읽으면서,
+    itinerary의 하루치 일정이 완성될 때마다 바로 꺼내주는 증분 파서입니다.
+
+    feed()는 새로 완성된 이벤트 목록을 돌려줍니다.
+      ("day", {"YYYY-MM-DD": [...]})     itinerary 항목 하나 완성
+      ("recommendations", [...])         recommendations 값 완성
+      ("done", {...})                    최상위 객체 전체 완성
+    """
+
+    def __init__(self):
+        self._buf = ""
+        self._pos = 0
+        self._stack = []          # 열린 컨테이너 ('{' 또는 '[')
+        self._keys = []           # 각 객체 레벨에서 마지막으로 읽은 키
+        self._expect_key = False
+        self._in_string = False
+        self._escape = False
+        self._string_start = None
+        self._string_is_key = False
+        self._top_start = None
+        self._value_start = None  # 최상위 객체의 현재 값 시작 위치
+        self._member_start = None # itinerary 안 현재 항목(키) 시작 위치
+        self.done = False
+
+    def feed(self, text: str):
+        events = []
+        if self.done:
+            return events
+        self._buf += text
+        buf = self._buf
+        i = self._pos
+        while i < len(buf) and not self.done:
+            c = buf[i]
+            if self._in_string:
+                if self._escape:
+                    self._escape = False
+                elif c == "\\":
+                    self._escape = True
+                elif c == '"':
+                    self._in_string = False
+                    if self._string_is_key:
+                        self._keys[-1] = json.loads(buf[self._string_start:i + 1])
+            elif self._top_start is None:
+                # 최상위 '{' 앞의 ```json 같은 텍스트는 건너뜁니다.
+                if c == "{":
+                    self._top_start = i
+                    self._open(c, i)
+            elif c == '"':
+                self._in_string = True
+                self._string_start = i
+                self._string_is_key = self._stack[-1] == "{" and self._expect_key
+                if self._string_is_key and self._in_itinerary():
+                    self._member_start = i
+            elif c in "{[":
+                self._open(c, i)
+            elif c in "}]":
+                self._stack.pop()
+                if c == "}":
+                    self._keys.pop()
+                self._close(i + 1, events)
+            elif c == ":":
+                self._expect_key = False
+            elif c == ",":
+                self._expect_key = self._stack[-1] == "{"
+            i += 1
+        self._pos = i
+        return events
+
+    def _open(self, c, i):
+        self._stack.append(c)
+        if c == "{":
+            self._keys.append(None)
+        self._expect_key = c == "{"
+        if len(self._stack) == 2:
+            self._value_start = i
+
+    def _in_itinerary(self):
+        return len(self._stack) == 2 and self._stack[1] == "{" and self._keys[0] == "itinerary"
+
+    def _close(self, end, events):
+        depth = len(self._stack)
+        if depth == 2 and self._member_start is not None and self._in_itinerary():
+            day = json.loads("{" + self._buf[self._member_start:end] + "}")
+            self._member_start = None
+            events.append(("day", day))
+        elif depth == 1 and self._keys[0] == "recommendations":
+            events.append(("recommendations", json.loads(self._buf[self._value_start:end])))
+        elif depth == 0:
+            self.done = True
+            events.append(("done", json.loads(self._buf[self._top_start:end])))
+
+    @property
+    def text(self) -> str:
+        return self._buf
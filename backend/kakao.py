@@ -0,0 +1,142 @@
+# kakao.py
+
+import asyncio
+import os
+import time
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+from cache import PersistentCache, make_key
+from geo import cell_radius_m, distance_m, geohash, geohash_center
+from singleflight import SingleFlight
+
+# --- Kakao 로컬 API 클라이언트 ---
+# 워커 전체가 keep-alive 연결 풀 하나를 공유하고, 모든 호출에 타임아웃을 겁니다.
+KAKAO_KEYWORD_URL = "https://dapi.kakao.com/v2/local/search/keyword.json"
+KAKAO_TIMEOUT = float(os.getenv("KAKAO_TIMEOUT", "3"))
+KAKAO_POOL_SIZE = int(os.getenv("KAKAO_POOL_SIZE", "20"))
+
+_session = requests.Session()
+_session.mount(
+    "https://",
+    HTTPAdapter(
+        pool_connections=1,
+        pool_maxsize=KAKAO_POOL_SIZE,
+        max_retries=Retry(total=1, backoff_factor=0.2, status_forcelist=(502, 503, 504), allowed_methods=("GET",)),
+    ),
+)
+
+
+def search_keyword(query: str, **params) -> list:
+    """키워드 검색 결과(documents)를 돌려줍니다. params: x, y, radius, size 등 Kakao 파라미터"""
+    headers = {"Authorization": f"KakaoAK {os.getenv('KAKAO_REST_API_KEY')}"}
+    res = _session.get(
+        KAKAO_KEYWORD_URL,
+        headers=headers,
+        params={"query": query, **params},
+        timeout=(KAKAO_TIMEOUT, KAKAO_TIMEOUT),
+    )
+    res.raise_for_status()
+    return res.json().get("documents") or []
+
+
+async def search_keyword_async(query: str, **params) -> list:
+    # requests는 블로킹이므로 스레드에서 실행해 이벤트 루프를 막지 않습니다.
+    return await asyncio.to_thread(search_keyword, query, **params)
+
+
+# --- 지오셀 캐시 ---
+# 정확한 GPS 좌표 대신 "정규화된 키워드 + geohash 셀" 단위로 결과를 캐시합니다.
+# 셀 중심에서 (반경 + 셀 크기)만큼 넓게 검색해 두고, 호출한 사람의 실제 위치 기준으로 다시 거리순 정렬합니다.
+# TTL이 지난 항목은 stale 기간 동안 그대로 돌려주면서 백그라운드에서 갱신합니다.
+KAKAO_GEOHASH_PRECISION = int(os.getenv("KAKAO_GEOHASH_PRECISION", "6"))
+KAKAO_CACHE_TTL = float(os.getenv("KAKAO_CACHE_TTL", str(60 * 60 * 6)))
+KAKAO_CACHE_STALE_TTL = float(os.getenv("KAKAO_CACHE_STALE_TTL", str(60 * 60 * 24)))
+KAKAO_CACHE_MAX_ENTRIES = int(os.getenv("KAKAO_CACHE_MAX_ENTRIES", "20000"))
+KAKAO_MAX_RADIUS = 20000  # Kakao API 최대 반경
+
+nearby_cache = PersistentCache(
+    "kakao-nearby", ttl=KAKAO_CACHE_TTL, max_entries=KAKAO_CACHE_MAX_ENTRIES, stale_ttl=KAKAO_CACHE_STALE_TTL
+)
+place_cache = PersistentCache(
+    "kakao-place", ttl=KAKAO_CACHE_TTL * 4, max_entries=KAKAO_CACHE_MAX_ENTRIES, stale_ttl=KAKAO_CACHE_STALE_TTL
+)
+_flight = SingleFlight("kakao")
+_refreshing = set()
+
+
+def normalize_keyword(keyword: str) -> str:
+    return " ".join(keyword.split()).lower()
+
+
+def _slim(doc: dict) -> dict:
+    return {
+        "place_name": doc["place_name"],
+        "road_address_name": doc.get("road_address_name") or "",
+        "address_name": doc.get("address_name") or "",
+        "x": float(doc["x"]),
+        "y": float(doc["y"]),
+    }
+
+
+async def _cached(cache: PersistentCache, key: str, fetch):
+    value, fresh = await cache.lookup_async(key)
+    if value is not None:
+        if not fresh and key not in _refreshing:
+            # 오래된 값은 일단 돌려주고, 갱신은 뒤에서 한 번만 진행합니다.
+            _refreshing.add(key)
+            task = asyncio.ensure_future(_revalidate(cache, key, fetch))
+            task.add_done_callback(lambda _: _refreshing.discard(key))
+        return value
+    return await _flight.do(key, lambda: _fetch_and_store(cache, key, fetch))
+
+
+async def _fetch_and_store(cache: PersistentCache, key: str, fetch):
+    started = time.perf_counter()
+    value = await fetch()
+    if value is not None:
+        await cache.set_async(key, value, cost_ms=(time.perf_counter() - started) * 1000)
+    return value
+
+
+async def _revalidate(cache: PersistentCache, key: str, fetch):
+    try:
+        await _flight.do(key, lambda: _fetch_and_store(cache, key, fetch))
+    except Exception as e:
+        print(f"⚠️ Kakao 캐시 갱신 실패: {e}")
+
+
+async def search_nearby(keyword: str, lat: float, lon: float, radius: int = 3000, size: int = 3) -> list:
+    """(lat, lon)에서 radius 안의 키워드 검색 결과를 가까운 순으로 size개 돌려줍니다. (distance 필드 포함, 미터)"""
+    cell = geohash(lat, lon, KAKAO_GEOHASH_PRECISION)
+    key = make_key({"q": normalize_keyword(keyword), "cell": cell, "radius": radius})
+
+    async def fetch():
+        center_lat, center_lon = geohash_center(cell)
+        search_radius = min(KAKAO_MAX_RADIUS, int(radius + cell_radius_m(cell)))
+        documents = await search_keyword_async(
+            keyword, x=center_lon, y=center_lat, radius=search_radius, size=15
+        )
+        return [_slim(doc) for doc in documents]
+
+    documents = await _cached(nearby_cache, key, fetch)
+    ranked = []
+    for doc in documents:
+        distance = distance_m(lat, lon, doc["y"], doc["x"])
+        if distance <= radius:
+            ranked.append({**doc, "distance": int(distance)})
+    ranked.sort(key=lambda doc: doc["distance"])
+    return ranked[:size]
+
+
+async def find_place(keyword: str):
+    """키워드로 찾은 첫 번째 장소 (없으면 None)"""
+    key = make_key({"q": normalize_keyword(keyword)})
+
+    async def fetch():
+        documents = await search_keyword_async(keyword, size=1)
+        return _slim(documents[0]) if documents else None
+
+    return await _cached(place_cache, key, fetch)
@@ -1,9 +1,12 @@
 from fastapi import APIRouter, Depends, Response, Request, HTTPException
+from fastapi.concurrency import run_in_threadpool
 from sqlalchemy.orm import Session
 from pydantic import BaseModel
-from database import get_db      # get_db 함수는 database.py에서 가져옵니다.
+from database import get_db  # get_db 함수는 database.py에서 가져옵니다.
 from models import UserModel     # UserModel 클래스는 models.py에서 가져옵니다.
-from utils import verify_password
+from utils import verify_and_update_async
+from auth_session import current_session, end_session, get_user_profile, legacy_username, remember_profile, \
+    start_session
 
 
 router = APIRouter()
@@ -13,33 +16,56 @@ class LoginRequest(BaseModel):
     password: str
 
 @router.post("/login")
-def login(data: LoginRequest, response: Response, db: Session = Depends(get_db)):
+async def login(data: LoginRequest, request: Request, response: Response, db: Session = Depends(get_db)):
     print(f"✅ 로그인 시도 username: '{data.username}', password: '{data.password}'")
-    user = db.query(UserModel).filter(UserModel.username == data.username).first()
-    if not user or not verify_password(data.password, user.password):
+    # 해시 풀을 기다리는 동안 스레드를 잡지 않도록 async로 두고, DB 작업만 스레드풀에서 실행합니다.
+    user = await run_in_threadpool(db.query(UserModel).filter(UserModel.username == data.username).first)
+    if not user:
+        raise HTTPException(status_code=401, detail="아이디 또는 비밀번호가 틀렸습니다.")
+    # bcrypt 검증은 해시 전용 프로세스 풀에서 돌립니다. (대기열이 가득 차면 503)
+    verified, new_hash = await verify_and_update_async(data.password, user.password)
+    if not verified:
         raise HTTPException(status_code=401, detail="아이디 또는 비밀번호가 틀렸습니다.")
-    response.set_cookie(key="user", value=user.username, httponly=True)
-    return {"message": "로그인 성공", "username": user.username,
-        "is_admin": user.is_admin }
+    # 서명된 세션에 uid/username/is_admin을 담고, 프로필은 워커 캐시에 넣어 둡니다.
+    profile = remember_profile(user)
+    if new_hash:
+        # 예전 비용(BCRYPT_ROUNDS 변경 전, hash_password_tool.py 등)으로 만든 해시는 이번에 새 해시로 교체
+        user.password = new_hash
+        await run_in_threadpool(db.commit)
+    start_session(request, profile)
+    response.delete_cookie("user")  # 예전 방식의 서명 없는 쿠키는 더 이상 쓰지 않으므로 정리
+    return {"message": "로그인 성공", "username": profile["username"],
+        "is_admin": profile["is_admin"] }
 
 @router.get("/api/user")
-def get_user(request: Request, db: Session = Depends(get_db)):
-    username = request.cookies.get("user")
+async def get_user(request: Request):
+    # 세션이 있으면 프로필 캐시에서 바로 돌려주므로 평소에는 DB를 읽지 않습니다.
+    auth = current_session(request)
+    username = auth["username"] if auth else legacy_username(request)
     if not username:
         return {"loggedIn": False}
-    user = db.query(UserModel).filter(UserModel.username == username).first()
-    if not user:
+    profile = await get_user_profile(username)
+    # 삭제됐거나, 같은 아이디로 다시 가입한 다른 사용자라면 세션을 끊습니다.
+    if not profile or (auth and profile["uid"] != auth["uid"]):
+        end_session(request)
         return {"loggedIn": False}
+    if not auth:
+        # 서명 없는 예전 쿠키(LEGACY_USER_COOKIE=true일 때만)는 위조할 수 있으므로
+        # 세션을 만들지 않고 관리자 권한도 알려 주지 않습니다. (다시 로그인하면 세션이 생김)
+        profile = {**profile, "is_admin": 0}
+    elif auth["is_admin"] != bool(profile["is_admin"]):
+        start_session(request, profile)  # 바뀐 역할을 세션에 반영 (서명된 세션이 있는 경우만)
     return {
         "loggedIn": True,
-        "username": user.username,
-        "email": user.email,
-        "contact_type": user.contact_type,
-        "contact_value": user.contact_value,
-        "is_admin": user.is_admin
+        "username": profile["username"],
+        "email": profile["email"],
+        "contact_type": profile["contact_type"],
+        "contact_value": profile["contact_value"],
+        "is_admin": profile["is_admin"]
     }
 
 @router.post("/api/logout")
-def logout(response: Response):
+def logout(request: Request, response: Response):
+    end_session(request)
     response.delete_cookie("user")
     return {"message": "로그아웃 성공"}
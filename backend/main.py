@@ -1,6 +1,7 @@
 # main.py
 
 from fastapi import FastAPI
+from fastapi.responses import ORJSONResponse
 from fastapi.middleware.cors import CORSMiddleware
 from starlette.middleware.sessions import SessionMiddleware
 import os
@@ -9,7 +10,12 @@ import google.generativeai as genai
 
 # --- 데이터베이스 및 모델 초기화 ---
 # 🚨 이 파일에 MySQL 연결 설정과 Base 객체가 정의되어 있어야 합니다.
-from database import engine, Base
+from database import engine, Base, dispose_async_engines
+from migrations import run_migrations
+from utils import shutdown_password_pool
+from cache import flush_all as flush_caches
+from auth_session import SESSION_MAX_AGE
+from compression import CompressionMiddleware
 
 # --- 라우터 임포트 ---
 from signup import router as signup_router
@@ -23,7 +29,7 @@ from find_username_router import router as find_username_router # 💡 아이디
 
 # --- 앱 설정 ---
 dotenv.load_dotenv()
-app = FastAPI()
+app = FastAPI(default_response_class=ORJSONResponse)  # 기본 JSON 응답을 orjson으로 직렬화
 
 # --- 미들웨어 설정 ---
 origins = [
@@ -39,15 +45,20 @@ app.add_middleware(
 )
 app.add_middleware(
     SessionMiddleware,
-    secret_key=os.getenv("SESSION_SECRET_KEY")
+    secret_key=os.getenv("SESSION_SECRET_KEY"),
+    max_age=SESSION_MAX_AGE,  # 세션 안의 만료 시각(exp)과 같은 값
 )
+# 1KB 이상 JSON/텍스트 응답을 Accept-Encoding에 따라 br/gzip으로 압축 (compression.py)
+app.add_middleware(CompressionMiddleware)
 
 # --- 외부 서비스 설정 ---
 genai.configure(api_key=os.getenv("GEMINI_API_KEY"))
 
 # --- DB 테이블 생성 ---
-# 애플리케이션 시작 시 models.py에 정의된 모든 테이블을 생성합니다.
+# 애플리케이션 시작 시 models.py에 정의된 모든 테이블을 생성하고,
+# 기존 테이블에 필요한 인덱스 등은 버전 관리되는 마이그레이션으로 반영합니다.
 Base.metadata.create_all(bind=engine)
+run_migrations(engine)
 
 # --- 라우터 포함 ---
 app.include_router(signup_router, tags=["Authentication"])
@@ -59,6 +70,18 @@ app.include_router(plans_router)
 app.include_router(admin_router, tags=["Admin"])
 app.include_router(find_username_router) # 💡 아이디 찾기 라우터 포함
 
+@app.on_event("shutdown")
+def close_password_pool():
+    shutdown_password_pool()
+
+@app.on_event("shutdown")
+def flush_cache_hits():
+    flush_caches()
+
+@app.on_event("shutdown")
+async def close_async_engines():
+    await dispose_async_engines()
+
 # --- 루트 엔드포인트 ---
 @app.get("/")
 def root():
@@ -1,9 +1,18 @@
 # menu.py
 
-from fastapi import APIRouter, HTTPException
+from fastapi import APIRouter, Depends, HTTPException
+from fastapi.concurrency import run_in_threadpool
 from pydantic import BaseModel
-import os, requests, json, re
-import google.generativeai as genai
+from datetime import date, datetime, timedelta
+from zoneinfo import ZoneInfo
+import asyncio, json, os, re, threading, time
+from collections import Counter
+import kakao
+from gemini import generate_text
+from cache import CACHE_PATH, PersistentCache, connect, make_key, transaction
+from geo import geohash, geohash_center
+from singleflight import SingleFlight
+from auth_session import require_admin
 
 router = APIRouter()
 
@@ -17,78 +26,254 @@ class KeywordRequest(BaseModel):
     keyword: str
 
 # ✅ 맛집 검색 함수 (fallback 및 정제 포함)
-def search_restaurants_by_menu(menu, lat, lon):
+async def search_restaurants_by_menu(menu, lat, lon):
     print(f"[{menu}] 맛집 검색 중... lat={lat}, lon={lon}")
 
-    headers = {
-        "Authorization": f"KakaoAK {os.getenv('KAKAO_REST_API_KEY')}"
-    }
-
     # 검색어 정제: "매콤한 제육볶음" → ["매콤한 제육볶음", "제육볶음"]
     keywords = [menu]
     if " " in menu:
         keywords.append(menu.split()[-1])
 
-    for keyword in keywords:
-        params = {
-            "query": f"{keyword} 맛집",
-            "x": lon,
-            "y": lat,
-            "radius": 3000,
-            "size": 3
-        }
-        url = "https://dapi.kakao.com/v2/local/search/keyword.json"
-        res = requests.get(url, headers=headers, params=params)
-        results = res.json()
+    # 원래 검색어와 fallback 검색어를 동시에 요청하고, fallback 결과는 원래 검색어 결과가 없을 때만 씁니다.
+    results = await asyncio.gather(
+        *(kakao.search_nearby(f"{keyword} 맛집", lat, lon, radius=3000, size=3) for keyword in keywords),
+        return_exceptions=True,
+    )
 
-        if results.get("documents"):
+    for keyword, documents in zip(keywords, results):
+        if isinstance(documents, Exception):
+            print(f"🚨 [{keyword}] 맛집 검색 실패:", documents)
+            continue
+        if documents:
             return [
                 {
                     "place_name": doc["place_name"],
                     "address": doc["road_address_name"] or doc["address_name"],
                     "distance": f"{doc['distance']}m"
                 }
-                for doc in results["documents"]
+                for doc in documents
             ]
 
     return []
 
-# ✅ 메뉴 추천 API
-@router.post("/recommend-menu")
-async def recommend_menu(loc: Location):
-    try:
-        prompt = f"""
-        사용자의 GPS 위치는 위도 {loc.lat}, 경도 {loc.lon}입니다.
+# --- 위치 셀 단위 메뉴 추천 캐시 ---
+# 메뉴 추천은 위치와 날짜(계절)에만 좌우되므로 geohash 셀 + 날짜 단위로 한 번만 생성해서 공유합니다.
+# 식당 검색만 요청마다 실제 좌표로 수행합니다.
+MENU_GEOHASH_PRECISION = int(os.getenv("MENU_GEOHASH_PRECISION", "5"))   # 5 ≈ 4.9km x 4.9km
+MENU_CACHE_MAX_ENTRIES = int(os.getenv("MENU_CACHE_MAX_ENTRIES", "5000"))
+MENU_TIMEZONE = ZoneInfo(os.getenv("MENU_TIMEZONE", "Asia/Seoul"))
+# 점심 전에 자주 쓰이는 셀을 미리 채워 두는 예열 작업 (MENU_PREWARM_AT이 비어 있으면 꺼짐)
+MENU_PREWARM_AT = os.getenv("MENU_PREWARM_AT", "")                       # 예: "10:30"
+MENU_PREWARM_CELLS = int(os.getenv("MENU_PREWARM_CELLS", "20"))
+MENU_HOT_DAYS = int(os.getenv("MENU_HOT_DAYS", "7"))
+MENU_HIT_FLUSH_INTERVAL = float(os.getenv("MENU_HIT_FLUSH_INTERVAL", "30"))
+
+MENU_SCHEMA = """
+    CREATE TABLE IF NOT EXISTS menu_cell_hits (
+        cell TEXT NOT NULL,
+        day TEXT NOT NULL,
+        hits INTEGER NOT NULL DEFAULT 0,
+        PRIMARY KEY (cell, day)
+    );
+    CREATE INDEX IF NOT EXISTS ix_menu_cell_hits_day ON menu_cell_hits (day);
+    CREATE TABLE IF NOT EXISTS menu_prewarm_runs (
+        day TEXT PRIMARY KEY,
+        started_at REAL NOT NULL
+    );
+"""
+
+menu_cache = PersistentCache("recommend-menu", ttl=60 * 60 * 24, max_entries=MENU_CACHE_MAX_ENTRIES)
+
+# 같은 셀로 동시에 들어온 메뉴 추천은 Gemini 호출 하나로 합칩니다.
+menu_flight = SingleFlight("recommend-menu")
+
+
+def _today() -> date:
+    return datetime.now(MENU_TIMEZONE).date()
+
+
+def _season(day: date) -> str:
+    return {12: "겨울", 1: "겨울", 2: "겨울", 3: "봄", 4: "봄", 5: "봄",
+            6: "여름", 7: "여름", 8: "여름"}.get(day.month, "가을")
+
+
+def _menu_key(cell: str, day: date) -> str:
+    return make_key({"cell": cell, "date": day.isoformat()})
+
+
+# 셀 요청 수는 요청마다 SQLite에 쓰지 않고 워커 메모리에 세었다가 MENU_HIT_FLUSH_INTERVAL초마다 한 번에 더합니다.
+# 오래된 기록(MENU_HOT_DAYS일 이전)은 예열 작업이 지웁니다.
+_cell_hits = Counter()
+_cell_hits_lock = threading.Lock()
+
+
+def _record_cell_hit(cell: str, day: date):
+    with _cell_hits_lock:
+        _cell_hits[(cell, day.isoformat())] += 1
+
+
+def flush_cell_hits():
+    global _cell_hits
+    with _cell_hits_lock:
+        pending, _cell_hits = _cell_hits, Counter()
+    if not pending:
+        return
+    with transaction(connect(CACHE_PATH, MENU_SCHEMA)) as conn:
+        conn.executemany(
+            "INSERT INTO menu_cell_hits (cell, day, hits) VALUES (?, ?, ?) "
+            "ON CONFLICT(cell, day) DO UPDATE SET hits = hits + excluded.hits",
+            [(cell, day, hits) for (cell, day), hits in sorted(pending.items())],
+        )
+
+
+def prune_cell_hits():
+    since = (_today() - timedelta(days=MENU_HOT_DAYS)).isoformat()
+    connect(CACHE_PATH, MENU_SCHEMA).execute("DELETE FROM menu_cell_hits WHERE day < ?", (since,))
+
+
+def hot_cells(limit: int = MENU_PREWARM_CELLS) -> list:
+    # 최근 MENU_HOT_DAYS일 동안 요청이 많았던 셀 목록 (다른 워커가 아직 안 쓴 요청 수는 빠질 수 있음)
+    since = (_today() - timedelta(days=MENU_HOT_DAYS)).isoformat()
+    rows = connect(CACHE_PATH, MENU_SCHEMA).execute(
+        "SELECT cell, SUM(hits) AS total FROM menu_cell_hits WHERE day >= ? "
+        "GROUP BY cell ORDER BY total DESC LIMIT ?",
+        (since, limit),
+    ).fetchall()
+    return [cell for cell, _ in rows]
+
+
+# ✅ Gemini 메뉴 생성
+async def generate_menus(lat, lon, day: date):
+    prompt = f"""
+    사용자의 GPS 위치는 위도 {lat}, 경도 {lon} 부근입니다.
+    오늘은 {day.isoformat()}이고 계절은 {_season(day)}입니다.
+
+    이 위치를 기준으로 점심 식사 메뉴를 다음 조건에 따라 총 3가지 추천해 주세요:
 
-        이 위치를 기준으로 점심 식사 메뉴를 다음 조건에 따라 총 3가지 추천해 주세요:
+    - 현실 식당에서 실제로 판매되는 구체적인 메뉴명을 사용해 주세요 (예: 김치찌개, 회덮밥, 제육볶음 등)
+    - 두번 확인해서 실제 식당에 파는 메뉴인지 확인해주세요
+    - 반복적인 메뉴는 피하고, 계절/위치/트렌드를 반영해 주세요 
+    - 각 메뉴는 JSON 객체로 구성하고, 배열 형태로 3개를 출력해 주세요
+    - 응답에는 설명 없이 JSON 결과만 출력해 주세요
 
-        - 현실 식당에서 실제로 판매되는 구체적인 메뉴명을 사용해 주세요 (예: 김치찌개, 회덮밥, 제육볶음 등)
-        - 두번 확인해서 실제 식당에 파는 메뉴인지 확인해주세요
-        - 반복적인 메뉴는 피하고, 계절/위치/트렌드를 반영해 주세요 
-        - 각 메뉴는 JSON 객체로 구성하고, 배열 형태로 3개를 출력해 주세요
-        - 응답에는 설명 없이 JSON 결과만 출력해 주세요
+    [
+      {{
+        "menu": "메뉴명",
+        "description": "간단한 설명",
+        "category": "한식/중식/일식/양식/기타"
+      }}
+    ]
+    """
 
-        [
-          {{
-            "menu": "메뉴명",
-            "description": "간단한 설명",
-            "category": "한식/중식/일식/양식/기타"
-          }}
-        ]
-        """
+    text = await generate_text(prompt)
 
-        model = genai.GenerativeModel("gemini-2.5-flash")
-        response = model.generate_content(prompt)
-        text = response.text
+    match = re.search(r'\[.*\]', text, re.DOTALL)
+    return json.loads(match.group()) if match else []
 
-        match = re.search(r'\[.*\]', text, re.DOTALL)
-        menus = json.loads(match.group()) if match else []
 
-        for menu in menus:
-            menu["restaurants"] = search_restaurants_by_menu(menu["menu"], loc.lat, loc.lon)
+async def _generate_cell_menus(cell: str, day: date, key: str):
+    lat, lon = geohash_center(cell)
+    started = time.perf_counter()
+    menus = await generate_menus(round(lat, 4), round(lon, 4), day)
+    if menus:
+        await menu_cache.set_async(key, menus, cost_ms=(time.perf_counter() - started) * 1000)
+    return menus
+
+
+async def get_cell_menus(cell: str, day: date):
+    key = _menu_key(cell, day)
+    cached = await menu_cache.get_async(key)
+    if cached is not None:
+        return cached
+    return await menu_flight.do(key, lambda: _generate_cell_menus(cell, day, key))
+
+
+# --- 점심 전 예열 ---
+async def prewarm_hot_cells():
+    day = _today()
+    await run_in_threadpool(flush_cell_hits)
+    await run_in_threadpool(prune_cell_hits)
+    cells = [cell for cell in await run_in_threadpool(hot_cells)
+             if await menu_cache.get_async(_menu_key(cell, day)) is None]
+    results = await asyncio.gather(*(get_cell_menus(cell, day) for cell in cells), return_exceptions=True)
+    failed = sum(isinstance(result, Exception) for result in results)
+    print(f"🍱 메뉴 예열 완료: {len(cells) - failed}/{len(cells)}개 셀")
+
+
+def _claim_prewarm(day: date) -> bool:
+    # 여러 워커 중 하루에 한 워커만 예열을 실행합니다.
+    cur = connect(CACHE_PATH, MENU_SCHEMA).execute(
+        "INSERT OR IGNORE INTO menu_prewarm_runs (day, started_at) VALUES (?, ?)",
+        (day.isoformat(), time.time()),
+    )
+    return cur.rowcount == 1
+
+
+async def _prewarm_loop():
+    hour, minute = (int(part) for part in MENU_PREWARM_AT.split(":"))
+    while True:
+        now = datetime.now(MENU_TIMEZONE)
+        target = now.replace(hour=hour, minute=minute, second=0, microsecond=0)
+        if target <= now:
+            target += timedelta(days=1)
+        await asyncio.sleep((target - now).total_seconds())
+        if _claim_prewarm(target.date()):
+            try:
+                await prewarm_hot_cells()
+            except Exception as e:
+                print("🚨 메뉴 예열 실패:", e)
+
+
+async def _flush_hits_loop():
+    while True:
+        await asyncio.sleep(MENU_HIT_FLUSH_INTERVAL)
+        try:
+            await run_in_threadpool(flush_cell_hits)
+        except Exception as e:
+            print("⚠️ 메뉴 셀 요청 수 기록 실패:", e)
+
+
+_prewarm_task = None
+_flush_task = None
+
+
+@router.on_event("startup")
+async def start_menu_prewarm():
+    global _prewarm_task, _flush_task
+    _flush_task = asyncio.ensure_future(_flush_hits_loop())
+    if MENU_PREWARM_AT:
+        _prewarm_task = asyncio.ensure_future(_prewarm_loop())
+
+
+@router.on_event("shutdown")
+async def stop_menu_prewarm():
+    for task in (_prewarm_task, _flush_task):
+        if task:
+            task.cancel()
+    flush_cell_hits()
+
+
+# ✅ 메뉴 추천 API
+@router.post("/recommend-menu")
+async def recommend_menu(loc: Location):
+    try:
+        day = _today()
+        cell = geohash(loc.lat, loc.lon, MENU_GEOHASH_PRECISION)
+        _record_cell_hit(cell, day)
+        shared = await get_cell_menus(cell, day)
+        # 캐시/합쳐진 요청끼리 같은 객체를 공유하므로 요청마다 복사해서 식당 정보를 붙입니다.
+        menus = [dict(menu) for menu in shared]
+
+        restaurants = await asyncio.gather(
+            *(search_restaurants_by_menu(menu["menu"], loc.lat, loc.lon) for menu in menus)
+        )
+        for menu, found in zip(menus, restaurants):
+            menu["restaurants"] = found
 
         return {"menus": menus}
 
+    except HTTPException:
+        raise
     except Exception as e:
         print("🚨 에러 발생:", e)
         raise HTTPException(status_code=500, detail="Gemini 또는 맛집 추천 실패")
@@ -97,24 +282,26 @@ async def recommend_menu(loc: Location):
 @router.post("/convert-keyword")
 async def convert_keyword(data: KeywordRequest):
     try:
-        headers = {
-            "Authorization": f"KakaoAK {os.getenv('KAKAO_REST_API_KEY')}"
-        }
-        params = {
-            "query": data.keyword,
-            "size": 1
-        }
+        doc = await kakao.find_place(data.keyword)
 
-        url = "https://dapi.kakao.com/v2/local/search/keyword.json"
-        res = requests.get(url, headers=headers, params=params)
-        result = res.json()
-
-        if result.get("documents"):
-            doc = result["documents"][0]
+        if doc:
             print(f"🔍 키워드 '{data.keyword}' → {doc['place_name']}, lat={doc['y']}, lon={doc['x']}")
             return {"lat": float(doc["y"]), "lon": float(doc["x"])}
         else:
             raise HTTPException(status_code=404, detail="해당 키워드로 장소를 찾을 수 없어요.")
+    except HTTPException:
+        raise
     except Exception as e:
         print("🚨 키워드 변환 오류:", e)
-        raise HTTPException(status_code=500, detail=str(e))
\ No newline at end of file
+        raise HTTPException(status_code=500, detail=str(e))
+# ✅ 캐시 상태 확인 API (운영용)
+@router.get("/menu/stats", dependencies=[Depends(require_admin)])
+def menu_stats():
+    return {
+        "hot_cells": hot_cells(),
+        "cache": {
+            "recommend-menu": menu_cache.stats(),
+            "kakao-nearby": kakao.nearby_cache.stats(),
+            "kakao-place": kakao.place_cache.stats(),
+        }
+    }
@@ -0,0 +1,175 @@
+# migrations.py
+
+# --- 버전 관리되는 스키마 마이그레이션 ---
+# Base.metadata.create_all()은 새 테이블만 만들고 기존 테이블의 인덱스는 건드리지 않으므로,
+# 운영 DB에 필요한 변경은 여기에 버전 순서대로 추가합니다. (데이터를 지우는 변경은 넣지 않습니다)
+# 실행: 서버 시작 시 main.py에서 자동 실행되며, `python migrations.py`로 직접 실행할 수도 있습니다.
+
+from datetime import datetime
+
+from sqlalchemy import inspect, text
+
+MIGRATION_LOCK_NAME = "travellink_migrations"
+
+
+def _existing_indexes(conn, table: str) -> set:
+    return {index["name"] for index in inspect(conn).get_indexes(table)}
+
+
+def _create_index(conn, table: str, name: str, columns: list, unique: bool = False):
+    if name in _existing_indexes(conn, table):
+        return
+    conn.execute(text(f"CREATE {'UNIQUE ' if unique else ''}INDEX {name} ON {table} ({', '.join(columns)})"))
+    print(f"  + {table}.{name} ({', '.join(columns)}){' UNIQUE' if unique else ''}")
+
+
+def _has_duplicates(conn, table: str, columns: list) -> bool:
+    cols = ", ".join(columns)
+    row = conn.execute(text(
+        f"SELECT 1 FROM {table} GROUP BY {cols} HAVING COUNT(*) > 1 LIMIT 1"
+    )).first()
+    return row is not None
+
+
+def _001_plan_hot_query_indexes(conn):
+    # 목록 최신순 정렬/키셋 페이지네이션, 작성자별 조회
+    _create_index(conn, "plans", "ix_plans_created_at_id", ["created_at", "id"])
+    _create_index(conn, "plans", "ix_plans_username", ["username"])
+    # 신청/참가자 조회는 plan_id 단독 또는 (plan_id, username)으로 찾으므로 복합 인덱스 하나로 둘 다 처리합니다.
+    _create_index(conn, "plan_applications", "ix_plan_applications_plan_user", ["plan_id", "username"])
+    # 한 계획에 같은 참가자가 두 번 들어갈 수 없으므로 UNIQUE로 만들되,
+    # 기존 데이터에 중복이 있으면 데이터를 지우지 않고 일반 인덱스로 만든 뒤 경고만 남깁니다.
+    unique = not _has_duplicates(conn, "plan_participants", ["plan_id", "username"])
+    if not unique:
+        print("  ! plan_participants에 중복 (plan_id, username)이 있어 UNIQUE 대신 일반 인덱스를 만듭니다.")
+    _create_index(conn, "plan_participants", "ux_plan_participants_plan_user", ["plan_id", "username"], unique=unique)
+
+
+def _002_plan_search_index(conn):
+    # 검색 역색인 테이블을 만들고 기존 계획을 색인합니다.
+    from sqlalchemy.orm import Session
+    from models import PlanSearchTerm
+    from search_index import rebuild_index
+
+    PlanSearchTerm.__table__.create(conn, checkfirst=True)
+    _create_index(conn, "plan_search_terms", "ix_plan_search_terms_plan_id", ["plan_id"])
+    with Session(bind=conn) as db:
+        print(f"  + {rebuild_index(db)}개 계획 색인")
+
+
+def _003_user_search_index(conn):
+    # 관리자 사용자 검색용 trigram 색인을 만들고 기존 사용자를 색인합니다.
+    from sqlalchemy.orm import Session
+    from models import UserModel, UserSearchGram
+    from search_index import rebuild_user_index
+
+    UserSearchGram.__table__.create(conn, checkfirst=True)
+    _create_index(conn, "user_search_grams", "ix_user_search_grams_user_id", ["user_id"])
+    with Session(bind=conn) as db:
+        print(f"  + {rebuild_user_index(db, UserModel)}명 사용자 색인")
+
+
+def _004_plan_revision(conn):
+    # 응답 캐시/ETag용 계획 버전 컬럼
+    columns = {column["name"] for column in inspect(conn).get_columns("plans")}
+    if "revision" not in columns:
+        conn.execute(text("ALTER TABLE plans ADD COLUMN revision INTEGER NOT NULL DEFAULT 1"))
+        print("  + plans.revision")
+
+
+def _005_my_plans_index(conn):
+    # /api/me/plans: 작성자별 최신순 키셋 페이지네이션
+    _create_index(conn, "plans", "ix_plans_username_created_at_id", ["username", "created_at", "id"])
+
+
+def _006_search_term_collation(conn):
+    # MySQL 기본 collation에서는 "cafe"와 "café"가 같은 PK로 부딪혀 계획 저장이 실패하므로 토큰을 바이트 그대로 비교하고,
+    # 흔한 토큰은 가중치 높은 posting만 읽도록 (term, weight, plan_id) 인덱스를 추가합니다.
+    from models import PlanSearchTerm
+
+    if conn.dialect.name == "mysql":
+        conn.execute(text(
+            "ALTER TABLE plan_search_terms MODIFY term VARCHAR(64) CHARACTER SET utf8mb4 COLLATE utf8mb4_bin NOT NULL"
+        ))
+        print("  ~ plan_search_terms.term COLLATE utf8mb4_bin")
+    elif conn.dialect.name == "sqlite":
+        table_sql = conn.execute(text(
+            "SELECT sql FROM sqlite_master WHERE type = 'table' AND name = 'plan_search_terms'"
+        )).scalar()
+        if "WITHOUT ROWID" not in table_sql.upper():
+            # SQLite 테이블을 PK 순서로 저장하도록(WITHOUT ROWID) 다시 만들고 색인을 옮깁니다.
+            conn.execute(text("ALTER TABLE plan_search_terms RENAME TO plan_search_terms_old"))
+            conn.execute(text("DROP INDEX IF EXISTS ix_plan_search_terms_plan_id"))
+            conn.execute(text("DROP INDEX IF EXISTS ix_plan_search_terms_term_weight"))
+            PlanSearchTerm.__table__.create(conn)
+            conn.execute(text(
+                "INSERT INTO plan_search_terms (term, plan_id, weight) "
+                "SELECT term, plan_id, weight FROM plan_search_terms_old"
+            ))
+            conn.execute(text("DROP TABLE plan_search_terms_old"))
+            print("  ~ plan_search_terms WITHOUT ROWID")
+    _create_index(conn, "plan_search_terms", "ix_plan_search_terms_term_weight", ["term", "weight", "plan_id"])
+
+
+def _007_user_search_bigrams(conn):
+    # 2글자 검색어도 부분 일치로 찾도록 bigram까지 다시 색인하고,
+    # 계획 토큰과 같은 이유(cafe/café PK 충돌)로 조각을 바이트 그대로 비교합니다.
+    from sqlalchemy.orm import Session
+    from models import UserModel
+    from search_index import rebuild_user_index
+
+    if conn.dialect.name == "mysql":
+        conn.execute(text(
+            "ALTER TABLE user_search_grams MODIFY gram VARCHAR(12) CHARACTER SET utf8mb4 COLLATE utf8mb4_bin NOT NULL"
+        ))
+        print("  ~ user_search_grams.gram COLLATE utf8mb4_bin")
+    with Session(bind=conn) as db:
+        print(f"  + {rebuild_user_index(db, UserModel)}명 사용자 다시 색인 (bigram 추가)")
+
+
+MIGRATIONS = [
+    (1, "plan/application hot query indexes", _001_plan_hot_query_indexes),
+    (2, "plan full-text search index", _002_plan_search_index),
+    (3, "admin user search trigram index", _003_user_search_index),
+    (4, "plan revision for ETag / response cache", _004_plan_revision),
+    (5, "my plans keyset index", _005_my_plans_index),
+    (6, "search term binary collation and weight index", _006_search_term_collation),
+    (7, "admin user search bigrams and binary collation", _007_user_search_bigrams),
+]
+
+
+def run_migrations(engine):
+    with engine.connect() as conn:
+        is_mysql = conn.dialect.name == "mysql"
+        if is_mysql:
+            # 여러 gunicorn 워커가 동시에 시작해도 한 번만 실행되도록 잠급니다.
+            conn.execute(text("SELECT GET_LOCK(:name, 60)"), {"name": MIGRATION_LOCK_NAME})
+        try:
+            conn.execute(text(
+                "CREATE TABLE IF NOT EXISTS schema_migrations ("
+                "version INTEGER PRIMARY KEY, name VARCHAR(255) NOT NULL, applied_at VARCHAR(32) NOT NULL)"
+            ))
+            conn.commit()
+            applied = {row[0] for row in conn.execute(text("SELECT version FROM schema_migrations"))}
+            for version, name, migrate in MIGRATIONS:
+                if version in applied:
+                    continue
+                print(f"🛠️ migration {version:03d}: {name}")
+                migrate(conn)
+                conn.execute(
+                    text("INSERT INTO schema_migrations (version, name, applied_at) VALUES (:v, :n, :t)"),
+                    {"v": version, "n": name, "t": datetime.utcnow().isoformat()},
+                )
+                conn.commit()
+        finally:
+            if is_mysql:
+                conn.execute(text("SELECT RELEASE_LOCK(:name)"), {"name": MIGRATION_LOCK_NAME})
+
+
+if __name__ == "__main__":
+    from database import engine, Base
+    import models  # noqa: F401  (모든 테이블을 Base에 등록)
+
+    Base.metadata.create_all(bind=engine)
+    run_migrations(engine)
+    print("✅ 마이그레이션 완료")
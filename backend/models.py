@@ -1,6 +1,13 @@
-from sqlalchemy import Column, Integer, String, Date, Text, JSON, TIMESTAMP, ForeignKey, func
+from sqlalchemy import Column, Integer, String, Date, Text, JSON, TIMESTAMP, ForeignKey, Index, func
+from sqlalchemy.dialects import mysql
 from database import Base
 
+
+def binary_string(length: int):
+    # MySQL 기본 collation은 악센트/대소문자를 무시해 "cafe"와 "café"가 같은 PK가 되므로, 색인 토큰은 바이트 그대로 비교합니다.
+    return String(length).with_variant(mysql.VARCHAR(length, charset="utf8mb4", collation="utf8mb4_bin"), "mysql")
+
+
 class UserModel(Base):
     __tablename__ = "users"
     id = Column(Integer, primary_key=True, index=True)
@@ -24,10 +31,18 @@ class Plan(Base):
     participants = Column(Integer, default=1)
     capacity = Column(Integer, default=4)
     views = Column(Integer, default=0)
+    revision = Column(Integer, nullable=False, default=1, server_default="1")  # 내용/인원이 바뀔 때마다 +1 (ETag)
     tags = Column(Text)
     itinerary = Column(JSON)
     created_at = Column(TIMESTAMP, server_default=func.now())
 
+    # 인덱스를 추가/변경하면 migrations.py에도 같은 이름으로 마이그레이션을 추가해야 기존 DB에 반영됩니다.
+    __table_args__ = (
+        Index("ix_plans_created_at_id", "created_at", "id"),  # 최신순 목록 + 키셋 페이지네이션
+        Index("ix_plans_username", "username"),
+        Index("ix_plans_username_created_at_id", "username", "created_at", "id"),  # 내 계획 키셋 페이지네이션
+    )
+
 # PlanApplication, PlanParticipant 모델도 이 아래에 추가하면 됩니다.
 
 # models.py 파일 하단에 추가
@@ -54,6 +69,10 @@ class PlanApplication(Base):
     contact_type = Column(String(255))
     contact_value = Column(String(255))
 
+    __table_args__ = (
+        Index("ix_plan_applications_plan_user", "plan_id", "username"),
+    )
+
 # 계획 확정 참가자 테이블 모델
 class PlanParticipant(Base):
     __tablename__ = "plan_participants"
@@ -62,4 +81,34 @@ class PlanParticipant(Base):
     username = Column(String(255), index=True)
     contact_type = Column(String(255))
     contact_value = Column(String(255))
-    travel_style = Column(String(255))
\ No newline at end of file
+    travel_style = Column(String(255))
+
+    __table_args__ = (
+        Index("ux_plan_participants_plan_user", "plan_id", "username", unique=True),
+    )
+
+# 계획 검색용 역색인 테이블 (search_index.py에서 생성/수정/삭제 시 함께 갱신)
+class PlanSearchTerm(Base):
+    __tablename__ = "plan_search_terms"
+    term = Column(binary_string(64), primary_key=True)
+    plan_id = Column(Integer, primary_key=True)
+    weight = Column(Integer, nullable=False, default=1)
+
+    __table_args__ = (
+        Index("ix_plan_search_terms_plan_id", "plan_id"),
+        # 흔한 토큰은 가중치 높은 posting부터 필요한 만큼만 읽습니다. (search_index.search_plan_ids)
+        Index("ix_plan_search_terms_term_weight", "term", "weight", "plan_id"),
+        # SQLite도 InnoDB처럼 PK 순서로 저장해 (term, plan_id) 조회가 weight까지 PK에서 끝나게 합니다.
+        {"sqlite_with_rowid": False},
+    )
+
+
+# 관리자 사용자 검색용 trigram 색인 (username/email의 3글자 조각)
+class UserSearchGram(Base):
+    __tablename__ = "user_search_grams"
+    gram = Column(binary_string(12), primary_key=True)
+    user_id = Column(Integer, primary_key=True)
+
+    __table_args__ = (
+        Index("ix_user_search_grams_user_id", "user_id"),
+    )
@@ -1,15 +1,35 @@
-from fastapi import APIRouter, Depends, HTTPException, Request, Body
+from fastapi import APIRouter, Depends, HTTPException, Request, Body, Query
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import ORJSONResponse, Response, StreamingResponse
 from pydantic import BaseModel, ConfigDict
+from cachetools import TTLCache
 from typing import List, Optional
 from datetime import datetime
+from sqlalchemy import and_, delete, func, literal, or_, select, union_all, update
 from sqlalchemy.orm import Session
-from sqlalchemy.exc import SQLAlchemyError
-import google.generativeai as genai
+from sqlalchemy.exc import IntegrityError, SQLAlchemyError
+import asyncio
+import base64
+import contextlib
+import hashlib
 import json
+import os
 import re
+import time
+import uuid
 
-from database import get_db
+from database import SessionLocal, get_db, get_read_db, read_session
 from models import Plan, PlanApplication, PlanParticipant
+from view_counter import view_counter
+from search_index import escape_like, index_plan, search_plan_ids, unindex_plan
+from gemini import generate_content, generate_text, stream_text, create_cached_model, usage_of
+from json_stream import ItineraryStreamParser
+from cache import PersistentCache, make_key
+from response_cache import TieredCache, etag_matches
+from auth_session import current_username, require_admin
+from singleflight import SingleFlight
+from jobs import JobQueue
+import singleflight
 
 # APIRouter 인스턴스 생성
 router = APIRouter()
@@ -48,6 +68,27 @@ class PlanOut(BaseModel):
     created_at: datetime
     
 
+class PlanListItem(BaseModel):
+    # 목록 화면용 경량 스키마 (itinerary 제외)
+    model_config = ConfigDict(from_attributes=True)
+
+    id: int
+    title: str
+    username: Optional[str]
+    destination: Optional[str]
+    summary: Optional[str]
+    participants: int
+    capacity: int
+    views: int
+    tags: Optional[str]
+    date: Optional[str]
+    created_at: datetime
+
+class PlanPage(BaseModel):
+    items: List[PlanListItem]
+    next_cursor: Optional[str] = None
+    total: Optional[int] = None
+
 class RecommendRequest(BaseModel):
     selectedLocation: Optional[str] = None
     travelArea: str
@@ -62,60 +103,269 @@ class RecommendRequest(BaseModel):
     visa: Optional[str] = None
     flightTime: Optional[str] = None
     travelStyle: Optional[List[str]] = []
+    chunked: Optional[bool] = None       # 긴 여행 분할 생성 여부 (None이면 일수 기준으로 자동 결정)
 
 class SuggestResponse(BaseModel):
     locations: List[str]
 
 # --- API 엔드포인트들 ---
 
+@router.on_event("startup")
+async def start_view_counter():
+    view_counter.start()
+
+@router.on_event("shutdown")
+async def stop_view_counter():
+    await view_counter.stop()
+
+# --- 계획 읽기 캐시 / ETag ---
+# 게시판이 같은 목록/상세를 계속 다시 읽으므로, 직렬화된 응답을 2단계 캐시(워커 메모리 + 공유)에 두고
+# 계획 버전(revision)으로 만든 ETag로 변경이 없으면 304만 돌려줍니다.
+# 계획을 바꾸는 곳(생성/수정/삭제/수락/참가 취소)에서는 revision을 올리고 invalidate_plan_cache()를 부릅니다.
+PLAN_CACHE_LOCAL_TTL = float(os.getenv("PLAN_CACHE_LOCAL_TTL", "2"))     # 다른 워커의 변경이 보이기까지 최대 지연(초)
+PLAN_CACHE_SHARED_TTL = float(os.getenv("PLAN_CACHE_SHARED_TTL", "60"))
+PLAN_HTTP_MAX_AGE = int(os.getenv("PLAN_HTTP_MAX_AGE", "0"))             # 브라우저가 재검증 없이 쓸 시간(초)
+
+plan_cache = TieredCache(
+    "plan-read", local_ttl=PLAN_CACHE_LOCAL_TTL, shared_ttl=PLAN_CACHE_SHARED_TTL, max_local=2000,
+)
+PLAN_LIST_CACHE_KEY = "plans"
+
+
+def _plan_cache_key(plan_id: int) -> str:
+    return f"plan:{plan_id}"
+
+
+def invalidate_plan_cache(plan_id: Optional[int] = None):
+    if plan_id is not None:
+        plan_cache.delete(_plan_cache_key(plan_id))
+    plan_cache.delete(PLAN_LIST_CACHE_KEY)
+
+
+def _cached_response(request: Request, entry: dict, build_body):
+    headers = {"ETag": entry["etag"], "Cache-Control": f"public, max-age={PLAN_HTTP_MAX_AGE}, must-revalidate"}
+    if etag_matches(request.headers.get("if-none-match"), entry["etag"]):
+        return Response(status_code=304, headers=headers)
+    return ORJSONResponse(build_body(), headers=headers)
+
+
+# 캐시 항목(스냅샷)마다 이 워커의 조회수 기준점. 캐시 항목은 요청/워커끼리 공유하므로 항목 안에 쓰지 않고 따로 둡니다.
+# 스냅샷은 공유 캐시에서 PLAN_CACHE_SHARED_TTL 뒤에 사라지므로 그보다 조금 길게만 기억합니다.
+PLAN_VIEW_BASES_MAX = int(os.getenv("PLAN_VIEW_BASES_MAX", "50000"))
+_view_bases = TTLCache(maxsize=PLAN_VIEW_BASES_MAX, ttl=PLAN_CACHE_SHARED_TTL + PLAN_CACHE_LOCAL_TTL)
+
+
+def _live_views(entry: dict, plan: dict) -> int:
+    # 캐시된 조회수에 이 워커가 그 뒤로 센 조회수를 더합니다. (조회수는 ETag에 넣지 않음)
+    plan_id = plan["id"]
+    key = (entry.get("snapshot") or entry["etag"], plan_id)  # snapshot이 없는 예전 공유 캐시 항목은 etag로
+    base = _view_bases.get(key)
+    if base is None:
+        base = _view_bases[key] = view_counter.seen(plan_id) - view_counter.pending(plan_id)
+    return plan["views"] + view_counter.seen(plan_id) - base
+
+
+# DB에서 읽은 행은 이미 스키마에 맞으므로 PlanOut으로 다시 검증하지 않고 dict로 바로 옮깁니다.
+# (공유 캐시가 JSON으로 저장하므로 created_at만 PlanOut과 같은 ISO 문자열로 바꿈, PlanOut은 응답 문서용으로 남겨 둠)
+PLAN_OUT_FIELDS = tuple(PlanOut.model_fields)
+
+
+def plan_to_dict(plan: Plan) -> dict:
+    body = {field: getattr(plan, field) for field in PLAN_OUT_FIELDS}
+    body["created_at"] = plan.created_at.isoformat()
+    return body
+
+
+# 캐시 로더는 캐시에 없을 때만 스레드풀에서 DB를 읽습니다.
+# 무효화 직후에 다시 채우는 값이므로 복제가 늦을 수 있는 레플리카가 아니라 primary에서 읽습니다.
+def _load_plan_list():
+    with SessionLocal() as db:
+        plans = db.query(Plan).order_by(Plan.created_at.desc()).all()
+        version = hashlib.sha1(",".join(f"{plan.id}:{plan.revision}" for plan in plans).encode()).hexdigest()
+        return {
+            "etag": f'W/"plans-{version[:16]}"',
+            "snapshot": uuid.uuid4().hex,
+            "body": [plan_to_dict(plan) for plan in plans],
+        }
+
+
+def _load_plan(plan_id: int):
+    with SessionLocal() as db:
+        plan = db.get(Plan, plan_id)
+        if not plan:
+            return None
+        return {
+            "etag": f'W/"plan-{plan.id}-{plan.revision}"',
+            "snapshot": uuid.uuid4().hex,
+            "body": plan_to_dict(plan),
+        }
+
+
 @router.post("/plans", tags=["Plans"])
 def create_plan(plan: PlanCreate, db: Session = Depends(get_db)):
     try:
         # Pydantic V2에서는 .dict() 대신 .model_dump()를 사용합니다.
         db_plan = Plan(**plan.model_dump())
         db.add(db_plan)
+        db.flush()
+        index_plan(db, db_plan)
         db.commit()
-        db.refresh(db_plan)
+        invalidate_plan_cache()
         return {"message": "🎉 계획이 저장되었습니다!", "id": db_plan.id}
     except SQLAlchemyError as e:
         db.rollback()
         raise HTTPException(status_code=500, detail=f"데이터베이스 저장 중 오류: {str(e)}")
 
 @router.get("/plans", response_model=List[PlanOut], tags=["Plans"])
-def get_plans(db: Session = Depends(get_db)):
-    return db.query(Plan).order_by(Plan.created_at.desc()).all()
+async def get_plans(request: Request):
+    entry = await plan_cache.get_or_load(PLAN_LIST_CACHE_KEY, lambda: run_in_threadpool(_load_plan_list))
+    return _cached_response(
+        request, entry, lambda: [{**plan, "views": _live_views(entry, plan)} for plan in entry["body"]]
+    )
+
+# --- 페이지 단위 목록 조회 ---
+# (created_at, id) 기준 키셋 페이지네이션이라 뒤쪽 페이지도 OFFSET 없이 같은 비용으로 읽습니다.
+PLAN_LIST_COLUMNS = (
+    Plan.id, Plan.title, Plan.username, Plan.destination, Plan.summary, Plan.participants,
+    Plan.capacity, Plan.views, Plan.tags, Plan.date, Plan.created_at,
+)
+
+
+def encode_cursor(created_at: datetime, plan_id: int) -> str:
+    raw = json.dumps([created_at.isoformat(), plan_id])
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str):
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        created_at, plan_id = json.loads(raw)
+        return datetime.fromisoformat(created_at), int(plan_id)
+    except (ValueError, TypeError):
+        raise HTTPException(status_code=400, detail="잘못된 cursor 값입니다.")
+
+
+# destination/tag 조건은 인덱스를 타지 않습니다. (created_at, id) 인덱스 순서로 훑으면서 걸러내므로,
+# 흔한 조건은 금방 한 페이지가 차지만 드문 조건일수록 많은 행을 읽습니다. 특히 tag는 '%tag%' 부분 일치라
+# 어떤 인덱스로도 좁힐 수 없으니, 키워드로 찾는 화면은 역색인을 쓰는 /plans/search를 쓰세요.
+def filter_plans(query, destination: Optional[str] = None, tag: Optional[str] = None, open_only: bool = False):
+    # 사용자가 넣은 %/_는 와일드카드가 아니라 글자 그대로 찾습니다.
+    if destination:
+        query = query.filter(Plan.destination.like(f"{escape_like(destination)}%", escape="\\"))
+    if tag:
+        query = query.filter(Plan.tags.like(f"%{escape_like(tag)}%", escape="\\"))
+    if open_only:
+        query = query.filter(Plan.participants < Plan.capacity)
+    return query
+
+
+def page_plans(query, cursor: Optional[str], limit: int):
+    """키셋 조건을 적용해 (rows, next_cursor)를 돌려줍니다."""
+    if cursor:
+        created_at, plan_id = decode_cursor(cursor)
+        # DB에 저장된 것과 같은 'YYYY-MM-DD HH:MM:SS' 문자열로 비교해야 SQLite에서도 정확히 맞습니다. (MySQL은 자동 변환)
+        cursor_at = literal(created_at.isoformat(sep=" "))
+        query = query.filter(or_(
+            Plan.created_at < cursor_at,
+            and_(Plan.created_at == cursor_at, Plan.id < plan_id),
+        ))
+    rows = query.order_by(Plan.created_at.desc(), Plan.id.desc()).limit(limit + 1).all()
+    next_cursor = None
+    if len(rows) > limit:
+        rows = rows[:limit]
+        next_cursor = encode_cursor(rows[-1].created_at, rows[-1].id)
+    return rows, next_cursor
+
+
+@router.get("/plans/page", response_model=PlanPage, tags=["Plans"])
+def get_plan_page(
+    cursor: Optional[str] = None,
+    limit: int = Query(20, ge=1, le=100),
+    destination: Optional[str] = None,
+    tag: Optional[str] = None,
+    open_only: bool = False,
+    with_total: bool = True,
+    db: Session = Depends(get_read_db),
+):
+    rows, next_cursor = page_plans(filter_plans(db.query(*PLAN_LIST_COLUMNS), destination, tag, open_only), cursor, limit)
+    total = None
+    if with_total:
+        # 전체 개수가 필요 없으면 with_total=false로 COUNT 쿼리를 생략할 수 있습니다.
+        total = filter_plans(db.query(func.count(Plan.id)), destination, tag, open_only).scalar()
+    return {"items": rows, "next_cursor": next_cursor, "total": total}
+
+# --- 계획 검색 ---
+def _encode_search_cursor(score: int, plan_id: int) -> str:
+    return base64.urlsafe_b64encode(json.dumps([score, plan_id]).encode()).decode().rstrip("=")
+
+
+def _decode_search_cursor(cursor: str):
+    try:
+        score, plan_id = json.loads(base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)))
+        return int(score), int(plan_id)
+    except (ValueError, TypeError):
+        raise HTTPException(status_code=400, detail="잘못된 cursor 값입니다.")
+
+
+@router.get("/plans/search", response_model=PlanPage, tags=["Plans"])
+def search_plans(
+    q: str = Query(..., min_length=1),
+    cursor: Optional[str] = None,
+    limit: int = Query(20, ge=1, le=100),
+    db: Session = Depends(get_read_db),
+):
+    # 제목/여행지/태그/요약/일정 활동을 역색인으로 검색해 관련도순으로 돌려줍니다.
+    after = _decode_search_cursor(cursor) if cursor else None
+    hits = search_plan_ids(db, q, limit + 1, after=after)
+    next_cursor = None
+    if len(hits) > limit:
+        hits = hits[:limit]
+        last_id, last_score = hits[-1]
+        next_cursor = _encode_search_cursor(last_score, last_id)
+    result = db.execute(select(*PLAN_LIST_COLUMNS).where(Plan.id.in_([plan_id for plan_id, _ in hits])))
+    rows = {row.id: row for row in result}
+    return {"items": [rows[plan_id] for plan_id, _ in hits if plan_id in rows], "next_cursor": next_cursor}
 
 @router.get("/plan/{plan_id}", response_model=PlanOut, tags=["Plans"])
-def get_plan_detail(plan_id: int, db: Session = Depends(get_db)):
-    plan = db.query(Plan).filter(Plan.id == plan_id).first()
-    if not plan:
+async def get_plan_detail(plan_id: int, request: Request):
+    entry = await plan_cache.get_or_load(_plan_cache_key(plan_id), lambda: run_in_threadpool(_load_plan, plan_id))
+    if entry is None:
         raise HTTPException(status_code=404, detail="Plan not found")
-    plan.views += 1
-    db.commit()
-    return plan # ✅ [수정됨] PlanOut 모델이 자동으로 변환해주므로 코드가 깔끔해집니다.
+    # 조회수는 메모리에 모았다가 주기적으로 DB에 반영합니다. (상세 조회는 읽기 전용)
+    plan = entry["body"]
+    _live_views(entry, plan)  # 이번 조회를 세기 전 기준점을 먼저 잡습니다.
+    view_counter.incr(plan_id)
+    return _cached_response(request, entry, lambda: {**plan, "views": _live_views(entry, plan)})
 
 @router.put("/plan/{plan_id}", tags=["Plans"])
 def update_plan(plan_id: int, updated: PlanCreate, db: Session = Depends(get_db)):
-    plan = db.query(Plan).filter(Plan.id == plan_id).first()
+    plan = db.get(Plan, plan_id)
     if not plan:
         raise HTTPException(status_code=404, detail="Plan not found")
     
     update_data = updated.model_dump(exclude_unset=True)
     for key, value in update_data.items():
         setattr(plan, key, value)
+    plan.revision = Plan.revision + 1
+    index_plan(db, plan)
         
     db.commit()
-    db.refresh(plan)
+    invalidate_plan_context(plan_id)
+    invalidate_plan_cache(plan_id)
     return {"message": "계획이 수정되었습니다."}
 
 @router.delete("/plan/{plan_id}", tags=["Plans"])
 def delete_plan(plan_id: int, db: Session = Depends(get_db)):
-    plan = db.query(Plan).filter(Plan.id == plan_id).first()
+    plan = db.get(Plan, plan_id)
     if not plan:
         raise HTTPException(status_code=404, detail="Plan not found")
     try:
+        unindex_plan(db, plan_id)
         db.delete(plan)
         db.commit()
+        view_counter.discard(plan_id)
+        invalidate_plan_context(plan_id)
+        invalidate_plan_cache(plan_id)
         return {"message": "Plan deleted successfully"}
     except SQLAlchemyError as e:
         db.rollback()
@@ -124,8 +374,7 @@ def delete_plan(plan_id: int, db: Session = Depends(get_db)):
 # ... 이하 신청, 참가, Gemini 관련 코드는 기존과 동일하게 유지 ...
 
 @router.post("/plans/{plan_id}/apply", tags=["Plans Actions"])
-async def apply_plan(plan_id: int, request: Request, db: Session = Depends(get_db)):
-    data = await request.json()
+def apply_plan(plan_id: int, data: dict, db: Session = Depends(get_db)):
     application = PlanApplication(plan_id=plan_id, **data)
     db.add(application)
     db.commit()
@@ -133,41 +382,64 @@ async def apply_plan(plan_id: int, request: Request, db: Session = Depends(get_d
 
 @router.get("/plan/{plan_id}/applications", tags=["Plans Actions"])
 def get_plan_applications(plan_id: int, db: Session = Depends(get_db)):
-    return db.query(PlanApplication).filter(PlanApplication.plan_id == plan_id).all()
+    result = db.execute(select(PlanApplication).where(PlanApplication.plan_id == plan_id))
+    return result.scalars().all()
 
 @router.post("/plan/{plan_id}/accept", tags=["Plans Actions"])
-async def accept_applicant(plan_id: int, request: Request, db: Session = Depends(get_db)):
-    data = await request.json()
+def accept_applicant(plan_id: int, data: dict, db: Session = Depends(get_db)):
     username = data.get("username")
     if not username:
         raise HTTPException(status_code=400, detail="username은 필수입니다.")
     
-    plan = db.query(Plan).filter(Plan.id == plan_id).first()
-    if not plan:
-        raise HTTPException(status_code=404, detail="해당 계획이 존재하지 않습니다.")
-    if plan.participants >= plan.capacity:
-        raise HTTPException(status_code=400, detail="모집 정원이 이미 찼습니다.")
-    
-    application = db.query(PlanApplication).filter_by(plan_id=plan_id, username=username).first()
-    if not application:
+    # 신청서 삭제와 좌석 확보를 각각 조건부 단일 쿼리로 처리해서, 행을 미리 읽고 잠그지 않아도
+    # 동시에 수락해도 정원을 넘거나 같은 신청이 두 번 수락되지 않습니다. (다른 계획끼리는 서로 막지 않음)
+    application = db.execute(
+        select(PlanApplication).where(PlanApplication.plan_id == plan_id, PlanApplication.username == username).limit(1)
+    ).scalar()
+    claimed_application = 0
+    if application:
+        claimed_application = db.execute(
+            delete(PlanApplication).where(PlanApplication.id == application.id),
+            execution_options={"synchronize_session": False},
+        ).rowcount
+    if not claimed_application:
+        db.rollback()
+        if not db.scalar(select(Plan.id).where(Plan.id == plan_id)):
+            raise HTTPException(status_code=404, detail="해당 계획이 존재하지 않습니다.")
         raise HTTPException(status_code=404, detail="신청 내역을 찾을 수 없습니다.")
-    
-    participant = PlanParticipant(
+
+    claimed_seat = db.execute(
+        update(Plan)
+        .where(Plan.id == plan_id, Plan.participants < Plan.capacity)
+        .values(participants=Plan.participants + 1, revision=Plan.revision + 1),
+        execution_options={"synchronize_session": False},
+    ).rowcount
+    if not claimed_seat:
+        db.rollback()
+        if not db.scalar(select(Plan.id).where(Plan.id == plan_id)):
+            raise HTTPException(status_code=404, detail="해당 계획이 존재하지 않습니다.")
+        raise HTTPException(status_code=400, detail="모집 정원이 이미 찼습니다.")
+
+    db.add(PlanParticipant(
         plan_id=plan_id,
         username=username,
         contact_type=application.contact_type,
         contact_value=application.contact_value,
         travel_style=application.travel_style,
-    )
-    db.add(participant)
-    plan.participants += 1
-    db.delete(application)
-    db.commit()
+    ))
+    try:
+        db.commit()
+    except IntegrityError:
+        # 이미 참가자인 경우 (plan_id, username UNIQUE) - 좌석/신청서 변경도 함께 취소됩니다.
+        db.rollback()
+        raise HTTPException(status_code=409, detail="이미 합류한 참가자입니다.")
+    invalidate_plan_cache(plan_id)
     return {"message": "합류 완료"}
 
 @router.get("/plan/{plan_id}/participants", tags=["Plans Actions"])
-def get_participants(plan_id: int, db: Session = Depends(get_db)):
-    return db.query(PlanParticipant).filter(PlanParticipant.plan_id == plan_id).all()
+def get_participants(plan_id: int, db: Session = Depends(get_read_db)):
+    result = db.execute(select(PlanParticipant).where(PlanParticipant.plan_id == plan_id))
+    return result.scalars().all()
 
 @router.post("/plan/{plan_id}/participants/remove", tags=["Plans Actions"])
 def remove_participant(plan_id: int, data: dict, db: Session = Depends(get_db)):
@@ -175,110 +447,277 @@ def remove_participant(plan_id: int, data: dict, db: Session = Depends(get_db)):
     if not username:
         raise HTTPException(status_code=400, detail="username is required")
     
-    participant = db.query(PlanParticipant).filter_by(plan_id=plan_id, username=username).first()
-    if not participant:
+    # 실제로 지운 행이 있을 때만 인원을 줄이므로 동시에 같은 참가자를 빼도 두 번 줄지 않습니다.
+    removed = db.execute(
+        delete(PlanParticipant).where(PlanParticipant.plan_id == plan_id, PlanParticipant.username == username),
+        execution_options={"synchronize_session": False},
+    ).rowcount
+    if not removed:
+        db.rollback()
         raise HTTPException(status_code=404, detail="해당 참가자를 찾을 수 없습니다")
-    
-    db.delete(participant)
-    plan = db.query(Plan).filter(Plan.id == plan_id).first()
-    if plan and plan.participants > 0:
-        plan.participants -= 1
+
+    db.execute(
+        update(Plan)
+        .where(Plan.id == plan_id, Plan.participants >= removed)
+        .values(participants=Plan.participants - removed, revision=Plan.revision + 1),
+        execution_options={"synchronize_session": False},
+    )
     db.commit()
+    invalidate_plan_cache(plan_id)
     return {"message": "삭제 성공"}
 
 @router.get("/plans/{plan_id}/applied", tags=["Plans Actions"])
 def check_applied_status(plan_id: int, request: Request, db: Session = Depends(get_db)):
-    username = request.cookies.get("user")
+    username = current_username(request)
     if not username:
         raise HTTPException(status_code=401, detail="로그인이 필요합니다.")
     
-    applied = db.query(PlanApplication).filter_by(plan_id=plan_id, username=username).first()
+    applied = db.scalar(
+        select(PlanApplication.id).where(PlanApplication.plan_id == plan_id, PlanApplication.username == username).limit(1)
+    )
     return {"applied": bool(applied)}
 
-@router.post("/suggest-locations", response_model=SuggestResponse, tags=["Gemini"])
-async def suggest_locations(data: RecommendRequest):
-    try:
-        body = data.model_dump()
-        travel_area = body.get("travelArea")
-        if not travel_area:
-            raise HTTPException(status_code=400, detail="여행 지역 정보가 누락되었습니다.")
-        
-        preferences = body.get("interests", []) + body.get("travelStyle", [])
-        preferences_str = ", ".join(filter(None, set(preferences))) or "특별한 선호 없음"
-
-        prompt = f"""
-            **당신은 지정된 지역 내에서만 여행지를 추천하는 AI 여행 전문가입니다.**
-            **가장 중요한 절대 규칙: 반드시 '{travel_area}' 지역 또는 대륙 내의 여행지만 추천해야 합니다.**
-            사용자의 주요 여행 선호도는 다음과 같습니다:
-            - 주요 관심사: {preferences_str}
-            - 예산: {body.get("budget", "지정 안함")}
-            위의 선호도를 바탕으로, **'{travel_area}' 내에서** 가장 매력적인 실제 도시나 국가 이름 3곳을 추천해주세요.
-            다른 설명 없이 오직 JSON 형식으로만 응답하세요.
-            반환 형식 예시: {{ "locations": ["추천 여행지 1", "추천 여행지 2", "추천 여행지 3"] }}
-        """
-        model = genai.GenerativeModel("gemini-2.5-flash")
-        response = model.generate_content(prompt)
-        text = response.text.strip()
-        match = re.search(r'\{.*\}', text, re.DOTALL)
-        if not match:
-            raise HTTPException(status_code=500, detail="JSON 형식의 지역 추천을 받는 데 실패했습니다.")
-        return json.loads(match.group())
-    except Exception as e:
-        raise HTTPException(status_code=500, detail=str(e))
+# --- 여러 계획의 내 신청/참가/작성 상태 한 번에 ---
+# 게시판 카드마다 /plans/{id}/applied를 부르지 않도록, 한 페이지의 상태를
+# (plan_id, username)/(username) 인덱스를 타는 UNION ALL 쿼리 하나로 돌려줍니다.
+# 방금 신청한 결과가 바로 보여야 하므로 레플리카가 아니라 primary에서 읽습니다.
+STATUS_MAX_IDS = 100
+
 
+def _status_query(username: str, plan_ids: list):
+    return union_all(
+        select(PlanApplication.plan_id, literal("applied").label("kind"))
+        .where(PlanApplication.username == username, PlanApplication.plan_id.in_(plan_ids)),
+        select(PlanParticipant.plan_id, literal("participant").label("kind"))
+        .where(PlanParticipant.username == username, PlanParticipant.plan_id.in_(plan_ids)),
+        select(Plan.id, literal("owner").label("kind"))
+        .where(Plan.username == username, Plan.id.in_(plan_ids)),
+    )
 
-# plans.py의 recommend 함수를 아래 코드로 통째로 교체하세요.
 
-@router.post("/recommend", tags=["Gemini"])
-async def recommend(data: RecommendRequest):
+def _require_username(request: Request) -> str:
+    username = current_username(request)
+    if not username:
+        raise HTTPException(status_code=401, detail="로그인이 필요합니다.")
+    return username
+
+
+@router.get("/plans/applied-status", tags=["Plans Actions"])
+def get_applied_statuses(
+    request: Request,
+    ids: List[int] = Query(None, description="계획 id 목록 (?ids=1&ids=2)"),
+    cursor: Optional[str] = None,
+    limit: int = Query(20, ge=1, le=STATUS_MAX_IDS),
+    destination: Optional[str] = None,
+    tag: Optional[str] = None,
+    open_only: bool = False,
+    db: Session = Depends(get_db),
+):
+    """
+    ids를 주면 그 계획들의, 없으면 /plans/page와 같은 cursor/limit/필터로 고른 페이지의 상태를 돌려줍니다.
+    (페이지 모드는 next_cursor도 /plans/page와 같게 돌려줍니다)
+    """
+    username = _require_username(request)
+    next_cursor = None
+    if ids:
+        plan_ids = list(dict.fromkeys(ids))
+        if len(plan_ids) > STATUS_MAX_IDS:
+            raise HTTPException(status_code=400, detail=f"ids는 최대 {STATUS_MAX_IDS}개까지 보낼 수 있습니다.")
+    else:
+        rows, next_cursor = page_plans(
+            filter_plans(db.query(Plan.id, Plan.created_at), destination, tag, open_only), cursor, limit
+        )
+        plan_ids = [row.id for row in rows]
+
+    statuses = {plan_id: {"plan_id": plan_id, "applied": False, "participant": False, "owner": False}
+                for plan_id in plan_ids}
+    if plan_ids:
+        for plan_id, kind in db.execute(_status_query(username, plan_ids)):
+            statuses[plan_id][kind] = True
+    return {"items": list(statuses.values()), "next_cursor": next_cursor}
+
+
+# --- 내 신청/내 계획/참가 중인 계획 ---
+# 모두 키셋 페이지네이션입니다. 신청/참가 목록은 username 인덱스(+ PK) 순서대로 id 역순,
+# 내 계획은 (username, created_at, id) 인덱스로 /plans/page와 같은 순서입니다.
+class MyApplication(BaseModel):
+    id: int
+    plan_id: int
+    reason: Optional[str]
+    travel_style: Optional[str]
+    plan: PlanListItem
+
+
+class MyApplicationPage(BaseModel):
+    items: List[MyApplication]
+    next_cursor: Optional[str] = None
+
+
+def _encode_id_cursor(row_id: int) -> str:
+    return base64.urlsafe_b64encode(json.dumps([row_id]).encode()).decode().rstrip("=")
+
+
+def _decode_id_cursor(cursor: str) -> int:
     try:
-        body = data.model_dump()
-        
-        # --- 1. 사용자 요청에서 핵심 정보 추출 ---
+        (row_id,) = json.loads(base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)))
+        return int(row_id)
+    except (ValueError, TypeError):
+        raise HTTPException(status_code=400, detail="잘못된 cursor 값입니다.")
 
-        # ✅ [수정됨] 'travelDuration' 문자열을 분석해 실제 여행 일수 계산
-        trip_duration_days = 3 # 기본값
-        duration_str = data.travelDuration
-        
-        if duration_str:
-            # "n주일" 형태 처리 (예: "1주일", "2주일")
-            week_match = re.search(r'(\d+)\s*주일', duration_str)
-            if week_match:
-                trip_duration_days = int(week_match.group(1)) * 7
-            else:
-                # "n일" 또는 "n박 m일" 형태 처리 (예: "4일", "3박 4일")
-                # '일' 앞의 숫자를 우선적으로 사용합니다.
-                day_match = re.search(r'(\d+)\s*일', duration_str)
-                if day_match:
-                    trip_duration_days = int(day_match.group(1))
-        
-        # (이하 로직은 거의 동일)
-        activity_levels = {
-            "여유롭게": "하루 3~4개",
-            "적당히": "하루 5~6개",
-            "부지런히": "하루 7개 이상"
-        }
-        seasons = ["봄", "여름", "가을", "겨울"]
-        
-        user_activity_level = "적당히"
-        num_activities = activity_levels[user_activity_level]
-        user_season = None
-        other_interests = []
-        
-        for interest in body.get("interests", []):
-            if interest in activity_levels:
-                user_activity_level = interest
-                num_activities = activity_levels[interest]
-            elif interest in seasons:
-                user_season = interest
-            else:
-                other_interests.append(interest)
-        
-        other_preferences_str = ", ".join(other_interests) if other_interests else "특별한 선호 없음"
 
-        # --- 2. AI에게 보낼 프롬프트 (이전과 동일, trip_duration_days 변수만 사용) ---
-        
-        prompt = f"""
+def _page_by_id(db: Session, query, id_column, cursor: Optional[str], limit: int):
+    if cursor:
+        query = query.where(id_column < _decode_id_cursor(cursor))
+    rows = db.execute(query.order_by(id_column.desc()).limit(limit + 1)).all()
+    next_cursor = None
+    if len(rows) > limit:
+        rows = rows[:limit]
+        next_cursor = _encode_id_cursor(rows[-1].row_id)
+    return rows, next_cursor
+
+
+@router.get("/api/me/applications", response_model=MyApplicationPage, tags=["Me"])
+def get_my_applications(
+    request: Request,
+    cursor: Optional[str] = None,
+    limit: int = Query(20, ge=1, le=100),
+    db: Session = Depends(get_db),
+):
+    username = _require_username(request)
+    query = (
+        select(PlanApplication.id.label("row_id"), PlanApplication.reason, PlanApplication.travel_style,
+               *PLAN_LIST_COLUMNS)
+        .join(Plan, Plan.id == PlanApplication.plan_id)
+        .where(PlanApplication.username == username)
+    )
+    rows, next_cursor = _page_by_id(db, query, PlanApplication.id, cursor, limit)
+    items = [
+        {"id": row.row_id, "plan_id": row.id, "reason": row.reason, "travel_style": row.travel_style, "plan": row}
+        for row in rows
+    ]
+    return {"items": items, "next_cursor": next_cursor}
+
+
+@router.get("/api/me/plans", response_model=PlanPage, tags=["Me"])
+def get_my_plans(
+    request: Request,
+    cursor: Optional[str] = None,
+    limit: int = Query(20, ge=1, le=100),
+    db: Session = Depends(get_db),
+):
+    username = _require_username(request)
+    rows, next_cursor = page_plans(db.query(*PLAN_LIST_COLUMNS).filter(Plan.username == username), cursor, limit)
+    return {"items": rows, "next_cursor": next_cursor}
+
+
+@router.get("/api/me/joined", response_model=PlanPage, tags=["Me"])
+def get_my_joined_plans(
+    request: Request,
+    cursor: Optional[str] = None,
+    limit: int = Query(20, ge=1, le=100),
+    db: Session = Depends(get_db),
+):
+    """참가가 확정된 계획 (최근에 참가한 순)"""
+    username = _require_username(request)
+    query = (
+        select(PlanParticipant.id.label("row_id"), *PLAN_LIST_COLUMNS)
+        .join(Plan, Plan.id == PlanParticipant.plan_id)
+        .where(PlanParticipant.username == username)
+    )
+    rows, next_cursor = _page_by_id(db, query, PlanParticipant.id, cursor, limit)
+    return {"items": rows, "next_cursor": next_cursor}
+
+# --- Gemini 응답 캐시 ---
+# 같은 조건의 요청은 Gemini를 다시 부르지 않고 저장된 결과를 돌려줍니다.
+AI_CACHE_TTL = float(os.getenv("AI_CACHE_TTL", str(60 * 60 * 24 * 3)))
+AI_CACHE_MAX_ENTRIES = int(os.getenv("AI_CACHE_MAX_ENTRIES", "5000"))
+
+recommend_cache = PersistentCache("recommend", ttl=AI_CACHE_TTL, max_entries=AI_CACHE_MAX_ENTRIES)
+suggest_cache = PersistentCache("suggest-locations", ttl=AI_CACHE_TTL, max_entries=AI_CACHE_MAX_ENTRIES)
+
+# 동시에 들어온 같은 요청은 Gemini 호출 하나로 합칩니다. (워커 단위)
+recommend_flight = SingleFlight("recommend")
+suggest_flight = SingleFlight("suggest-locations")
+
+ACTIVITY_LEVELS = {
+    "여유롭게": "하루 3~4개",
+    "적당히": "하루 5~6개",
+    "부지런히": "하루 7개 이상"
+}
+SEASONS = ["봄", "여름", "가을", "겨울"]
+
+
+def _normalize(value):
+    return value.strip() if isinstance(value, str) else value
+
+
+def _sorted_unique(values):
+    return sorted({v.strip() for v in values or [] if v and v.strip()})
+
+
+def parse_recommend_request(data: RecommendRequest) -> dict:
+    # --- 사용자 요청에서 핵심 정보 추출 ---
+
+    # ✅ [수정됨] 'travelDuration' 문자열을 분석해 실제 여행 일수 계산
+    trip_duration_days = 3 # 기본값
+    duration_str = data.travelDuration
+    
+    if duration_str:
+        # "n주일" 형태 처리 (예: "1주일", "2주일")
+        week_match = re.search(r'(\d+)\s*주일', duration_str)
+        if week_match:
+            trip_duration_days = int(week_match.group(1)) * 7
+        else:
+            # "n일" 또는 "n박 m일" 형태 처리 (예: "4일", "3박 4일")
+            # '일' 앞의 숫자를 우선적으로 사용합니다.
+            day_match = re.search(r'(\d+)\s*일', duration_str)
+            if day_match:
+                trip_duration_days = int(day_match.group(1))
+
+    user_activity_level = "적당히"
+    user_season = None
+    other_interests = []
+    
+    for interest in data.interests:
+        if interest in ACTIVITY_LEVELS:
+            user_activity_level = interest
+        elif interest in SEASONS:
+            user_season = interest
+        else:
+            other_interests.append(interest)
+
+    return {
+        "location": _normalize(data.selectedLocation),
+        "trip_duration_days": trip_duration_days,
+        "season": user_season,
+        "activity_level": user_activity_level,
+        "interests": _sorted_unique(other_interests),
+    }
+
+
+def recommend_cache_key(parsed: dict, chunked: Optional[bool] = None) -> str:
+    # 키는 프롬프트에 실제로 들어가는 값만으로 만듭니다. (관심사 순서/중복은 결과에 영향 없음)
+    # 분할 생성은 날짜 키("N일차")부터 결과 모양이 다르므로 실제로 쓰일 생성 방식도 키에 넣습니다.
+    return make_key({**parsed, "chunked": use_chunks(parsed, chunked)})
+
+
+def suggest_cache_key(data: RecommendRequest) -> str:
+    return make_key({
+        "travelArea": _normalize(data.travelArea),
+        "preferences": _sorted_unique((data.interests or []) + (data.travelStyle or [])),
+        "budget": _normalize(data.budget),
+    })
+
+
+def build_recommend_prompt(parsed: dict) -> str:
+    location = parsed["location"]
+    trip_duration_days = parsed["trip_duration_days"]
+    user_season = parsed["season"]
+    user_activity_level = parsed["activity_level"]
+    num_activities = ACTIVITY_LEVELS[user_activity_level]
+    other_preferences_str = ", ".join(parsed["interests"]) if parsed["interests"] else "특별한 선호 없음"
+
+    return f"""
             **당신은 실제 지도 앱(구글맵, 네이버맵)으로 검증이 가능한, 매우 꼼꼼한 AI 여행 전문가입니다.**
             **당신의 최우선 임무는 '거짓 없는' 현실적인 여행 계획을 생성하는 것입니다.**
 
@@ -288,7 +727,7 @@ async def recommend(data: RecommendRequest):
             3.  **언어**: 모든 장소의 이름은 반드시 **'한국어'**로 표기하세요. (예: 'Starbucks' -> '스타벅스', 'Eiffel Tower' -> '에펠탑')
             
             **[사용자 맞춤 조건]**
-            1.  **여행지**: '{data.selectedLocation}'
+            1.  **여행지**: '{location}'
             2.  **여행 기간**: 총 **'{trip_duration_days}일'** 동안의 계획을 생성하세요. 날짜 수를 반드시 맞춰야 합니다.
             3.  **계절**: **'{user_season}'**
                 - 이 계절에만 즐길 수 있거나, 이 계절에 가장 매력적인 활동과 장소를 반드시 포함하세요. (예: 여름엔 해수욕장, 가을엔 단풍 명소)
@@ -299,40 +738,477 @@ async def recommend(data: RecommendRequest):
             **[출력 형식]**
             - 위의 모든 규칙과 조건을 완벽하게 반영하여, 아래와 동일한 JSON 구조로만 응답하세요.
             - 다른 설명이나 대답 없이 오직 JSON 데이터만 반환해야 합니다.
-            - 예시: {{ "recommendations": ["{data.selectedLocation}"], "itinerary": {{ "YYYY-MM-DD": [{{ "time": "HH:MM ~ HH:MM", "activity": "..." }}] }} }}
+            - 예시: {{ "recommendations": ["{location}"], "itinerary": {{ "YYYY-MM-DD": [{{ "time": "HH:MM ~ HH:MM", "activity": "..." }}] }} }}
         """
 
-        model = genai.GenerativeModel("gemini-2.5-flash")
-        response = model.generate_content(prompt)
-        text = response.text.strip()
-        
-        match = re.search(r'\{.*\}', text, re.DOTALL)
-        if not match:
-            print("Gemini 응답 (JSON 아님):", text)
-            raise HTTPException(status_code=500, detail=f"Gemini 응답에서 JSON 추출 실패. 응답 내용: {text}")
-            
-        return json.loads(match.group())
-        
+
+def _extract_json(text: str) -> dict:
+    match = re.search(r'\{.*\}', text, re.DOTALL)
+    if not match:
+        print("Gemini 응답 (JSON 아님):", text)
+        raise HTTPException(status_code=500, detail=f"Gemini 응답에서 JSON 추출 실패. 응답 내용: {text}")
+    return json.loads(match.group())
+
+
+async def generate_recommendation(parsed: dict, chunked: Optional[bool] = None) -> dict:
+    if use_chunks(parsed, chunked):
+        return await generate_chunked_recommendation(parsed)
+
+    text = await generate_text(build_recommend_prompt(parsed))
+    return _extract_json(text)
+
+
+# --- 긴 여행 분할 생성 ---
+# 1) 날짜별 방문 지역(뼈대)을 먼저 짧게 만들고, 2) 며칠씩 나눈 일정 블록을 동시에 생성한 뒤,
+# 3) 기존과 같은 {"recommendations", "itinerary"} 형태로 합칩니다. 분할 모드의 날짜 키는 "N일차"입니다.
+CHUNK_MIN_DAYS = int(os.getenv("RECOMMEND_CHUNK_MIN_DAYS", "8"))       # 0이면 자동 분할 끔
+CHUNK_DAYS = int(os.getenv("RECOMMEND_CHUNK_DAYS", "3"))               # 블록 하나에 들어가는 일수
+CHUNK_CONCURRENCY = int(os.getenv("RECOMMEND_CHUNK_CONCURRENCY", "4")) # 요청 하나가 동시에 돌리는 블록 수
+
+
+def use_chunks(parsed: dict, chunked: Optional[bool] = None) -> bool:
+    # chunked가 None이면 여행 일수로 자동 결정합니다.
+    if chunked is None:
+        return 0 < CHUNK_MIN_DAYS <= parsed["trip_duration_days"]
+    return chunked
+
+
+def _day_key(day: int) -> str:
+    return f"{day}일차"
+
+
+async def _generate_skeleton(parsed: dict) -> List[dict]:
+    days = parsed["trip_duration_days"]
+    location = parsed["location"]
+    prompt = f"""
+        당신은 여행 동선을 설계하는 AI 여행 전문가입니다.
+        '{location}' {days}일 여행의 날짜별 방문 지역(도시/동네)과 테마만 정해주세요.
+        - 계절: {parsed["season"]}, 관심사: {", ".join(parsed["interests"]) or "특별한 선호 없음"}
+        - 이동 거리가 짧아지도록 인접한 지역끼리 묶어주세요.
+        - 반드시 {days}개의 항목을 1일차부터 순서대로 만들고, 장소 이름은 한국어로 쓰세요.
+        다른 설명 없이 JSON으로만 응답하세요.
+        예시: {{ "days": [{{ "day": 1, "area": "지역명", "theme": "한 줄 테마" }}] }}
+    """
+    skeleton = _extract_json(await generate_text(prompt)).get("days") or []
+    # 일수가 어긋나면 빈 날을 여행지 전체로 채워서라도 날짜 수를 맞춥니다.
+    by_day = {item.get("day"): item for item in skeleton if isinstance(item, dict)}
+    return [
+        by_day.get(day) or {"day": day, "area": location, "theme": ""}
+        for day in range(1, days + 1)
+    ]
+
+
+def _build_chunk_prompt(parsed: dict, chunk: List[dict], skeleton: List[dict]) -> str:
+    num_activities = ACTIVITY_LEVELS[parsed["activity_level"]]
+    plan_lines = "\n".join(
+        f"            - {_day_key(item['day'])}: {item.get('area')} ({item.get('theme') or '자유'})" for item in chunk
+    )
+    chunk_days = {item["day"] for item in chunk}
+    other_areas = ", ".join(sorted({str(item.get("area")) for item in skeleton if item["day"] not in chunk_days}))
+    keys = ", ".join(f'"{_day_key(item["day"])}"' for item in chunk)
+    return f"""
+            **당신은 실제 지도 앱(구글맵, 네이버맵)으로 검증이 가능한, 매우 꼼꼼한 AI 여행 전문가입니다.**
+            '{parsed["location"]}' 여행 전체 {parsed["trip_duration_days"]}일 중 아래 날짜의 상세 일정만 작성하세요.
+{plan_lines}
+
+            **[규칙]**
+            1.  실제 운영 중이고 검색 가능한 장소만, 한국어 이름으로 추천하세요.
+            2.  계절 '{parsed["season"]}'에 어울리는 활동을 포함하세요.
+            3.  하루 활동 갯수는 반드시 '{num_activities}' 범위로 맞추세요.
+            4.  기타 관심사: {", ".join(parsed["interests"]) or "특별한 선호 없음"}
+            5.  다른 날에 방문하는 지역({other_areas or "없음"})의 장소는 중복해서 넣지 마세요.
+
+            **[출력 형식]**
+            - itinerary의 키는 정확히 {keys} 이어야 합니다.
+            - 다른 설명 없이 JSON으로만 응답하세요.
+            - 예시: {{ "itinerary": {{ "{_day_key(chunk[0]['day'])}": [{{ "time": "HH:MM ~ HH:MM", "activity": "..." }}] }} }}
+        """
+
+
+async def _generate_chunk(parsed: dict, chunk: List[dict], skeleton: List[dict], limiter: asyncio.Semaphore) -> dict:
+    expected = [_day_key(item["day"]) for item in chunk]
+    async with limiter:
+        for _ in range(2):
+            itinerary = _extract_json(await generate_text(_build_chunk_prompt(parsed, chunk, skeleton))).get("itinerary") or {}
+            if set(itinerary) == set(expected):
+                return {key: itinerary[key] for key in expected}
+            if len(itinerary) == len(expected):
+                # 키 이름만 틀린 경우 순서대로 다시 붙입니다.
+                return dict(zip(expected, itinerary.values()))
+    raise HTTPException(status_code=500, detail=f"{expected[0]}~{expected[-1]} 일정 생성 결과의 날짜 수가 맞지 않습니다.")
+
+
+async def generate_chunked_recommendation(parsed: dict) -> dict:
+    skeleton = await _generate_skeleton(parsed)
+    chunks = [skeleton[i:i + CHUNK_DAYS] for i in range(0, len(skeleton), CHUNK_DAYS)]
+    limiter = asyncio.Semaphore(CHUNK_CONCURRENCY)
+    tasks = [asyncio.ensure_future(_generate_chunk(parsed, chunk, skeleton, limiter)) for chunk in chunks]
+    try:
+        blocks = await asyncio.gather(*tasks)
+    except BaseException:
+        # 한 블록이라도 실패하면 결과를 쓸 수 없으므로 남은 블록의 Gemini 호출을 바로 취소합니다.
+        for task in tasks:
+            task.cancel()
+        raise
+
+    itinerary = {}
+    for block in blocks:
+        itinerary.update(block)
+    if len(itinerary) != parsed["trip_duration_days"]:
+        raise HTTPException(status_code=500, detail="일정 병합 결과의 날짜 수가 맞지 않습니다.")
+    return {"recommendations": [parsed["location"]], "itinerary": itinerary}
+
+
+async def _generate_and_cache_recommendation(parsed: dict, key: str, chunked: Optional[bool] = None) -> dict:
+    started = time.perf_counter()
+    result = await generate_recommendation(parsed, chunked=chunked)
+    await recommend_cache.set_async(key, result, cost_ms=(time.perf_counter() - started) * 1000)
+    return result
+
+
+async def get_recommendation(data: RecommendRequest) -> dict:
+    parsed = parse_recommend_request(data)
+    key = recommend_cache_key(parsed, data.chunked)
+    cached = await recommend_cache.get_async(key)
+    if cached is not None:
+        return cached
+
+    # 같은 요청이 이미 생성 중이면 그 결과를 함께 기다립니다.
+    return await recommend_flight.do(key, lambda: _generate_and_cache_recommendation(parsed, key, data.chunked))
+
+
+@router.post("/suggest-locations", response_model=SuggestResponse, tags=["Gemini"])
+async def suggest_locations(data: RecommendRequest):
+    try:
+        body = data.model_dump()
+        travel_area = body.get("travelArea")
+        if not travel_area:
+            raise HTTPException(status_code=400, detail="여행 지역 정보가 누락되었습니다.")
+
+        key = suggest_cache_key(data)
+        cached = await suggest_cache.get_async(key)
+        if cached is not None:
+            return cached
+        return await suggest_flight.do(key, lambda: _generate_suggestion(body, key))
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+
+async def _generate_suggestion(body: dict, key: str) -> dict:
+    travel_area = body.get("travelArea")
+    preferences = body.get("interests", []) + body.get("travelStyle", [])
+    preferences_str = ", ".join(filter(None, set(preferences))) or "특별한 선호 없음"
+
+    prompt = f"""
+        **당신은 지정된 지역 내에서만 여행지를 추천하는 AI 여행 전문가입니다.**
+        **가장 중요한 절대 규칙: 반드시 '{travel_area}' 지역 또는 대륙 내의 여행지만 추천해야 합니다.**
+        사용자의 주요 여행 선호도는 다음과 같습니다:
+        - 주요 관심사: {preferences_str}
+        - 예산: {body.get("budget", "지정 안함")}
+        위의 선호도를 바탕으로, **'{travel_area}' 내에서** 가장 매력적인 실제 도시나 국가 이름 3곳을 추천해주세요.
+        다른 설명 없이 오직 JSON 형식으로만 응답하세요.
+        반환 형식 예시: {{ "locations": ["추천 여행지 1", "추천 여행지 2", "추천 여행지 3"] }}
+    """
+    started = time.perf_counter()
+    text = await generate_text(prompt)
+    match = re.search(r'\{.*\}', text, re.DOTALL)
+    if not match:
+        raise HTTPException(status_code=500, detail="JSON 형식의 지역 추천을 받는 데 실패했습니다.")
+    result = json.loads(match.group())
+    await suggest_cache.set_async(key, result, cost_ms=(time.perf_counter() - started) * 1000)
+    return result
+
+
+@router.post("/recommend", tags=["Gemini"])
+async def recommend(data: RecommendRequest):
+    try:
+        return await get_recommendation(data)
+    except HTTPException:
+        raise
     except Exception as e:
         print(f"Error in /recommend: {e}")
         raise HTTPException(status_code=500, detail=f"Gemini 호출 실패: {str(e)}")
 
+
+# --- SSE 스트리밍 일정 생성 ---
+SSE_HEARTBEAT_SECONDS = float(os.getenv("SSE_HEARTBEAT_SECONDS", "10"))
+
+
+def _sse(event: str, data) -> str:
+    return f"event: {event}\ndata: {json.dumps(data, ensure_ascii=False)}\n\n"
+
+
+async def _with_heartbeat(stream):
+    # Gemini가 한동안 조용해도 연결이 유휴 상태로 끊기지 않도록 주기적으로 None(=ping)을 끼워 넣습니다.
+    iterator = stream.__aiter__()
+    pending = None
+    try:
+        while True:
+            if pending is None:
+                pending = asyncio.ensure_future(iterator.__anext__())
+            done, _ = await asyncio.wait({pending}, timeout=SSE_HEARTBEAT_SECONDS)
+            if not done:
+                yield None
+                continue
+            try:
+                item = pending.result()
+            except StopAsyncIteration:
+                return
+            finally:
+                pending = None
+            yield item
+    finally:
+        if pending is not None:
+            # 진행 중인 __anext__를 취소하고 끝날 때까지 기다려야 aclose()가
+            # "asynchronous generator is already running" 오류 없이 스트림을 닫습니다.
+            pending.cancel()
+            with contextlib.suppress(asyncio.CancelledError, Exception):
+                await pending
+        await iterator.aclose()
+
+
+async def _recommend_events(data: RecommendRequest):
+    # 스트리밍은 항상 프롬프트 하나로 생성하므로 분할 생성 결과와 캐시를 나눠 씁니다.
+    parsed = parse_recommend_request(data)
+    key = recommend_cache_key(parsed, chunked=False)
+    cached = await recommend_cache.get_async(key)
+    if cached is not None:
+        if "recommendations" in cached:
+            yield _sse("recommendations", cached["recommendations"])
+        for date, activities in (cached.get("itinerary") or {}).items():
+            yield _sse("day", {"date": date, "activities": activities})
+        yield _sse("done", cached)
+        return
+
+    started = time.perf_counter()
+    parser = ItineraryStreamParser()
+    result = None
+    try:
+        async for chunk in _with_heartbeat(stream_text(build_recommend_prompt(parsed))):
+            if chunk is None:
+                yield ": keep-alive\n\n"
+                continue
+            for event, value in parser.feed(chunk):
+                if event == "day":
+                    ((date, activities),) = value.items()
+                    yield _sse("day", {"date": date, "activities": activities})
+                elif event == "recommendations":
+                    yield _sse("recommendations", value)
+                else:
+                    result = value
+
+        if result is None:
+            # 스트림 파싱이 끝나지 않았다면 기존 방식대로 전체 텍스트에서 한 번 더 추출해 봅니다.
+            match = re.search(r'\{.*\}', parser.text, re.DOTALL)
+            if not match:
+                raise HTTPException(status_code=500, detail="Gemini 응답에서 JSON 추출 실패")
+            result = json.loads(match.group())
+    except HTTPException as e:
+        yield _sse("error", {"status": e.status_code, "detail": e.detail})
+        return
+    except Exception as e:
+        print(f"Error in /recommend/stream: {e}")
+        yield _sse("error", {"status": 500, "detail": f"Gemini 호출 실패: {str(e)}"})
+        return
+
+    await recommend_cache.set_async(key, result, cost_ms=(time.perf_counter() - started) * 1000)
+    yield _sse("done", result)
+
+
+@router.post("/recommend/stream", tags=["Gemini"])
+async def recommend_stream(data: RecommendRequest):
+    # 하루치 일정이 완성될 때마다 `event: day`로 내려보내고, 마지막에 `event: done`으로 전체 결과를 보냅니다.
+    return StreamingResponse(
+        _recommend_events(data),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
+# --- 백그라운드 일정 생성 작업 ---
+# 긴 일정 생성은 작업으로 접수하고 job_id로 상태/결과를 조회합니다. (연결이 끊겨도 생성 결과는 남습니다)
+JOB_WORKERS = int(os.getenv("RECOMMEND_JOB_WORKERS", "4"))
+JOB_MAX_QUEUE = int(os.getenv("RECOMMEND_JOB_MAX_QUEUE", "100"))
+JOB_RESULT_TTL = float(os.getenv("RECOMMEND_JOB_RESULT_TTL", str(60 * 60 * 24)))
+JOB_TIMEOUT = float(os.getenv("RECOMMEND_JOB_TIMEOUT", "600"))
+JOB_POLL_SECONDS = 1.0
+
+
+async def _run_recommend_job(payload: dict) -> dict:
+    return await get_recommendation(RecommendRequest(**payload))
+
+
+recommend_jobs = JobQueue(
+    "recommend", _run_recommend_job,
+    workers=JOB_WORKERS, max_queue=JOB_MAX_QUEUE, result_ttl=JOB_RESULT_TTL, timeout=JOB_TIMEOUT,
+)
+
+
+@router.on_event("startup")
+async def start_recommend_jobs():
+    recommend_jobs.start()
+
+
+@router.on_event("shutdown")
+async def stop_recommend_jobs():
+    await recommend_jobs.stop()
+
+
+@router.post("/recommend/jobs", status_code=202, tags=["Gemini"])
+async def submit_recommend_job(data: RecommendRequest, priority: int = 0):
+    # 같은 조건(정규화된 요청)의 작업이 이미 있으면 새로 만들지 않고 기존 job_id를 돌려줍니다.
+    dedup_key = recommend_cache_key(parse_recommend_request(data), data.chunked)
+    job, created = recommend_jobs.submit(data.model_dump(), dedup_key=dedup_key, priority=priority)
+    return {"job_id": job["job_id"], "status": job["status"], "created": created}
+
+
+@router.get("/recommend/jobs/{job_id}", tags=["Gemini"])
+def get_recommend_job(job_id: str):
+    job = recommend_jobs.get(job_id)
+    if not job:
+        raise HTTPException(status_code=404, detail="작업을 찾을 수 없습니다.")
+    return job
+
+
+async def _job_events(job_id: str):
+    last_status = None
+    idle = 0.0
+    while True:
+        job = recommend_jobs.get(job_id)
+        if not job:
+            yield _sse("error", {"status": 404, "detail": "작업을 찾을 수 없습니다."})
+            return
+        if job["status"] != last_status:
+            last_status = job["status"]
+            idle = 0.0
+            yield _sse(job["status"], job)
+            if job["status"] in ("done", "failed"):
+                return
+        elif idle >= SSE_HEARTBEAT_SECONDS:
+            idle = 0.0
+            yield ": keep-alive\n\n"
+        await asyncio.sleep(JOB_POLL_SECONDS)
+        idle += JOB_POLL_SECONDS
+
+
+@router.get("/recommend/jobs/{job_id}/events", tags=["Gemini"])
+async def stream_recommend_job(job_id: str):
+    # 상태가 바뀔 때마다 `event: queued|running|done|failed`로 작업 정보를 내려보냅니다.
+    return StreamingResponse(
+        _job_events(job_id),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
+@router.get("/gemini/stats", tags=["Gemini"], dependencies=[Depends(require_admin)])
+def gemini_stats():
+    # 캐시 적중률, 절약된 Gemini 대기 시간(초), 합쳐진 동시 요청 수를 확인하는 운영용 엔드포인트
+    return {
+        "cache": {
+            "recommend": recommend_cache.stats(),
+            "suggest-locations": suggest_cache.stats(),
+        },
+        "singleflight": singleflight.stats(),
+        "jobs": {"recommend": recommend_jobs.stats()},
+    }
+
+# --- 계획 Q&A 컨텍스트 캐시 ---
+# plan_id로 질문하면 계획을 공백 없는 요약 JSON으로 한 번만 만들어 두고 여러 질문에 재사용합니다.
+# 요약이 충분히 길면 Gemini 컨텍스트 캐시에 올려서 질문마다 계획을 다시 보내지 않습니다.
+# (update_plan/delete_plan에서 무효화, 다른 워커의 수정은 PLAN_DIGEST_TTL 안에 반영)
+PLAN_DIGEST_TTL = float(os.getenv("PLAN_DIGEST_TTL", "600"))
+CONTEXT_CACHE_MIN_TOKENS = int(os.getenv("GEMINI_CONTEXT_CACHE_MIN_TOKENS", "2048"))
+# Gemini 쪽 캐시는 로컬 항목보다 PLAN_CONTEXT_CACHE_MARGIN초 더 살려 둬서, 로컬에서 꺼낸 모델이 호출 도중 만료되지 않게 합니다.
+PLAN_CONTEXT_CACHE_MARGIN = float(os.getenv("PLAN_CONTEXT_CACHE_MARGIN", "120"))
+PLAN_CONTEXT_MAX_ENTRIES = int(os.getenv("PLAN_CONTEXT_MAX_ENTRIES", "1000"))
+PLAN_QA_INSTRUCTION = "사용자가 아래 여행 계획을 참고하여 질문합니다. 계획 정보를 바탕으로 친절하고 간결하게 답변해주세요."
+
+_plan_contexts = TTLCache(maxsize=PLAN_CONTEXT_MAX_ENTRIES, ttl=PLAN_DIGEST_TTL)
+
+
+def plan_digest(plan: Plan) -> str:
+    return json.dumps(
+        {
+            "title": plan.title,
+            "destination": plan.destination,
+            "date": plan.date,
+            "summary": plan.summary,
+            "tags": plan.tags,
+            "participants": plan.participants,
+            "capacity": plan.capacity,
+            "itinerary": plan.itinerary,
+        },
+        ensure_ascii=False,
+        separators=(",", ":"),
+    )
+
+
+def invalidate_plan_context(plan_id: int):
+    _plan_contexts.pop(plan_id, None)
+
+
+def _load_plan_digest(plan_id: int) -> Optional[str]:
+    # Gemini를 기다리는 동안 DB 연결을 잡고 있지 않도록 다이제스트만 만들고 세션을 바로 닫습니다.
+    with read_session() as db:
+        plan = db.get(Plan, plan_id)
+        return plan_digest(plan) if plan else None
+
+
+async def _get_plan_context(plan_id: int) -> dict:
+    context = _plan_contexts.get(plan_id)
+    if context:
+        return context
+
+    digest = await run_in_threadpool(_load_plan_digest, plan_id)
+    if digest is None:
+        raise HTTPException(status_code=404, detail="Plan not found")
+    model = None
+    # 한국어 기준 대략 글자 2~3개가 토큰 1개이므로 보수적으로 3으로 나눠 추정합니다.
+    if CONTEXT_CACHE_MIN_TOKENS and len(digest) // 3 >= CONTEXT_CACHE_MIN_TOKENS:
+        model = await create_cached_model(
+            [f"여행 계획: {digest}"], ttl_seconds=PLAN_DIGEST_TTL + PLAN_CONTEXT_CACHE_MARGIN,
+            system_instruction=PLAN_QA_INSTRUCTION,
+        )
+    context = {"digest": digest, "model": model}
+    _plan_contexts[plan_id] = context
+    return context
+
+
 @router.post("/ask-plan", tags=["Gemini"])
 async def ask_about_plan(payload: dict = Body(...)):
     question = payload.get("question")
+    plan_id = payload.get("plan_id")
     plan = payload.get("plan")
-    if not question or not plan:
+    if not question or not (plan_id or plan):
         raise HTTPException(status_code=400, detail="질문 또는 계획 정보가 없습니다.")
+    if plan_id:
+        try:
+            plan_id = int(plan_id)
+        except (TypeError, ValueError):
+            raise HTTPException(status_code=400, detail="plan_id는 숫자여야 합니다.")
 
-    prompt = f"""
-    사용자가 아래 여행 계획을 참고하여 질문을 했습니다.
-    여행 계획: {json.dumps(plan, ensure_ascii=False, indent=2)}
+    try:
+        model = None
+        if plan_id:
+            context = await _get_plan_context(plan_id)
+            digest, model = context["digest"], context["model"]
+        else:
+            digest = json.dumps(plan, ensure_ascii=False, separators=(",", ":"))
+
+        if model is not None:
+            prompt = f"사용자 질문: {question}"
+        else:
+            prompt = f"""
+    {PLAN_QA_INSTRUCTION}
+    여행 계획: {digest}
     사용자 질문: {question}
-    위 정보를 바탕으로 친절하고 간결하게 답변해주세요.
     """
-    try:
-        model = genai.GenerativeModel("gemini-2.5-flash")
-        response = model.generate_content(prompt)
-        return {"answer": response.text.strip()}
+        response = await generate_content(prompt, model=model)
+        return {"answer": response.text.strip(), "usage": usage_of(response)}
+    except HTTPException:
+        raise
     except Exception as e:
-        raise HTTPException(status_code=500, detail=f"Gemini 호출 실패: {str(e)}")
\ No newline at end of file
+        raise HTTPException(status_code=500, detail=f"Gemini 호출 실패: {str(e)}")
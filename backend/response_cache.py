@@ -0,0 +1,132 @@
+# response_cache.py
+
+import asyncio
+import os
+import uuid
+
+from cachetools import TTLCache
+
+from cache import PersistentCache
+from singleflight import SingleFlight
+
+# --- 2단계 읽기 캐시 ---
+# 1단계: 워커 메모리 (아주 짧은 TTL, 같은 워커의 반복 조회는 아무 I/O 없이 처리)
+# 2단계: 워커끼리 공유하는 캐시 (기본은 로컬 SQLite 파일, RESPONSE_CACHE_SHARED=none이면 끔)
+#   공유 단계는 get/set/delete 세 메서드만 있으면 되므로 Redis 같은 외부 캐시로 바꿔 끼울 수 있습니다.
+# 무효화는 두 단계 모두에서 지우지만, 다른 워커의 1단계에는 최대 local_ttl 동안 이전 값이 남을 수 있습니다.
+# 공유 단계(SQLite 파일, 외부 캐시)는 I/O라 비동기 경로에서는 스레드에서 부릅니다. (이벤트 루프를 막지 않도록)
+# 로드 중 무효화: 같은 워커는 _generations로, 다른 워커의 무효화는 공유 단계의 무효화 토큰으로 알아챕니다.
+#   (무효화할 때마다 토큰을 새로 쓰고, 로드 전후 토큰이 다르면 공유 단계에 저장하지 않음)
+RESPONSE_CACHE_SHARED = os.getenv("RESPONSE_CACHE_SHARED", "sqlite")
+RESPONSE_CACHE_MAX_ENTRIES = int(os.getenv("RESPONSE_CACHE_MAX_ENTRIES", "5000"))
+
+
+class SQLiteSharedTier:
+    """공유 단계의 로컬 대체 구현 (cache.py의 SQLite 캐시를 그대로 사용)"""
+
+    def __init__(self, namespace: str, ttl: float):
+        self._cache = PersistentCache(namespace, ttl=ttl, max_entries=RESPONSE_CACHE_MAX_ENTRIES)
+
+    def get(self, key):
+        return self._cache.get(key)
+
+    def set(self, key, value):
+        self._cache.set(key, value)
+
+    def delete(self, key):
+        self._cache.delete(key)
+
+    def stats(self) -> dict:
+        return self._cache.stats()
+
+
+def make_shared_tier(namespace: str, ttl: float):
+    if RESPONSE_CACHE_SHARED == "none":
+        return None
+    if RESPONSE_CACHE_SHARED == "sqlite":
+        return SQLiteSharedTier(namespace, ttl)
+    raise ValueError(f"지원하지 않는 RESPONSE_CACHE_SHARED 값입니다: {RESPONSE_CACHE_SHARED}")
+
+
+def _token_key(key) -> str:
+    return f"invalidated:{key}"
+
+
+class TieredCache:
+    def __init__(self, name: str, local_ttl: float, shared_ttl: float, max_local: int = 1000):
+        self.name = name
+        self._local = TTLCache(maxsize=max_local, ttl=local_ttl)
+        self._shared = make_shared_tier(name, shared_ttl)
+        self._flight = SingleFlight(f"cache:{name}")
+        self._generations = {}  # 로드 중인 키만: key -> 로드 중 무효화 횟수 (키마다 로드는 SingleFlight로 하나)
+        self.local_hits = 0
+        self.shared_hits = 0
+        self.loads = 0
+
+    async def get_or_load(self, key, loader):
+        """캐시에 있으면 돌려주고, 없으면 loader()로 만들어 두 단계에 저장합니다. (동시 요청은 한 번만 로드)"""
+        value = self._local.get(key)
+        if value is not None:
+            self.local_hits += 1
+            return value
+        return await self._flight.do(key, lambda: self._load(key, loader))
+
+    async def _load(self, key, loader):
+        if self._shared is not None:
+            value = await asyncio.to_thread(self._shared.get, key)
+            if value is not None:
+                self.shared_hits += 1
+                self._local[key] = value
+                return value
+
+        self._generations[key] = 0
+        self.loads += 1
+        token = await asyncio.to_thread(self._shared.get, _token_key(key)) if self._shared is not None else None
+        try:
+            value = await loader()
+            # 로드하는 동안 무효화됐다면 이전 값일 수 있으므로 저장하지 않습니다.
+            if value is not None and self._generations[key] == 0:
+                self._local[key] = value
+                if self._shared is not None:
+                    await asyncio.to_thread(self._store_shared, key, value, token)
+            return value
+        finally:
+            # 로드가 끝난 키는 지워서, 한 번이라도 무효화된 키가 계속 쌓이지 않게 합니다.
+            self._generations.pop(key, None)
+
+    def _store_shared(self, key, value, token):
+        # 다른 워커가 로드 중에 무효화했으면 토큰이 바뀌어 있으므로 저장하지 않습니다.
+        # 확인과 저장 사이에 무효화가 끼어들 수 있어, 저장한 뒤 토큰을 한 번 더 보고 바뀌었으면 지웁니다.
+        if self._shared.get(_token_key(key)) != token:
+            return
+        self._shared.set(key, value)
+        if self._shared.get(_token_key(key)) != token:
+            self._shared.delete(key)
+
+    def delete(self, key):
+        if key in self._generations:
+            self._generations[key] += 1
+        self._local.pop(key, None)
+        if self._shared is not None:
+            self._shared.set(_token_key(key), uuid.uuid4().hex)
+            self._shared.delete(key)
+
+    def stats(self) -> dict:
+        return {
+            "local_entries": len(self._local),
+            "local_hits": self.local_hits,
+            "shared_hits": self.shared_hits,
+            "loads": self.loads,
+            "shared": self._shared.stats() if self._shared is not None else None,
+        }
+
+
+# --- HTTP 조건부 요청 ---
+def etag_matches(if_none_match: str, etag: str) -> bool:
+    if not if_none_match:
+        return False
+    if if_none_match.strip() == "*":
+        return True
+    # 약한 비교: W/ 접두어는 무시합니다.
+    opaque = etag.removeprefix("W/")
+    return any(tag.strip().removeprefix("W/") == opaque for tag in if_none_match.split(","))
@@ -0,0 +1,243 @@
+# search_index.py
+
+import os
+import re
+import unicodedata
+from collections import Counter
+
+from sqlalchemy import and_, delete, func, insert, or_, select
+from sqlalchemy.orm import Session, aliased, load_only
+
+from models import Plan, PlanSearchTerm, UserSearchGram
+
+# --- 계획 전문 검색 역색인 ---
+# 한국어는 띄어쓰기/조사 때문에 단어 단위로는 잘 안 맞으므로 2글자(bigram) 단위로 색인하고,
+# 영문/숫자는 단어 단위로 색인합니다. 검색어의 모든 토큰을 포함한 계획을 가중치 합으로 정렬합니다.
+# create_plan/update_plan/delete_plan이 같은 트랜잭션 안에서 index_plan/unindex_plan을 호출합니다.
+FIELD_WEIGHTS = {"title": 5, "destination": 4, "tags": 3, "summary": 2, "itinerary": 1}
+MAX_TERM_WEIGHT = 50
+MAX_TERM_LENGTH = 64
+
+# 검색은 가장 드문 토큰의 posting을 후보로 잡고, 나머지 토큰은 후보마다 PK로 확인합니다.
+# ("서울", "여행"처럼 수십만 계획에 있는 토큰을 GROUP BY로 다 모으지 않음)
+# 가장 드문 토큰도 SEARCH_CANDIDATE_CAP개보다 많으면 그 토큰의 가중치가 높은 상위 SEARCH_CANDIDATE_CAP개만
+# 후보로 쓰므로, 흔한 토큰끼리의 검색은 근사 결과입니다. (토큰이 하나인 검색은 인덱스 순서대로 읽어 항상 정확)
+SEARCH_CANDIDATE_CAP = int(os.getenv("SEARCH_CANDIDATE_CAP", "5000"))
+
+_WORD = re.compile(r"\w+")
+_HANGUL = re.compile(r"[가-힣]")
+
+
+def escape_like(value: str) -> str:
+    """사용자 입력의 \\, %, _가 LIKE에서 글자 그대로 맞도록 이스케이프합니다. (escape="\\\\"와 함께 사용)"""
+    return value.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+
+
+def tokenize(text: str) -> list:
+    if not text:
+        return []
+    text = unicodedata.normalize("NFKC", text).lower()
+    tokens = []
+    for word in _WORD.findall(text):
+        if _HANGUL.search(word) and len(word) > 1:
+            tokens.extend(word[i:i + 2] for i in range(len(word) - 1))
+        else:
+            tokens.append(word[:MAX_TERM_LENGTH])
+    return tokens
+
+
+def _itinerary_text(itinerary) -> str:
+    if not isinstance(itinerary, dict):
+        return ""
+    parts = []
+    for activities in itinerary.values():
+        for item in activities if isinstance(activities, list) else []:
+            if isinstance(item, dict) and item.get("activity"):
+                parts.append(str(item["activity"]))
+    return " ".join(parts)
+
+
+def plan_terms(plan: Plan) -> dict:
+    weights = Counter()
+    fields = {
+        "title": plan.title,
+        "destination": plan.destination,
+        "tags": plan.tags,
+        "summary": plan.summary,
+        "itinerary": _itinerary_text(plan.itinerary),
+    }
+    for field, value in fields.items():
+        for term in tokenize(value):
+            weights[term] += FIELD_WEIGHTS[field]
+    return {term: min(weight, MAX_TERM_WEIGHT) for term, weight in weights.items()}
+
+
+def unindex_plan(db: Session, plan_id: int):
+    db.execute(delete(PlanSearchTerm).where(PlanSearchTerm.plan_id == plan_id))
+
+
+def index_plan(db: Session, plan: Plan):
+    # plan.id가 필요하므로 새 계획은 flush 이후에 호출해야 합니다.
+    unindex_plan(db, plan.id)
+    rows = [{"term": term, "plan_id": plan.id, "weight": weight} for term, weight in plan_terms(plan).items()]
+    if rows:
+        db.execute(insert(PlanSearchTerm), rows)
+
+
+def _document_count(db: Session, term: str, cap: int) -> int:
+    """term이 있는 계획 수 (cap + 1에서 세기를 멈춤)"""
+    postings = select(PlanSearchTerm.plan_id).where(PlanSearchTerm.term == term).limit(cap + 1).subquery()
+    return db.scalar(select(func.count()).select_from(postings))
+
+
+def _top_postings(db: Session, term: str, limit: int, after=None) -> list:
+    """(term, weight, plan_id) 인덱스 순서대로 가중치 높은 [(plan_id, weight)]"""
+    stmt = select(PlanSearchTerm.plan_id, PlanSearchTerm.weight).where(PlanSearchTerm.term == term)
+    if after:
+        last_score, last_id = after
+        stmt = stmt.where(or_(
+            PlanSearchTerm.weight < last_score,
+            and_(PlanSearchTerm.weight == last_score, PlanSearchTerm.plan_id < last_id),
+        ))
+    stmt = stmt.order_by(PlanSearchTerm.weight.desc(), PlanSearchTerm.plan_id.desc()).limit(limit)
+    return [(row.plan_id, row.weight) for row in db.execute(stmt)]
+
+
+def search_plan_ids(db: Session, query: str, limit: int, after=None) -> list:
+    """[(plan_id, score)]를 점수 내림차순으로 돌려줍니다. after=(score, plan_id)는 이전 페이지의 마지막 항목."""
+    terms = sorted(set(tokenize(query)))
+    if not terms:
+        return []
+    if len(terms) == 1:
+        return _top_postings(db, terms[0], limit, after=after)
+
+    counts = {term: _document_count(db, term, SEARCH_CANDIDATE_CAP) for term in terms}
+    rarest, *others = sorted(terms, key=lambda term: (counts[term], term))
+    if not counts[rarest]:
+        return []
+    # 가장 드문 토큰의 posting(가중치 상위 SEARCH_CANDIDATE_CAP개)을 후보로 두고,
+    # 나머지 토큰은 후보마다 (term, plan_id) PK로 조인해서 DB 안에서 교집합/점수를 계산합니다.
+    candidates = (
+        select(PlanSearchTerm.plan_id, PlanSearchTerm.weight)
+        .where(PlanSearchTerm.term == rarest)
+        .order_by(PlanSearchTerm.weight.desc(), PlanSearchTerm.plan_id.desc())
+        .limit(SEARCH_CANDIDATE_CAP)
+        .subquery("candidates")
+    )
+    joined, score = candidates, candidates.c.weight
+    for term in others:
+        posting = aliased(PlanSearchTerm)
+        joined = joined.join(posting, and_(posting.term == term, posting.plan_id == candidates.c.plan_id))
+        score = score + posting.weight
+    stmt = select(candidates.c.plan_id, score.label("score")).select_from(joined)
+    if after:
+        last_score, last_id = after
+        stmt = stmt.where(or_(score < last_score, and_(score == last_score, candidates.c.plan_id < last_id)))
+    stmt = stmt.order_by(score.desc(), candidates.c.plan_id.desc()).limit(limit)
+    return [(row.plan_id, int(row.score)) for row in db.execute(stmt)]
+
+
+# 색인에 쓰는 컬럼만 읽습니다. (마이그레이션 002는 plans.revision 등 나중 마이그레이션의 컬럼이 아직 없는 DB에서도 돌아야 함)
+INDEXED_PLAN_COLUMNS = (Plan.id, Plan.title, Plan.destination, Plan.tags, Plan.summary, Plan.itinerary)
+
+
+def rebuild_index(db: Session, batch_size: int = 500) -> int:
+    """기존 계획 전체를 다시 색인합니다. (마이그레이션/복구용)"""
+    count = 0
+    last_id = 0
+    while True:
+        plans = (
+            db.query(Plan).options(load_only(*INDEXED_PLAN_COLUMNS))
+            .filter(Plan.id > last_id).order_by(Plan.id).limit(batch_size).all()
+        )
+        if not plans:
+            return count
+        for plan in plans:
+            index_plan(db, plan)
+        last_id = plans[-1].id  # commit 뒤에 읽으면 만료된 객체를 전체 컬럼으로 다시 읽으므로 먼저 꺼냅니다.
+        db.commit()
+        count += len(plans)
+
+
+# --- 관리자 사용자 검색 bigram/trigram 색인 ---
+# username/email 중간 조각 검색("%abc%")도 인덱스로 후보를 좁힐 수 있도록 2글자/3글자 조각을 색인합니다.
+# 3글자 이상 검색어는 trigram 전부, 2글자 검색어는 그 bigram 하나로 후보를 찾고,
+# 1글자 검색어는 대부분의 사용자와 맞아 색인이 도움이 안 되므로 후보 없이 부분 일치로만 찾습니다.
+# 계획 검색처럼 가장 드문 조각의 posting을 후보로 잡고 나머지 조각은 (gram, user_id) PK로 확인합니다.
+# 결과가 정확해야 하므로 후보를 자르지 않고, 가장 드문 조각도 USER_CANDIDATE_CAP명보다 많으면
+# (검색어가 흔해서 정렬 순서대로 읽어도 금방 limit이 차는 경우) 색인 없이 부분 일치로만 찾습니다.
+USER_CANDIDATE_CAP = int(os.getenv("USER_CANDIDATE_CAP", "5000"))
+
+
+def trigrams(text: str) -> set:
+    text = (text or "").lower()
+    return {text[i:i + 3] for i in range(len(text) - 2)}
+
+
+def user_grams(text: str) -> set:
+    text = (text or "").lower()
+    return {text[i:i + 2] for i in range(len(text) - 1)} | trigrams(text)
+
+
+def query_grams(query: str) -> set:
+    query = (query or "").lower()
+    return trigrams(query) if len(query) >= 3 else user_grams(query)
+
+
+def unindex_users(db: Session, user_ids: list):
+    if user_ids:
+        db.execute(delete(UserSearchGram).where(UserSearchGram.user_id.in_(user_ids)))
+
+
+def index_users(db: Session, users: list):
+    """users: id, username, email 속성을 가진 객체 목록 (id가 채워진 뒤 호출)"""
+    unindex_users(db, [user.id for user in users])
+    rows = [
+        {"gram": gram, "user_id": user.id}
+        for user in users
+        for gram in user_grams(user.username) | user_grams(user.email)
+    ]
+    if rows:
+        db.execute(insert(UserSearchGram), rows)
+
+
+def _gram_user_count(db: Session, gram: str, cap: int) -> int:
+    """gram이 있는 사용자 수 (cap + 1에서 세기를 멈춤)"""
+    postings = select(UserSearchGram.user_id).where(UserSearchGram.gram == gram).limit(cap + 1).subquery()
+    return db.scalar(select(func.count()).select_from(postings))
+
+
+def user_candidates(db: Session, query: str):
+    """
+    검색어의 조각(trigram, 2글자면 bigram)을 모두 가진 user_id 서브쿼리.
+    1글자 이하이거나 가장 드문 조각도 USER_CANDIDATE_CAP명보다 많으면 None (색인으로 좁히지 않음)
+    """
+    grams = sorted(query_grams(query))
+    if not grams:
+        return None
+    counts = {gram: _gram_user_count(db, gram, USER_CANDIDATE_CAP) for gram in grams}
+    rarest, *others = sorted(grams, key=lambda gram: (counts[gram], gram))
+    if counts[rarest] > USER_CANDIDATE_CAP:
+        return None
+    candidates = select(UserSearchGram.user_id).where(UserSearchGram.gram == rarest).subquery("candidates")
+    joined = candidates
+    for gram in others:
+        posting = aliased(UserSearchGram)
+        joined = joined.join(posting, and_(posting.gram == gram, posting.user_id == candidates.c.user_id))
+    return select(candidates.c.user_id).select_from(joined)
+
+
+def rebuild_user_index(db: Session, user_model, batch_size: int = 1000) -> int:
+    count = 0
+    last_id = 0
+    while True:
+        users = (
+            db.query(user_model.id, user_model.username, user_model.email)
+            .filter(user_model.id > last_id).order_by(user_model.id).limit(batch_size).all()
+        )
+        if not users:
+            return count
+        index_users(db, users)
+        db.commit()
+        count += len(users)
+        last_id = users[-1].id
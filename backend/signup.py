@@ -1,10 +1,12 @@
 from fastapi import APIRouter, Depends, HTTPException
 from fastapi.responses import JSONResponse
 from pydantic import BaseModel
+from fastapi.concurrency import run_in_threadpool
 from sqlalchemy.orm import Session
 from database import get_db      # 👈 수정된 부분 1
 from models import UserModel     # 👈 수정된 부분 2
-from utils import hash_password
+from utils import hash_password_async
+from search_index import index_users
 from typing import Optional
 
 
@@ -21,29 +23,38 @@ class User(BaseModel):
     contact: Contact
     is_admin: Optional[bool] = False
 
+
+def _save_user(db: Session, new_user: UserModel):
+    db.add(new_user)
+    db.flush()
+    index_users(db, [new_user])
+    db.commit()
+
+
+# 해시 풀을 기다리는 동안 스레드를 잡지 않도록 async로 두고, DB 작업만 스레드풀에서 실행합니다.
 @router.post("/register")
-def register(user: User, db: Session = Depends(get_db)):
+async def register(user: User, db: Session = Depends(get_db)):
     
     # 1. 이메일 중복 확인
-    existing_email = db.query(UserModel).filter(UserModel.email == user.email).first()
+    existing_email = await run_in_threadpool(db.query(UserModel.id).filter(UserModel.email == user.email).first)
     if existing_email:
         # FastAPI의 HTTPException을 사용하여 명확한 오류를 반환
         raise HTTPException(status_code=400, detail="이미 가입된 이메일입니다.")
 
     # 2. 사용자 아이디 중복 확인 (👈 이 로직 추가)
-    existing_username = db.query(UserModel).filter(UserModel.username == user.username).first()
+    existing_username = await run_in_threadpool(
+        db.query(UserModel.id).filter(UserModel.username == user.username).first
+    )
     if existing_username:
         raise HTTPException(status_code=400, detail="이미 사용 중인 아이디입니다.")
 
     new_user = UserModel(
         username=user.username,
         email=user.email,
-        password=hash_password(user.password),
+        password=await hash_password_async(user.password),  # bcrypt는 해시 전용 프로세스 풀에서
         contact_type=user.contact.type,
         contact_value=user.contact.value,
         is_admin=user.is_admin
     )
-    db.add(new_user)
-    db.commit()
-    db.refresh(new_user)
+    await run_in_threadpool(_save_user, db, new_user)
     return {"message": f"{user.username} 회원가입이 완료되었습니다."}
\ No newline at end of file
@@ -0,0 +1,62 @@
+# singleflight.py
+
+import asyncio
+
+_registry = {}
+
+
+class SingleFlight:
+    """
+    같은 키로 동시에 들어온 요청들이 하나의 진행 중인 호출 결과를 함께 기다리게 합니다.
+    먼저 온 요청(리더)의 호출은 별도 Task로 돌기 때문에, 리더 클라이언트가 끊겨도 나머지(팔로워)는 계속 기다릴 수 있습니다.
+    공유 호출이 실패하거나 시간 초과되면 팔로워는 한 번 더 직접(또는 새 리더를 따라) 시도합니다.
+    """
+
+    def __init__(self, name: str):
+        self.name = name
+        self._calls = {}
+        self.leaders = 0
+        self.followers = 0
+        self.follower_retries = 0
+        _registry[name] = self
+
+    async def do(self, key, fn, retry: bool = True):
+        task = self._calls.get(key)
+        if task is None:
+            self.leaders += 1
+            task = asyncio.ensure_future(fn())
+            self._calls[key] = task
+            task.add_done_callback(lambda t: self._forget(key, t))
+            return await asyncio.shield(task)
+
+        self.followers += 1
+        try:
+            return await asyncio.shield(task)
+        except asyncio.CancelledError:
+            # 팔로워 자신이 취소된 경우는 그대로 전파하고, 공유 호출이 취소된 경우만 재시도합니다.
+            if not task.cancelled() or not retry:
+                raise
+        except Exception:
+            if not retry:
+                raise
+        self.follower_retries += 1
+        return await self.do(key, fn, retry=False)
+
+    def _forget(self, key, task):
+        if self._calls.get(key) is task:
+            del self._calls[key]
+        if not task.cancelled():
+            task.exception()  # 아무도 기다리지 않은 실패도 "never retrieved" 경고 없이 정리
+
+    def stats(self) -> dict:
+        return {
+            "in_flight": len(self._calls),
+            "upstream_calls": self.leaders,
+            "coalesced": self.followers,
+            "follower_retries": self.follower_retries,
+            "saved_calls": self.followers - self.follower_retries,
+        }
+
+
+def stats() -> dict:
+    return {name: flight.stats() for name, flight in _registry.items()}
@@ -0,0 +1,129 @@
+# stress_accept.py
+
+# --- 참가 수락/취소 동시성 점검 ---
+# 여러 계획에 정원보다 많은 신청자를 넣고, 수락/참가 취소 요청을 수백 개 동시에 보낸 뒤
+# 정원 초과(overbooking)나 참가 인원 불일치(lost decrement)가 없는지 확인합니다.
+# 실행: python stress_accept.py                  (DATABASE_URL의 DB에 앱을 띄워 직접 호출)
+#       python stress_accept.py --url http://127.0.0.1:8000   (실행 중인 서버로 호출, 같은 DB여야 함)
+# 문제가 있으면 종료 코드 1
+
+import argparse
+import random
+import sys
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+
+from sqlalchemy import func
+
+from database import Base, SessionLocal, engine
+from models import Plan, PlanApplication, PlanParticipant
+
+
+def setup(plans: int, capacity: int, applicants: int) -> dict:
+    Base.metadata.create_all(bind=engine)
+    tag = uuid.uuid4().hex[:8]
+    db = SessionLocal()
+    try:
+        created = {}
+        for i in range(plans):
+            plan = Plan(title=f"stress-{tag}-{i}", username=f"owner-{tag}", participants=1, capacity=capacity)
+            db.add(plan)
+            db.flush()
+            names = [f"u-{tag}-{i}-{n}" for n in range(applicants)]
+            db.add_all(PlanApplication(plan_id=plan.id, username=name, travel_style="stress") for name in names)
+            created[plan.id] = names
+        db.commit()
+        return created
+    finally:
+        db.close()
+
+
+def check(plan_ids) -> list:
+    db = SessionLocal()
+    try:
+        problems = []
+        for plan in db.query(Plan).filter(Plan.id.in_(plan_ids)):
+            joined = db.query(func.count(PlanParticipant.id)).filter(PlanParticipant.plan_id == plan.id).scalar()
+            if plan.participants > plan.capacity:
+                problems.append(f"plan {plan.id}: 정원 초과 {plan.participants}/{plan.capacity}")
+            if plan.participants != joined + 1:  # 작성자 1명 포함
+                problems.append(f"plan {plan.id}: participants={plan.participants}, 실제 참가자={joined}+1")
+        return problems
+    finally:
+        db.close()
+
+
+def cleanup(plan_ids):
+    db = SessionLocal()
+    try:
+        db.query(PlanParticipant).filter(PlanParticipant.plan_id.in_(plan_ids)).delete(synchronize_session=False)
+        db.query(PlanApplication).filter(PlanApplication.plan_id.in_(plan_ids)).delete(synchronize_session=False)
+        db.query(Plan).filter(Plan.id.in_(plan_ids)).delete(synchronize_session=False)
+        db.commit()
+    finally:
+        db.close()
+
+
+@contextmanager
+def client(url):
+    if url:
+        import requests
+
+        with requests.Session() as session:
+            yield lambda path, body: session.post(url.rstrip("/") + path, json=body).status_code
+        return
+    from fastapi.testclient import TestClient
+    from main import app
+
+    # with 블록으로 써야 startup/shutdown 이벤트가 돌고 DB 연결이 정리됩니다.
+    with TestClient(app) as test_client:
+        yield lambda path, body: test_client.post(path, json=body).status_code
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--url", help="실행 중인 서버 주소 (없으면 앱을 직접 호출)")
+    parser.add_argument("--plans", type=int, default=4)
+    parser.add_argument("--capacity", type=int, default=5)
+    parser.add_argument("--applicants", type=int, default=60)
+    parser.add_argument("--workers", type=int, default=64)
+    parser.add_argument("--keep", action="store_true", help="점검 후 테스트 데이터를 지우지 않음")
+    args = parser.parse_args()
+
+    with client(args.url) as post:
+        created = setup(args.plans, args.capacity, args.applicants)
+        print(f"🧪 계획 {args.plans}개 × 신청 {args.applicants}건 (정원 {args.capacity})")
+
+        # 1) 모든 신청을 동시에 수락 (같은 신청을 두 번씩 보내 중복 수락도 함께 확인)
+        calls = [(f"/plan/{plan_id}/accept", {"username": name})
+                 for plan_id, names in created.items() for name in names for _ in range(2)]
+        random.shuffle(calls)
+        with ThreadPoolExecutor(args.workers) as pool:
+            statuses = list(pool.map(lambda call: post(*call), calls))
+        print(f"  수락: {len(calls)}건, 성공 {statuses.count(200)}건")
+
+        # 2) 참가 취소와 남은 신청 수락을 섞어서 동시에 (같은 참가자 취소를 두 번씩 보냄)
+        db = SessionLocal()
+        joined = db.query(PlanParticipant.plan_id, PlanParticipant.username).filter(
+            PlanParticipant.plan_id.in_(created)).all()
+        db.close()
+        calls = [(f"/plan/{plan_id}/participants/remove", {"username": name}) for plan_id, name in joined for _ in range(2)]
+        calls += [(f"/plan/{plan_id}/accept", {"username": name}) for plan_id, names in created.items() for name in names]
+        random.shuffle(calls)
+        with ThreadPoolExecutor(args.workers) as pool:
+            statuses = list(pool.map(lambda call: post(*call), calls))
+        print(f"  취소+수락: {len(calls)}건, 성공 {statuses.count(200)}건, 5xx {sum(s >= 500 for s in statuses)}건")
+
+    problems = check(list(created))
+    if not args.keep:
+        cleanup(list(created))
+    for problem in problems:
+        print(f"  ❌ {problem}")
+    if problems or any(s >= 500 for s in statuses):
+        sys.exit(1)
+    print("✅ 정원 초과/인원 불일치 없음")
+
+
+if __name__ == "__main__":
+    main()
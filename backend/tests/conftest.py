@@ -0,0 +1,42 @@
+# conftest.py
+
+import os
+import sys
+import tempfile
+
+import pytest
+
+# database.py/cache.py가 import 시점에 환경 변수로 엔진/파일을 만들므로 가장 먼저 임시 경로로 바꿉니다.
+_tmp = tempfile.mkdtemp(prefix="travellink-test-")
+os.environ["DATABASE_URL"] = f"sqlite:///{_tmp}/app.db"
+os.environ.pop("DATABASE_REPLICA_URL", None)
+os.environ["AI_CACHE_PATH"] = f"{_tmp}/ai_cache.db"
+os.environ["SESSION_SECRET_KEY"] = "test-secret"
+os.environ["BCRYPT_ROUNDS"] = "4"
+os.environ["PASSWORD_HASH_WORKERS"] = "1"
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+@pytest.fixture(scope="session")
+def tmp_dir():
+    return _tmp
+
+
+@pytest.fixture(scope="session")
+def client():
+    from fastapi.testclient import TestClient
+    from main import app
+
+    with TestClient(app) as test_client:
+        yield test_client
+
+
+@pytest.fixture
+def register(client):
+    def _register(username: str, password: str = "pw", is_admin: bool = False):
+        response = client.post("/register", json={
+            "username": username, "email": f"{username}@example.com", "password": password,
+            "contact": {"type": "kakao", "value": username}, "is_admin": is_admin,
+        })
+        assert response.status_code == 200, response.text
+    return _register
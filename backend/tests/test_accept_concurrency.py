@@ -0,0 +1,72 @@
+# test_accept_concurrency.py
+
+import threading
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+from fastapi import HTTPException
+from sqlalchemy import func, select
+
+from database import SessionLocal
+from models import Plan, PlanApplication, PlanParticipant
+from plans import accept_applicant
+
+
+def _create_plan(capacity: int, applicants: list) -> int:
+    with SessionLocal() as db:
+        plan = Plan(title=f"accept-race-{uuid.uuid4().hex[:8]}", username="owner", participants=1, capacity=capacity)
+        db.add(plan)
+        db.flush()
+        db.add_all(PlanApplication(plan_id=plan.id, username=name, travel_style="race") for name in applicants)
+        db.commit()
+        return plan.id
+
+
+def _accept_all(plan_id: int, usernames: list) -> list:
+    # 스레드마다 자기 세션(= 자기 DB 연결)으로 accept_applicant를 동시에 호출하고 상태 코드를 모읍니다.
+    barrier = threading.Barrier(len(usernames))
+
+    def accept(username):
+        with SessionLocal() as db:
+            barrier.wait()
+            try:
+                accept_applicant(plan_id, {"username": username}, db=db)
+                return 200
+            except HTTPException as e:
+                return e.status_code
+
+    with ThreadPoolExecutor(len(usernames)) as pool:
+        return list(pool.map(accept, usernames))
+
+
+def _seats(plan_id: int) -> tuple:
+    with SessionLocal() as db:
+        plan = db.get(Plan, plan_id)
+        joined = db.scalar(select(func.count(PlanParticipant.id)).where(PlanParticipant.plan_id == plan_id))
+        return plan.participants, plan.capacity, joined
+
+
+@pytest.mark.usefixtures("client")
+def test_concurrent_accepts_never_overbook():
+    names = [f"applicant-{n}" for n in range(12)]
+    plan_id = _create_plan(capacity=4, applicants=names)
+
+    statuses = _accept_all(plan_id, names)
+
+    participants, capacity, joined = _seats(plan_id)
+    assert participants == capacity == 4
+    assert joined == 3  # 작성자 1명 + 수락된 3명
+    assert statuses.count(200) == 3
+    assert sorted(set(statuses) - {200}) == [400]
+
+
+@pytest.mark.usefixtures("client")
+def test_same_application_is_accepted_once():
+    plan_id = _create_plan(capacity=10, applicants=["twice"])
+
+    statuses = _accept_all(plan_id, ["twice"] * 8)
+
+    participants, _, joined = _seats(plan_id)
+    assert statuses.count(200) == 1
+    assert participants == 2 and joined == 1
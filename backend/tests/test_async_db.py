@@ -0,0 +1,45 @@
+# test_async_db.py
+
+import asyncio
+
+import pytest
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import async_sessionmaker
+
+import database
+from database import Base, create_async_db_engine, create_db_engine, get_async_db, get_async_read_db
+from models import UserModel
+
+
+def _first_session(dependency):
+    async def run():
+        generator = dependency()
+        db = await generator.__anext__()
+        try:
+            return [row[0] for row in await db.execute(select(UserModel.username))]
+        finally:
+            await generator.aclose()
+    return asyncio.run(run())
+
+
+def test_async_db_requires_opt_in(monkeypatch):
+    monkeypatch.setattr(database, "AsyncSessionLocal", None)
+    with pytest.raises(RuntimeError, match="DB_ASYNC"):
+        _first_session(get_async_db)
+
+
+def test_async_db_uses_same_database(tmp_path, monkeypatch):
+    url = f"sqlite:///{tmp_path}/async.db"
+    sync_engine = create_db_engine(url)
+    Base.metadata.create_all(bind=sync_engine)
+    with sync_engine.begin() as conn:
+        conn.execute(UserModel.__table__.insert(), {"username": "async-user", "email": "a@example.com", "password": "x"})
+    async_engine = create_async_db_engine(url)
+    monkeypatch.setattr(database, "AsyncSessionLocal", async_sessionmaker(async_engine, expire_on_commit=False))
+    monkeypatch.setattr(database, "AsyncReplicaSessionLocal", None)
+
+    assert _first_session(get_async_db) == ["async-user"]
+    assert _first_session(get_async_read_db) == ["async-user"]
+
+    asyncio.run(async_engine.dispose())
+    sync_engine.dispose()
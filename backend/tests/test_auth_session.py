@@ -0,0 +1,51 @@
+# test_auth_session.py
+
+import pytest
+
+import auth_session
+
+IMPORT_ONE = b'{"username": "imported-1", "email": "i1@example.com", "password": "x"}\n'
+
+
+@pytest.fixture(autouse=True)
+def fresh_cookies(client):
+    client.cookies.clear()
+    yield
+    client.cookies.clear()
+
+
+def test_login_issues_signed_session_only(client, register):
+    register("sess-user")
+    response = client.post("/login", json={"username": "sess-user", "password": "pw"})
+    assert response.status_code == 200
+    assert "session" in response.cookies
+    assert "user" not in response.cookies
+    assert client.get("/api/user").json()["username"] == "sess-user"
+    client.post("/api/logout")
+    assert client.get("/api/user").json() == {"loggedIn": False}
+
+
+def test_forged_legacy_cookie_is_ignored(client, register):
+    register("legacy-admin", is_admin=True)
+    client.cookies.set("user", "legacy-admin")
+    assert client.get("/api/user").json() == {"loggedIn": False}
+    assert "session" not in client.cookies
+    assert client.post("/api/admin/users/import?format=ndjson", content=IMPORT_ONE).status_code == 403
+
+
+def test_legacy_cookie_never_becomes_admin_session(client, register, monkeypatch):
+    register("legacy-admin-2", is_admin=True)
+    monkeypatch.setattr(auth_session, "LEGACY_USER_COOKIE", True)
+    client.cookies.set("user", "legacy-admin-2")
+    body = client.get("/api/user").json()
+    assert body["loggedIn"] and not body["is_admin"]
+    assert "session" not in client.cookies
+    assert client.post("/api/admin/users/import?format=ndjson", content=IMPORT_ONE).status_code == 403
+
+
+def test_admin_session_can_import(client, register):
+    register("real-admin", is_admin=True)
+    client.post("/login", json={"username": "real-admin", "password": "pw"})
+    response = client.post("/api/admin/users/import?format=ndjson", content=IMPORT_ONE)
+    assert response.status_code == 200
+    assert response.json()["created"] == 1
@@ -0,0 +1,67 @@
+# test_jobs.py
+
+import asyncio
+import time
+
+from jobs import JobQueue
+
+
+def _queue(tmp_path, handler, **kwargs) -> JobQueue:
+    options = dict(workers=1, max_queue=10, result_ttl=60, timeout=5, path=str(tmp_path / "jobs.db"))
+    options.update(kwargs)
+    return JobQueue("test", handler, **options)
+
+
+async def _wait_for_status(queue: JobQueue, job_id: str, status: str):
+    for _ in range(200):
+        if queue.get(job_id)["status"] == status:
+            return
+        await asyncio.sleep(0.01)
+    raise AssertionError(f"{job_id}가 {status} 상태가 되지 않았습니다: {queue.get(job_id)}")
+
+
+def test_running_job_is_requeued_on_stop(tmp_path):
+    async def never_finishes(payload):
+        await asyncio.sleep(3600)
+
+    async def run():
+        queue = _queue(tmp_path, never_finishes)
+        job, _ = queue.submit({"n": 1})
+        await _wait_for_status(queue, job["job_id"], "running")
+        await queue.stop()
+        return queue.get(job["job_id"])
+
+    job = asyncio.run(run())
+    assert job["status"] == "queued" and job["started_at"] is None
+
+    async def finish(payload):
+        return {"n": payload["n"]}
+
+    async def resume():
+        # 다음에 시작한 워커가 되돌려 놓은 작업을 이어서 처리합니다.
+        queue = _queue(tmp_path, finish)
+        queue.start()
+        await _wait_for_status(queue, job["job_id"], "done")
+        await queue.stop()
+        return queue.get(job["job_id"])
+
+    assert asyncio.run(resume())["result"] == {"n": 1}
+
+
+def test_sweep_requeues_stale_running_jobs(tmp_path):
+    async def finish(payload):
+        return payload
+
+    async def run():
+        queue = _queue(tmp_path, finish, timeout=1, sweep_interval=0.05)
+        queue.start()
+        # 다른 워커가 실행하다 죽어서 running으로 남은 작업
+        queue._conn().execute(
+            "INSERT INTO jobs (id, queue, priority, status, payload, created_at, started_at) "
+            "VALUES ('stale', 'test', 0, 'running', '{}', ?, ?)",
+            (time.time(), time.time() - 60),
+        )
+        await _wait_for_status(queue, "stale", "done")
+        await queue.stop()
+
+    asyncio.run(run())
@@ -0,0 +1,57 @@
+# test_migrations.py
+
+from sqlalchemy import inspect, text
+from sqlalchemy.orm import Session
+
+import models  # noqa: F401  (모든 테이블을 Base에 등록)
+from database import Base, create_db_engine
+from migrations import MIGRATIONS, run_migrations
+from search_index import search_plan_ids
+
+# 마이그레이션을 도입하기 전(베이스라인)의 운영 DB 스키마
+BASELINE_SCHEMA = [
+    """CREATE TABLE users (
+        id INTEGER PRIMARY KEY, username VARCHAR(50) NOT NULL UNIQUE, email VARCHAR(100) NOT NULL UNIQUE,
+        password VARCHAR(255) NOT NULL, contact_type VARCHAR(20), contact_value VARCHAR(100), is_admin INTEGER)""",
+    """CREATE TABLE plans (
+        id INTEGER PRIMARY KEY, title VARCHAR(255) NOT NULL, username VARCHAR(100), destination VARCHAR(100),
+        date VARCHAR(100), summary TEXT, participants INTEGER, capacity INTEGER, views INTEGER, tags TEXT,
+        itinerary JSON, created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP)""",
+    """CREATE TABLE contact (
+        id VARCHAR(255) PRIMARY KEY, name VARCHAR(255), title VARCHAR(255), message TEXT, answer TEXT)""",
+    """CREATE TABLE plan_applications (
+        id INTEGER PRIMARY KEY, plan_id INTEGER REFERENCES plans (id), username VARCHAR(255), reason TEXT,
+        travel_style VARCHAR(255), contact_type VARCHAR(255), contact_value VARCHAR(255))""",
+    """CREATE TABLE plan_participants (
+        id INTEGER PRIMARY KEY, plan_id INTEGER REFERENCES plans (id), username VARCHAR(255),
+        contact_type VARCHAR(255), contact_value VARCHAR(255), travel_style VARCHAR(255))""",
+]
+
+
+def test_all_migrations_run_on_baseline_schema(tmp_path):
+    engine = create_db_engine(f"sqlite:///{tmp_path}/baseline.db")
+    with engine.begin() as conn:
+        for ddl in BASELINE_SCHEMA:
+            conn.execute(text(ddl))
+        conn.execute(text(
+            "INSERT INTO plans (title, username, destination, tags, summary, participants, capacity, views) "
+            "VALUES ('제주 먹방 여행', 'owner', '제주', '맛집', '', 1, 4, 0)"
+        ))
+        conn.execute(text(
+            "INSERT INTO users (username, email, password, is_admin) VALUES ('alice', 'alice@example.com', 'x', 0)"
+        ))
+
+    # main.py와 같은 순서: 새 테이블 생성 후 마이그레이션
+    Base.metadata.create_all(bind=engine)
+    run_migrations(engine)
+
+    with engine.connect() as conn:
+        applied = [row[0] for row in conn.execute(text("SELECT version FROM schema_migrations ORDER BY version"))]
+        assert applied == [version for version, _, _ in MIGRATIONS]
+        assert "revision" in {column["name"] for column in inspect(conn).get_columns("plans")}
+        assert conn.execute(text("SELECT revision FROM plans")).scalar() == 1
+    with Session(engine) as db:
+        assert [plan_id for plan_id, _ in search_plan_ids(db, "제주", 10)] == [1]
+
+    run_migrations(engine)  # 다시 실행해도 아무것도 하지 않음
+    engine.dispose()
@@ -0,0 +1,45 @@
+# test_password_pool.py
+
+import asyncio
+
+import pytest
+from fastapi import HTTPException
+
+import utils
+from utils import hash_password_async, verify_password
+
+
+def _hash(password: str) -> str:
+    async def run():
+        return await hash_password_async(password)
+
+    return asyncio.run(run())
+
+
+@pytest.fixture
+def fresh_pool():
+    utils.shutdown_password_pool()
+    yield
+    utils.shutdown_password_pool()
+
+
+def test_dead_worker_pool_is_rebuilt(fresh_pool):
+    assert verify_password("before", _hash("before"))
+    broken = utils._pool
+    for process in list(broken._processes.values()):
+        process.kill()
+        process.join()
+
+    assert verify_password("after", _hash("after"))
+    assert utils._pool is not broken
+
+
+def test_pool_that_keeps_breaking_returns_503(fresh_pool, monkeypatch):
+    async def always_broken(func, *args):
+        raise utils.BrokenProcessPool("worker died")
+
+    monkeypatch.setattr(utils, "_submit", always_broken)
+    with pytest.raises(HTTPException) as exc:
+        _hash("pw")
+    assert exc.value.status_code == 503
+    assert utils._in_flight == 0
@@ -0,0 +1,117 @@
+# test_read_replica.py
+
+import time
+
+import pytest
+from sqlalchemy import select
+from sqlalchemy.exc import OperationalError
+from sqlalchemy.orm import sessionmaker
+
+import database
+from database import Base, ReplicaSession, create_db_engine, read_session
+from models import UserModel
+
+
+def _add_user(engine, username: str):
+    db = sessionmaker(bind=engine)()
+    db.add(UserModel(username=username, email=f"{username}@example.com", password="x"))
+    db.commit()
+    db.close()
+
+
+def _usernames(db) -> list:
+    return [row[0] for row in db.query(UserModel.username).order_by(UserModel.username)]
+
+
+@pytest.fixture
+def primary(tmp_path, monkeypatch):
+    engine = create_db_engine(f"sqlite:///{tmp_path}/primary.db")
+    Base.metadata.create_all(bind=engine)
+    _add_user(engine, "from-primary")
+    monkeypatch.setattr(database, "engine", engine)
+    monkeypatch.setattr(database, "SessionLocal", sessionmaker(autocommit=False, autoflush=False, bind=engine))
+    monkeypatch.setattr(database, "_replica_down_until", 0.0)
+    yield engine
+    engine.dispose()
+
+
+@pytest.fixture
+def use_replica(monkeypatch):
+    engines = []
+
+    def _use(path: str):
+        engine = create_db_engine(f"sqlite:///{path}")
+        engines.append(engine)
+        monkeypatch.setattr(database, "replica_engine", engine)
+        monkeypatch.setattr(database, "ReplicaSessionLocal", sessionmaker(
+            class_=ReplicaSession, autocommit=False, autoflush=False, bind=engine,
+        ))
+        return engine
+
+    yield _use
+    for engine in engines:
+        engine.dispose()
+
+
+def test_reads_go_to_replica(primary, use_replica, tmp_path):
+    replica = use_replica(tmp_path / "replica.db")
+    Base.metadata.create_all(bind=replica)
+    _add_user(replica, "from-replica")
+
+    with read_session() as db:
+        assert _usernames(db) == ["from-replica"]
+    assert database._replica_available()
+
+
+def test_empty_replica_falls_back_to_primary(primary, use_replica, tmp_path):
+    # 레플리카 파일이 없으면 SQLite가 빈 DB를 만들어 pre-ping은 통과하고 쿼리에서 "no such table"이 납니다.
+    use_replica(tmp_path / "missing.db")
+
+    with read_session() as db:
+        assert _usernames(db) == ["from-primary"]
+        assert db.get(UserModel, 1).username == "from-primary"
+    assert not database._replica_available()
+
+
+def test_scalar_falls_back_to_primary(primary, use_replica, tmp_path):
+    # scalar()/scalars()는 execute()를 거치지 않으므로 따로 확인합니다.
+    use_replica(tmp_path / "missing.db")
+
+    with read_session() as db:
+        assert db.scalar(select(UserModel.username)) == "from-primary"
+    assert not database._replica_available()
+
+    database._replica_down_until = 0.0
+    with read_session() as db:
+        assert db.scalars(select(UserModel.username)).all() == ["from-primary"]
+
+
+def test_unreachable_replica_falls_back_to_primary(primary, use_replica, tmp_path):
+    use_replica(tmp_path / "no-such-dir" / "replica.db")
+
+    with read_session() as db:
+        assert _usernames(db) == ["from-primary"]
+    assert not database._replica_available()
+
+
+def test_replica_skipped_while_marked_down(primary, use_replica, tmp_path, monkeypatch):
+    replica = use_replica(tmp_path / "replica.db")
+    Base.metadata.create_all(bind=replica)
+    _add_user(replica, "from-replica")
+    monkeypatch.setattr(database, "_replica_down_until", time.time() + 60)
+
+    with read_session() as db:
+        assert _usernames(db) == ["from-primary"]
+
+    monkeypatch.setattr(database, "_replica_down_until", 0.0)
+    with read_session() as db:
+        assert _usernames(db) == ["from-replica"]
+
+
+def test_primary_errors_are_not_retried(primary, use_replica, tmp_path):
+    use_replica(tmp_path / "missing.db")
+    Base.metadata.drop_all(bind=primary)
+
+    with pytest.raises(OperationalError):
+        with read_session() as db:
+            _usernames(db)
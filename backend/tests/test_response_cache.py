@@ -0,0 +1,42 @@
+# test_response_cache.py
+
+import asyncio
+import uuid
+
+from response_cache import TieredCache
+
+
+def _workers():
+    # 같은 이름의 TieredCache 두 개 = 공유 단계(SQLite)를 같이 쓰는 두 워커
+    name = f"test-{uuid.uuid4().hex[:8]}"
+    return (TieredCache(name, local_ttl=60, shared_ttl=60),
+            TieredCache(name, local_ttl=60, shared_ttl=60))
+
+
+def test_invalidation_from_another_worker_skips_shared_store():
+    worker_a, worker_b = _workers()
+
+    async def stale_loader():
+        worker_b.delete("plan:1")  # A가 DB를 읽는 사이에 B가 계획을 바꾸고 무효화
+        return {"revision": 1}
+
+    assert asyncio.run(worker_a.get_or_load("plan:1", stale_loader)) == {"revision": 1}
+
+    async def fresh_loader():
+        return {"revision": 2}
+
+    assert asyncio.run(worker_b.get_or_load("plan:1", fresh_loader)) == {"revision": 2}
+
+
+def test_load_is_shared_between_workers():
+    worker_a, worker_b = _workers()
+
+    async def loader():
+        return {"revision": 1}
+
+    async def unexpected_loader():
+        raise AssertionError("공유 단계에 있으면 다시 로드하지 않아야 합니다.")
+
+    asyncio.run(worker_a.get_or_load("plan:1", loader))
+    assert asyncio.run(worker_b.get_or_load("plan:1", unexpected_loader)) == {"revision": 1}
+    assert worker_b.shared_hits == 1
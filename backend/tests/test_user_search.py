@@ -0,0 +1,51 @@
+# test_user_search.py
+
+import pytest
+from sqlalchemy import create_engine, select
+from sqlalchemy.orm import sessionmaker
+
+import search_index
+from admin import user_search_condition
+from database import Base
+from models import UserModel
+from search_index import index_users, user_candidates
+
+NAMES = ["alice", "malice", "alicia", "bob", "bobby", "carol"]
+
+
+@pytest.fixture
+def db(tmp_path):
+    engine = create_engine(f"sqlite:///{tmp_path}/users.db")
+    Base.metadata.create_all(bind=engine)
+    session = sessionmaker(bind=engine)()
+    users = [UserModel(username=name, email=f"{name}@example.com", password="x") for name in NAMES]
+    session.add_all(users)
+    session.flush()
+    index_users(session, users)
+    session.commit()
+    yield session
+    session.close()
+    engine.dispose()
+
+
+def _search(db, query: str) -> list:
+    stmt = select(UserModel.username).where(user_search_condition(db, query)).order_by(UserModel.username)
+    return list(db.scalars(stmt))
+
+
+@pytest.mark.parametrize("query, expected", [
+    ("alic", ["alice", "alicia", "malice"]),
+    ("lice", ["alice", "malice"]),
+    ("bo", ["bob", "bobby"]),
+    ("y", ["bobby"]),
+    ("zzz", []),
+])
+def test_substring_search(db, query, expected):
+    assert _search(db, query) == expected
+
+
+def test_common_gram_skips_candidates(db, monkeypatch):
+    # 가장 드문 조각도 한도보다 많으면 색인 없이 부분 일치로만 찾고, 결과는 같아야 합니다.
+    monkeypatch.setattr(search_index, "USER_CANDIDATE_CAP", 1)
+    assert user_candidates(db, "alic") is None
+    assert _search(db, "alic") == ["alice", "alicia", "malice"]
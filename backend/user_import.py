@@ -0,0 +1,292 @@
+# user_import.py
+
+# --- 사용자 일괄 가져오기 ---
+# 제휴 단체 계정 수천 개를 register로 한 명씩 만들지 않고 한 번에 넣습니다.
+# CSV(첫 줄은 헤더) 또는 NDJSON을 한 줄씩 읽으면서 IMPORT_BATCH_SIZE 행마다
+#   1) username/email 중복을 조각 단위 IN 조회로 확인하고
+#   2) 비밀번호를 해시 프로세스 풀(utils.py)에서 나눠 해시한 뒤
+#   3) INSERT 한 번 + 관리자 검색 색인을 넣고 커밋합니다.
+# 실패한 행은 행 번호와 이유를 보고서에 남기고, 보고서의 committed_rows부터 다시 시작할 수 있습니다.
+# 열: username, email, password, contact_type(선택), contact_value(선택) - 가져온 계정은 모두 일반 사용자
+# CSV는 한 행이 한 줄이어야 합니다. (따옴표 안 줄바꿈은 지원하지 않음)
+#
+# 실행: python user_import.py users.csv [--checkpoint users.ckpt.json] [--report users.errors.ndjson]
+#       (체크포인트 파일이 있으면 거기 적힌 committed_rows 다음 행부터 이어서 가져옵니다)
+# 관리자 API: POST /api/admin/users/import?format=csv&skip_rows=0 (요청 본문에 파일 내용을 그대로)
+
+import argparse
+import asyncio
+import csv
+import json
+import os
+from typing import Optional
+
+from pydantic import BaseModel, Field, ValidationError
+from sqlalchemy import insert, select
+from fastapi.concurrency import run_in_threadpool
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+
+from models import UserModel
+from search_index import index_users
+from utils import hash_passwords_async
+
+IMPORT_BATCH_SIZE = int(os.getenv("IMPORT_BATCH_SIZE", "500"))
+IMPORT_MAX_REPORTED_ERRORS = int(os.getenv("IMPORT_MAX_REPORTED_ERRORS", "1000"))  # API 응답에 담는 오류 행 수
+IMPORT_FORMATS = ("csv", "ndjson")
+
+
+class ImportRow(BaseModel):
+    username: str = Field(min_length=1, max_length=50)
+    email: str = Field(min_length=3, max_length=100)
+    password: str = Field(min_length=1)
+    contact_type: Optional[str] = Field(None, max_length=20)
+    contact_value: Optional[str] = Field(None, max_length=100)
+
+
+# --- 입력 읽기 ---
+async def iter_lines(chunks):
+    """바이트 조각(요청 본문 스트림 등)을 줄 단위 바이트로 (디코딩은 parse_rows가 행마다)"""
+    buffer = b""
+    async for chunk in chunks:
+        buffer += chunk
+        *lines, buffer = buffer.split(b"\n")
+        for line in lines:
+            yield line.rstrip(b"\r")
+    if buffer:
+        yield buffer.rstrip(b"\r")
+
+
+async def iter_file_lines(path: str):
+    with open(path, "rb") as f:
+        for line in f:
+            yield line.rstrip(b"\r\n")
+
+
+async def parse_rows(lines, fmt: str):
+    """lines는 줄 단위 바이트. (행 번호, 값 dict 또는 None, 오류 또는 None)을 차례로 돌려줍니다. 헤더와 빈 줄은 행 번호에 넣지 않습니다."""
+    header = None
+    number = 0
+    async for line in lines:
+        if number == 0 and header is None:
+            line = line.removeprefix(b"\xef\xbb\xbf")  # 엑셀에서 저장한 CSV의 BOM
+            if fmt == "csv":
+                header = [name.strip() for name in next(csv.reader([line.decode("utf-8", "replace")]))]
+                continue
+        if not line.strip():
+            continue
+        number += 1
+        try:
+            line = line.decode("utf-8")
+            if fmt == "csv":
+                values = next(csv.reader([line]))
+                if len(values) != len(header):
+                    raise ValueError(f"열 개수가 헤더와 다릅니다 ({len(values)}/{len(header)})")
+                record = {name: value or None for name, value in zip(header, values)}
+            else:
+                record = json.loads(line)
+                if not isinstance(record, dict):
+                    raise ValueError("JSON 객체가 아닙니다")
+        except UnicodeDecodeError:
+            yield number, None, "UTF-8 인코딩이 아닙니다."
+            continue
+        except (ValueError, csv.Error) as e:
+            yield number, None, str(e)
+            continue
+        yield number, record, None
+
+
+def _validation_message(error: ValidationError) -> str:
+    return ", ".join(f"{'.'.join(map(str, e['loc']))}: {e['msg']}" for e in error.errors())
+
+
+# --- 조각 처리 (DB 작업은 스레드풀에서 실행) ---
+def _find_taken(db: Session, rows: list) -> tuple:
+    usernames = [row.username for row in rows]
+    emails = [row.email for row in rows]
+    # MySQL은 대소문자를 구분하지 않고 비교하므로 돌려받은 값도 casefold해서 비교합니다.
+    taken_usernames = {name.casefold() for name in db.scalars(select(UserModel.username).where(UserModel.username.in_(usernames)))}
+    taken_emails = {email.casefold() for email in db.scalars(select(UserModel.email).where(UserModel.email.in_(emails)))}
+    return taken_usernames, taken_emails
+
+
+def _insert_users(db: Session, values: list):
+    db.execute(insert(UserModel), values)
+    # executemany INSERT는 id를 돌려주지 않으므로(MySQL) 한 번 더 읽어 검색 색인에 넣습니다.
+    users = db.execute(
+        select(UserModel.id, UserModel.username, UserModel.email)
+        .where(UserModel.username.in_([value["username"] for value in values]))
+    ).all()
+    index_users(db, users)
+
+
+class _Report:
+    def __init__(self, fmt: str, skip_rows: int, batch_size: int, on_error):
+        self.data = {
+            "format": fmt,
+            "batch_size": batch_size,
+            "skipped_rows": skip_rows,
+            "rows": 0,
+            "created": 0,
+            "failed": 0,
+            "chunks": 0,
+            "committed_rows": skip_rows,
+            "errors": [],
+            "errors_truncated": False,
+        }
+        self._on_error = on_error
+
+    def error(self, number: int, error: str, username: str = None):
+        entry = {"row": number, "username": username, "error": error}
+        self.data["failed"] += 1
+        if len(self.data["errors"]) < IMPORT_MAX_REPORTED_ERRORS:
+            self.data["errors"].append(entry)
+        else:
+            self.data["errors_truncated"] = True
+        if self._on_error:
+            self._on_error(entry)
+
+
+async def _import_chunk(db: Session, chunk: list, report: _Report):
+    """chunk: [(행 번호, ImportRow)] - 조각 안 중복은 대소문자 구분 없이 먼저 걸러 냅니다. (MySQL 기본 collation 기준)"""
+    seen_usernames, seen_emails, rows = set(), set(), []
+    for number, row in chunk:
+        if row.username.casefold() in seen_usernames:
+            report.error(number, "파일 안에서 중복된 아이디입니다.", row.username)
+        elif row.email.casefold() in seen_emails:
+            report.error(number, "파일 안에서 중복된 이메일입니다.", row.username)
+        else:
+            seen_usernames.add(row.username.casefold())
+            seen_emails.add(row.email.casefold())
+            rows.append((number, row))
+
+    # 중복 확인과 INSERT 사이에 register로 같은 아이디가 생기면 IntegrityError가 나므로 한 번 다시 확인합니다.
+    hashed = {}
+    for attempt in range(2):
+        taken_usernames, taken_emails = await run_in_threadpool(_find_taken, db, [row for _, row in rows])
+        fresh = []
+        for number, row in rows:
+            if row.username.casefold() in taken_usernames:
+                report.error(number, "이미 사용 중인 아이디입니다.", row.username)
+            elif row.email.casefold() in taken_emails:
+                report.error(number, "이미 가입된 이메일입니다.", row.username)
+            else:
+                fresh.append((number, row))
+        rows = fresh
+        if not rows:
+            return
+
+        missing = [(number, row) for number, row in rows if number not in hashed]
+        hashed.update(zip(
+            [number for number, _ in missing],
+            await hash_passwords_async([row.password for _, row in missing]),
+        ))
+        values = [
+            {**row.model_dump(exclude={"password"}), "password": hashed[number], "is_admin": 0}
+            for number, row in rows
+        ]
+        try:
+            await run_in_threadpool(_insert_users, db, values)
+            await run_in_threadpool(db.commit)
+            report.data["created"] += len(values)
+            return
+        except IntegrityError as e:
+            await run_in_threadpool(db.rollback)
+            if attempt:
+                for number, row in rows:
+                    report.error(number, f"저장하지 못했습니다 (중복 충돌): {e.orig}", row.username)
+
+
+async def import_users(db: Session, rows, fmt: str, skip_rows: int = 0, batch_size: int = None,
+                       on_chunk=None, on_error=None) -> dict:
+    """
+    rows: parse_rows()의 결과. skip_rows 이하 행은 이미 가져온 것으로 보고 건너뜁니다.
+    조각마다 커밋한 뒤 on_chunk(report)를 부르므로 거기서 체크포인트를 저장하면 됩니다.
+    """
+    size = batch_size or IMPORT_BATCH_SIZE
+    report = _Report(fmt, skip_rows, size, on_error)
+    chunk, last = [], skip_rows
+
+    async def flush():
+        nonlocal chunk
+        if chunk:
+            await _import_chunk(db, chunk, report)
+        chunk = []
+        report.data["chunks"] += 1
+        report.data["committed_rows"] = last
+        print(f"📥 사용자 가져오기: {last}행까지 완료 (생성 {report.data['created']}, 실패 {report.data['failed']})")
+        if on_chunk:
+            on_chunk(report.data)
+
+    async for number, record, error in rows:
+        if number <= skip_rows:
+            continue
+        report.data["rows"] += 1
+        last = number
+        if error:
+            report.error(number, error)
+        else:
+            try:
+                chunk.append((number, ImportRow.model_validate(record)))
+            except ValidationError as e:
+                report.error(number, _validation_message(e), record.get("username"))
+        if report.data["rows"] % size == 0:
+            await flush()
+    if report.data["rows"] % size:
+        await flush()
+    return report.data
+
+
+# --- CLI ---
+def _load_checkpoint(path: str, source: str) -> int:
+    if not path or not os.path.exists(path):
+        return 0
+    with open(path) as f:
+        checkpoint = json.load(f)
+    if checkpoint.get("source") != source:
+        raise SystemExit(f"체크포인트 {path}는 다른 파일({checkpoint.get('source')})의 것입니다.")
+    return checkpoint["committed_rows"]
+
+
+def _save_checkpoint(path: str, source: str, report: dict):
+    tmp = f"{path}.tmp"
+    with open(tmp, "w") as f:
+        json.dump({"source": source, "committed_rows": report["committed_rows"]}, f)
+    os.replace(tmp, path)  # 중간에 죽어도 체크포인트 파일이 깨지지 않도록
+
+
+async def _main(args):
+    from database import SessionLocal
+    from utils import shutdown_password_pool
+
+    source = os.path.abspath(args.file)
+    fmt = args.format or ("ndjson" if source.endswith((".ndjson", ".jsonl")) else "csv")
+    checkpoint = args.checkpoint or f"{args.file}.ckpt.json"
+    skip_rows = _load_checkpoint(checkpoint, source)
+    if skip_rows:
+        print(f"↩️  체크포인트: {skip_rows}행까지 이미 가져왔으므로 그다음부터 시작합니다.")
+
+    report_file = open(args.report or f"{args.file}.errors.ndjson", "a", encoding="utf-8")
+    try:
+        with SessionLocal() as db:
+            report = await import_users(
+                db, parse_rows(iter_file_lines(args.file), fmt), fmt,
+                skip_rows=skip_rows, batch_size=args.batch_size,
+                on_chunk=lambda data: _save_checkpoint(checkpoint, source, data),
+                on_error=lambda entry: report_file.write(json.dumps(entry, ensure_ascii=False) + "\n"),
+            )
+    finally:
+        report_file.close()
+        shutdown_password_pool()
+    print(f"✅ {report['rows']}행 처리: 생성 {report['created']}, 실패 {report['failed']} "
+          f"(오류 보고서: {report_file.name}, 체크포인트: {checkpoint})")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="CSV/NDJSON 파일로 사용자 계정을 일괄 생성합니다.")
+    parser.add_argument("file")
+    parser.add_argument("--format", choices=IMPORT_FORMATS, help="기본값: 확장자로 판단 (.ndjson/.jsonl이면 ndjson)")
+    parser.add_argument("--batch-size", type=int, default=None, help=f"기본값: IMPORT_BATCH_SIZE ({IMPORT_BATCH_SIZE})")
+    parser.add_argument("--checkpoint", help="기본값: <file>.ckpt.json")
+    parser.add_argument("--report", help="실패한 행을 추가로 기록할 NDJSON 파일 (기본값: <file>.errors.ndjson)")
+    asyncio.run(_main(parser.parse_args()))
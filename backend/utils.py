@@ -1,9 +1,131 @@
+import asyncio
+import multiprocessing
+import os
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+
+from fastapi import HTTPException
 from passlib.context import CryptContext
 
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+# --- 비밀번호 해시 설정 ---
+# BCRYPT_ROUNDS를 바꾸면 새로 만드는 해시부터 적용되고,
+# 예전 비용으로 만든 해시(hash_password_tool.py로 만든 raw bcrypt 포함)는 로그인에 성공할 때 새 비용으로 바뀝니다.
+BCRYPT_ROUNDS = int(os.getenv("BCRYPT_ROUNDS", "12"))
+PASSWORD_HASH_WORKERS = int(os.getenv("PASSWORD_HASH_WORKERS", str(os.cpu_count() or 1)))  # 해시 전용 프로세스 수
+PASSWORD_HASH_MAX_QUEUE = int(os.getenv("PASSWORD_HASH_MAX_QUEUE", "32"))  # 처리 중인 것 외에 기다릴 수 있는 요청 수
+PASSWORD_HASH_NICE = int(os.getenv("PASSWORD_HASH_NICE", "5"))  # 해시 프로세스 우선순위를 낮춰 다른 요청 지연을 줄임
+PASSWORD_HASH_SLICE = int(os.getenv("PASSWORD_HASH_SLICE", "16"))  # 일괄 해시 때 프로세스에 한 번에 보내는 개수
+
+pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto", bcrypt__rounds=BCRYPT_ROUNDS)
 
+
+# 스크립트(init_db.py, hash_password_tool.py 등)와 프로세스 풀 안에서 쓰는 동기 함수
 def hash_password(password: str):
     return pwd_context.hash(password)
 
 def verify_password(plain_password: str, hashed_password: str):
     return pwd_context.verify(plain_password, hashed_password)
+
+def verify_and_update(plain_password: str, hashed_password: str):
+    """(일치 여부, 새 해시 또는 None) - 비용이 현재 설정과 다르면 새 해시를 함께 돌려줍니다."""
+    return pwd_context.verify_and_update(plain_password, hashed_password)
+
+def hash_passwords(passwords: list) -> list:
+    return [pwd_context.hash(password) for password in passwords]
+
+
+# --- 라우터용 비동기 해시 (프로세스 풀) ---
+# bcrypt는 CPU를 오래 쓰므로 스레드가 아니라 별도 프로세스에서 돌려 API 워커의 GIL을 잡지 않습니다.
+# 처리 중 + 대기 중 요청이 한도를 넘으면 줄 세우지 않고 바로 503을 돌려줍니다.
+_pool = None
+_in_flight = 0
+
+
+def _lower_priority():
+    if PASSWORD_HASH_NICE > 0 and hasattr(os, "nice"):
+        os.nice(PASSWORD_HASH_NICE)
+
+
+def _get_pool() -> ProcessPoolExecutor:
+    global _pool
+    if _pool is None:
+        # fork 대신 spawn: 이벤트 루프/DB 연결 스레드가 떠 있는 워커를 복제하지 않습니다.
+        _pool = ProcessPoolExecutor(
+            max_workers=PASSWORD_HASH_WORKERS,
+            mp_context=multiprocessing.get_context("spawn"),
+            initializer=_lower_priority,
+        )
+    return _pool
+
+
+def _discard_pool(pool: ProcessPoolExecutor):
+    # 여러 요청이 같은 고장 난 풀을 동시에 만나도 새 풀은 한 번만 만들어지도록, 아직 그 풀일 때만 비웁니다.
+    global _pool
+    if _pool is pool:
+        _pool = None
+    pool.shutdown(wait=False, cancel_futures=True)
+
+
+async def _submit(func, *args):
+    pool = _get_pool()
+    try:
+        return await asyncio.get_running_loop().run_in_executor(pool, func, *args)
+    except BrokenProcessPool:
+        _discard_pool(pool)
+        raise
+
+
+async def _run_in_pool(func, *args, shed: bool = True):
+    global _in_flight
+    if shed and _in_flight >= PASSWORD_HASH_WORKERS + PASSWORD_HASH_MAX_QUEUE:
+        raise HTTPException(
+            status_code=503,
+            detail="요청이 많아 처리할 수 없습니다. 잠시 후 다시 시도해주세요.",
+            headers={"Retry-After": "1"},
+        )
+    _in_flight += 1
+    try:
+        try:
+            return await _submit(func, *args)
+        except BrokenProcessPool:
+            # 해시 프로세스가 죽으면(OOM 킬 등) 풀 전체를 못 쓰게 되므로 새 풀에서 한 번만 다시 시도합니다.
+            print("⚠️ 비밀번호 해시 프로세스 풀이 멈춰 다시 만듭니다.")
+        try:
+            return await _submit(func, *args)
+        except BrokenProcessPool:
+            raise HTTPException(
+                status_code=503,
+                detail="비밀번호 처리를 잠시 할 수 없습니다. 잠시 후 다시 시도해주세요.",
+                headers={"Retry-After": "1"},
+            )
+    finally:
+        _in_flight -= 1
+
+
+async def hash_password_async(password: str) -> str:
+    return await _run_in_pool(hash_password, password)
+
+
+async def verify_and_update_async(plain_password: str, hashed_password: str):
+    return await _run_in_pool(verify_and_update, plain_password, hashed_password)
+
+
+async def hash_passwords_async(passwords: list) -> list:
+    """
+    일괄 가져오기용: PASSWORD_HASH_SLICE개씩 나눠 한 번에 최대 PASSWORD_HASH_WORKERS 묶음만 보냅니다.
+    (풀 대기열을 독차지하지 않아 그 사이 로그인 요청이 끼어들 수 있고, 가져오기 자신은 503 대신 기다립니다)
+    """
+    slices = [passwords[i:i + PASSWORD_HASH_SLICE] for i in range(0, len(passwords), PASSWORD_HASH_SLICE)]
+    hashed = []
+    for start in range(0, len(slices), PASSWORD_HASH_WORKERS):
+        group = slices[start:start + PASSWORD_HASH_WORKERS]
+        for result in await asyncio.gather(*(_run_in_pool(hash_passwords, s, shed=False) for s in group)):
+            hashed.extend(result)
+    return hashed
+
+
+def shutdown_password_pool():
+    global _pool
+    if _pool is not None:
+        _pool.shutdown(wait=True, cancel_futures=True)
+        _pool = None
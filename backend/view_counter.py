@@ -0,0 +1,89 @@
+# view_counter.py
+
+import asyncio
+import os
+import threading
+from collections import Counter
+
+from sqlalchemy import bindparam
+
+from database import engine
+from models import Plan
+
+# --- 조회수 지연 기록 ---
+# 상세 조회마다 UPDATE/commit 하지 않고 워커 메모리에 모았다가 주기적으로 한 번에 더합니다.
+# 워커마다 따로 모으고 DB에서는 views = views + n 으로 더하기 때문에 워커끼리 충돌하지 않습니다.
+# (프로세스가 비정상 종료되면 마지막 주기의 조회수는 유실될 수 있습니다.)
+VIEW_FLUSH_INTERVAL = float(os.getenv("VIEW_FLUSH_INTERVAL", "10"))
+VIEW_FLUSH_SHUTDOWN_TIMEOUT = float(os.getenv("VIEW_FLUSH_SHUTDOWN_TIMEOUT", "5"))
+
+_plans = Plan.__table__
+_increment = (
+    _plans.update()
+    .where(_plans.c.id == bindparam("plan_id"))
+    .values(views=_plans.c.views + bindparam("n"))
+)
+
+
+class ViewCounter:
+    def __init__(self):
+        self._pending = Counter()
+        self._seen = Counter()  # 이 워커에서 센 누적 조회수 (flush해도 줄지 않음)
+        self._lock = threading.Lock()
+        self._task = None
+
+    def incr(self, plan_id: int, n: int = 1):
+        with self._lock:
+            self._pending[plan_id] += n
+            self._seen[plan_id] += n
+
+    def pending(self, plan_id: int) -> int:
+        with self._lock:
+            return self._pending.get(plan_id, 0)
+
+    def seen(self, plan_id: int) -> int:
+        with self._lock:
+            return self._seen.get(plan_id, 0)
+
+    def discard(self, plan_id: int):
+        with self._lock:
+            self._pending.pop(plan_id, None)
+            self._seen.pop(plan_id, None)
+
+    def flush(self) -> int:
+        with self._lock:
+            batch, self._pending = self._pending, Counter()
+        if not batch:
+            return 0
+        try:
+            # 워커마다 같은 순서(plan_id 오름차순)로 행 잠금을 잡아야 MySQL에서 서로 교착(deadlock)하지 않습니다.
+            with engine.begin() as conn:
+                conn.execute(_increment, [{"plan_id": plan_id, "n": n} for plan_id, n in sorted(batch.items())])
+        except Exception as e:
+            # 실패한 묶음은 다음 주기에 다시 시도합니다.
+            print(f"🚨 조회수 반영 실패: {e}")
+            with self._lock:
+                self._pending.update(batch)
+            return 0
+        return len(batch)
+
+    async def _run(self):
+        while True:
+            await asyncio.sleep(VIEW_FLUSH_INTERVAL)
+            await asyncio.to_thread(self.flush)
+
+    def start(self):
+        if self._task is None:
+            self._task = asyncio.ensure_future(self._run())
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            self._task = None
+        try:
+            await asyncio.wait_for(asyncio.to_thread(self.flush), timeout=VIEW_FLUSH_SHUTDOWN_TIMEOUT)
+        except asyncio.TimeoutError:
+            print("⚠️ 종료 중 조회수 반영이 제한 시간을 넘겨 중단되었습니다.")
+
+
+view_counter = ViewCounter()